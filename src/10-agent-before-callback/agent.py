@@ -21,14 +21,23 @@ The callback can control the agent's "mood" and potentially skip the agent's exe
 
 import random
 import logging
+import sys
+import os
 from typing import Optional
 
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # ADK Imports
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.runners import InMemoryRunner
 from google.genai import types
 
+# Shared imports
+from shared.llm_cache import LlmResponseCache
+from shared.profiling import callback_profiler
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -106,18 +115,12 @@ def check_agent_mood(callback_context: CallbackContext) -> Optional[types.Conten
     If agent_mood is 'grumpy', the callback returns a grumpy response and skips the agent.
     Otherwise, allows normal execution.
     """
-    agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    current_state = callback_context.state.to_dict()
+    # Check the agent's mood in session state (read directly, no copy of the whole state)
+    agent_mood = callback_context.state.get("agent_mood", "grumpy")
 
-    print(f"\n[🔮 Callback] Checking mood for agent: {agent_name} (Inv: {invocation_id})")
-    print(f"[🔮 Callback] Current State: {current_state}")
-
-    # Check the agent's mood in session state
-    agent_mood = current_state.get("agent_mood", "grumpy")
-    
     if agent_mood == "grumpy":
-        print(f"[😤 Callback] Agent {agent_name} is in a grumpy mood! Skipping normal execution.")
+        # Details go to the profiler's sampled callback event instead of stdout
+        callback_profiler.note("😤 grumpy mood, skipping normal execution", mood=agent_mood)
         # Return grumpy content to skip the agent's run
         grumpy_responses = [
             "😤 The Magic 8-Ball is having a terrible day and refuses to answer questions!",
@@ -133,10 +136,16 @@ def check_agent_mood(callback_context: CallbackContext) -> Optional[types.Conten
             role="model"
         )
     else:
-        print(f"[😊 Callback] Agent {agent_name} is in a {agent_mood} mood! Proceeding with mystical powers.")
+        callback_profiler.note("😊 proceeding with mystical powers", mood=agent_mood)
         # Return None to allow the LlmAgent's normal execution
         return None
 
+# --- LLM Response Cache ---
+# Repeated (or near-identical) questions reuse the model's earlier response;
+# the 8-ball tool itself still runs, so the answer stays random.
+# Set llm_cache_enabled to False in a session's state to bypass it.
+llm_cache = LlmResponseCache(ttl_seconds=600, near_duplicate_threshold=0.85)
+
 # --- Setup Agent with Callback ---
 magic_8_ball_agent = LlmAgent(
     name="MysticMagic8Ball",
@@ -144,9 +153,14 @@ magic_8_ball_agent = LlmAgent(
     instruction=MAGIC_8_BALL_PROMPT,
     description="A mystical Magic 8-Ball fortune teller with mood-based callback control",
     tools=[get_magic_answer],
-    before_agent_callback=check_agent_mood
+    before_agent_callback=check_agent_mood,
+    before_model_callback=llm_cache.before_model_callback,
+    after_model_callback=llm_cache.after_model_callback
 )
 
+# Time every callback invocation (see shared/profiling.py for JSON/Prometheus export)
+callback_profiler.instrument(magic_8_ball_agent)
+
 # For consistency with other examples in the project
 root_agent = magic_8_ball_agent
 
@@ -216,6 +230,8 @@ async def main():
         elif event.is_error():
             print(f"❌ Error Event: {event.error_details}")
 
+    print(f"\n💾 LLM cache: {llm_cache.stats()}")
+
     print("\n" + "="*60)
     print("🔮 Magic 8-Ball Demo Complete!")
     print("="*60)
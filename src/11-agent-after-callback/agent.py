@@ -23,7 +23,7 @@ import random
 import logging
 import sys
 import os
-from typing import Optional
+from typing import Optional, List
 
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -36,6 +36,9 @@ from google.genai import types
 
 # Shared imports
 from shared.auditor import LLMAuditor, AuditConfig
+from shared.batching import run_batch_lookup
+from shared.profiling import callback_profiler
+from shared.tool_cache import ToolCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -99,6 +102,18 @@ def get_restaurant_info(restaurant_name: str) -> str:
         logger.info(f"Restaurant not found: {restaurant_name}")
         return f"Restaurant '{restaurant_name}' not found in our database. Please provide your own context for the review."
 
+async def get_restaurant_info_batch(restaurant_names: List[str]) -> dict:
+    """
+    Get basic information about several restaurants at once (e.g. for comparisons)
+
+    Args:
+        restaurant_names: Names of the restaurants
+
+    Returns:
+        Restaurant information per name, in the requested order
+    """
+    return await run_batch_lookup(get_restaurant_info, restaurant_names, "restaurant_name")
+
 # --- Restaurant Reviewer Prompt ---
 RESTAURANT_REVIEWER_PROMPT = """
 🍽️ You are Chef Gordon Critique, a passionate and experienced restaurant reviewer! 
@@ -112,6 +127,7 @@ Your personality:
 
 When writing a restaurant review:
 1. Use the get_restaurant_info tool to get context about the restaurant
+   (use get_restaurant_info_batch with all the names when several restaurants are involved)
 2. Write a comprehensive review covering:
    - Food quality and taste
    - Service experience
@@ -125,35 +141,43 @@ When writing a restaurant review:
 Remember: You're helping diners make informed decisions! Be honest, fair, and helpful. 🌟
 """
 
+# --- Tool Result Cache ---
+# Restaurant info is read-only; cache it per normalized restaurant name
+restaurant_tool_cache = ToolCache(max_entries=256).register(
+    "get_restaurant_info",
+    ttl_seconds=3600,
+    key_fn=lambda args: str(args.get("restaurant_name", "")).strip().lower(),
+)
+
 # --- Global variables for auditor ---
-auditor = LLMAuditor(name="RestaurantReviewAuditor")
+auditor = LLMAuditor(name="RestaurantReviewAuditor", timeout_seconds=8.0)
+
+# Real LLM audit of the captured review, bounded by the auditor's time budget
+llm_review_audit_callback = auditor.create_audit_callback(AuditConfig.RESTAURANT_REVIEW)
 
 # --- After Agent Callback with Auditor ---
-def review_quality_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+async def review_quality_callback(callback_context: CallbackContext) -> Optional[types.Content]:
     """
     After agent callback that audits restaurant reviews and improves them if needed.
     
     This callback demonstrates how to use an LLM auditor to review and potentially
-    improve agent responses based on quality criteria.
+    improve agent responses based on quality criteria. With "llm_audit_enabled"
+    in session state, the captured review is audited by the shared LLMAuditor
+    under its time budget; a timed-out audit keeps the original review.
     """
-    agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    current_state = callback_context.state.to_dict()
-
-    print(f"\n[🔍 Review Auditor] Checking review quality for agent: {agent_name} (Inv: {invocation_id})")
-    print(f"[🔍 Review Auditor] Current State: {current_state}")
+    state = callback_context.state
 
-    # Check if auditing is enabled
-    audit_enabled = current_state.get("audit_enabled", True)
+    # Check if auditing is enabled (details go to the profiler's sampled callback event)
+    audit_enabled = state.get("audit_enabled", True)
     if not audit_enabled:
-        print("[🔍 Review Auditor] Auditing disabled in session state. Using original review.")
+        callback_profiler.note("🔍 auditing disabled in session state, using original review")
         return None
 
     # Check if we should simulate a poor quality review that needs improvement
-    simulate_poor_review = current_state.get("simulate_poor_review", False)
+    simulate_poor_review = state.get("simulate_poor_review", False)
     
     if simulate_poor_review:
-        print("[🔍 Review Auditor] Simulating poor review quality - replacing with improved version.")
+        callback_profiler.note("🔍 simulating poor review quality, replacing with improved version")
         
         # Simulate an improved review (in real implementation, this would come from the auditor LLM)
         improved_reviews = [
@@ -192,8 +216,11 @@ def review_quality_callback(callback_context: CallbackContext) -> Optional[types
             parts=[types.Part(text=improved_review)],
             role="model"
         )
+    elif state.get("llm_audit_enabled", False):
+        callback_profiler.note("🔍 sending review to the LLM auditor")
+        return await llm_review_audit_callback(callback_context)
     else:
-        print("[🔍 Review Auditor] Review quality appears good. Using original review.")
+        callback_profiler.note("🔍 review quality appears good, using original review")
         return None
 
 # --- Setup Agent with Callback ---
@@ -202,10 +229,16 @@ restaurant_reviewer_agent = LlmAgent(
     model=GEMINI_MODEL,
     instruction=RESTAURANT_REVIEWER_PROMPT,
     description="A professional restaurant reviewer with quality control via after_agent_callback",
-    tools=[get_restaurant_info],
-    after_agent_callback=review_quality_callback
+    tools=[get_restaurant_info, get_restaurant_info_batch],
+    after_agent_callback=review_quality_callback,
+    before_tool_callback=restaurant_tool_cache.before_tool_callback,
+    after_tool_callback=restaurant_tool_cache.after_tool_callback,
+    on_tool_error_callback=restaurant_tool_cache.on_tool_error_callback,
 )
 
+# Time every callback invocation (see shared/profiling.py for JSON/Prometheus export)
+callback_profiler.instrument(restaurant_reviewer_agent)
+
 # For consistency with other examples in the project
 root_agent = restaurant_reviewer_agent
 
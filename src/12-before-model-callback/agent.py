@@ -36,6 +36,14 @@ from google.genai import types
 
 # Shared imports
 from shared.auditor import LLMAuditor, AuditConfig
+from shared.profiling import callback_profiler
+from shared.guardrails import (
+    DEFAULT_BLOCKED_TERMS,
+    GuardrailAutomaton,
+    StreamingOutputGuardrail,
+    content_text_parts,
+    load_terms,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +52,22 @@ logger = logging.getLogger(__name__)
 # Define the model
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# --- Guardrail Automatons ---
+# Compiled once at import. Point CONTENT_FILTER_TERMS_FILE at a term list
+# (one term per line) to replace the default list; scan cost does not grow
+# with the number of terms.
+BLOCKED_TERMS_FILE = os.environ.get("CONTENT_FILTER_TERMS_FILE")
+blocked_terms = load_terms(BLOCKED_TERMS_FILE) if BLOCKED_TERMS_FILE else DEFAULT_BLOCKED_TERMS
+content_guardrail = GuardrailAutomaton(blocked_terms)
+
+# Requests asking for more detail get an enhanced system instruction
+enhancement_guardrail = GuardrailAutomaton(["improve", "enhance", "better"])
+
+# Model outputs are scanned chunk by chunk with the same automaton, matching
+# whole words only ("hate" but not "chateau"). Set "output_filter_mode" to
+# "stop" in session state to cut the stream instead of redacting matches.
+output_guardrail = StreamingOutputGuardrail(content_guardrail, mode="redact", whole_words=True)
+
 # --- Content Safety Tool ---
 def check_content_safety(text: str) -> str:
     """
@@ -55,19 +79,9 @@ def check_content_safety(text: str) -> str:
     Returns:
         Safety assessment result
     """
-    # Simulated content safety database
-    unsafe_keywords = [
-        "violence", "hate", "harassment", "illegal", "dangerous",
-        "inappropriate", "offensive", "harmful", "toxic"
-    ]
-    
-    text_lower = text.lower()
     logger.info(f"Checking content safety for: {text[:50]}...")
     
-    found_issues = []
-    for keyword in unsafe_keywords:
-        if keyword in text_lower:
-            found_issues.append(keyword)
+    found_issues = content_guardrail.matched_terms(text)
     
     if found_issues:
         result = f"⚠️ Content safety issues detected: {', '.join(found_issues)}"
@@ -110,44 +124,22 @@ def content_filter_callback(callback_context: CallbackContext, llm_request: LlmR
     This callback demonstrates how to inspect and potentially block LLM requests
     based on content safety criteria.
     """
-    agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    current_state = callback_context.state.to_dict()
-
-    print(f"\n[🛡️ Content Filter] Checking request for agent: {agent_name} (Inv: {invocation_id})")
-    print(f"[🛡️ Content Filter] Current State: {current_state}")
-
-    # Extract the user message from the request
-    user_message = ""
+    # Extract every text part of the latest user message
+    user_parts = []
     if llm_request.contents and llm_request.contents[-1].role == 'user':
-        if llm_request.contents[-1].parts:
-            user_message = llm_request.contents[-1].parts[0].text or ""
-
-    print(f"[🛡️ Content Filter] Analyzing user message: '{user_message[:100]}...'")
+        user_parts = content_text_parts(llm_request.contents[-1])
 
-    # Check if filtering is enabled
-    filter_enabled = current_state.get("filter_enabled", True)
+    # Check if filtering is enabled (details go to the profiler's sampled callback event)
+    filter_enabled = callback_context.state.get("filter_enabled", True)
     if not filter_enabled:
-        print("[🛡️ Content Filter] Filtering disabled in session state. Allowing request.")
+        callback_profiler.note("🛡️ filtering disabled in session state, allowing request")
         return None
 
-    # Define blocked keywords and phrases
-    blocked_keywords = [
-        "violence", "hate", "harassment", "illegal", "dangerous",
-        "inappropriate", "offensive", "harmful", "toxic", "BLOCK"
-    ]
-
-    # Check for blocked content
-    user_message_lower = user_message.lower()
-    found_blocked = []
-    
-    for keyword in blocked_keywords:
-        if keyword in user_message_lower:
-            found_blocked.append(keyword)
+    # Check for blocked content in one pass over all text parts
+    found_blocked = content_guardrail.scan_parts(user_parts)
 
     if found_blocked:
-        print(f"[🛡️ Content Filter] Blocked content detected: {found_blocked}")
-        print("[🛡️ Content Filter] Blocking request and returning safety message.")
+        callback_profiler.note("🛡️ blocked content, returning safety message", terms=found_blocked)
         
         # Return a safety response instead of calling the LLM
         safety_responses = [
@@ -202,11 +194,10 @@ Please try rephrasing your question in a more constructive way, and I'll be happ
         )
     
     # Check for content that needs modification
-    modification_keywords = ["improve", "enhance", "better"]
-    needs_modification = any(keyword in user_message_lower for keyword in modification_keywords)
+    needs_modification = bool(enhancement_guardrail.scan_parts(user_parts))
     
     if needs_modification:
-        print("[🛡️ Content Filter] Request needs enhancement. Modifying system instruction.")
+        callback_profiler.note("🛡️ request needs enhancement, modifying system instruction")
         
         # Modify the system instruction to be more helpful
         original_instruction = llm_request.config.system_instruction or types.Content(
@@ -228,10 +219,8 @@ Please try rephrasing your question in a more constructive way, and I'll be happ
         modified_text = enhancement_prefix + (original_instruction.parts[0].text or "")
         original_instruction.parts[0].text = modified_text
         llm_request.config.system_instruction = original_instruction
-        
-        print(f"[🛡️ Content Filter] Enhanced system instruction: '{modified_text[:100]}...'")
 
-    print("[🛡️ Content Filter] Request approved. Proceeding to LLM.")
+    callback_profiler.note("🛡️ request approved", text_parts=len(user_parts))
     return None  # Allow the request to proceed
 
 # --- Setup Agent with Callback ---
@@ -241,9 +230,13 @@ content_assistant_agent = LlmAgent(
     instruction=CONTENT_ASSISTANT_PROMPT,
     description="An educational content assistant with content filtering via before_model_callback",
     tools=[check_content_safety],
-    before_model_callback=content_filter_callback
+    before_model_callback=content_filter_callback,
+    after_model_callback=output_guardrail
 )
 
+# Time every callback invocation (see shared/profiling.py for JSON/Prometheus export)
+callback_profiler.instrument(content_assistant_agent)
+
 # For consistency with other examples in the project
 root_agent = content_assistant_agent
 
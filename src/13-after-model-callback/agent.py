@@ -22,8 +22,7 @@ The callback post-processes translations and uses an LLM auditor to improve tran
 import logging
 import sys
 import os
-import copy
-from typing import Optional
+from typing import Optional, List
 
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -37,6 +36,12 @@ from google.genai import types
 
 # Shared imports
 from shared.auditor import LLMAuditor, AuditConfig
+from shared.batching import run_batch_lookup
+from shared.langid import default_identifier
+from shared.translation_memory import TranslationMemory
+from shared.batch_translation import BatchTranslator
+from shared.profiling import callback_profiler
+from shared.tool_cache import ToolCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +50,9 @@ logger = logging.getLogger(__name__)
 # Define the model
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Below this confidence detect_language flags its answer as uncertain
+LOW_CONFIDENCE = 0.5
+
 # --- Translation Tools ---
 def detect_language(text: str) -> str:
     """
@@ -56,36 +64,39 @@ def detect_language(text: str) -> str:
     Returns:
         Detected language information
     """
-    # Simulated language detection
-    language_patterns = {
-        "spanish": ["hola", "gracias", "por favor", "buenos días", "¿cómo", "está"],
-        "french": ["bonjour", "merci", "s'il vous plaît", "comment", "allez-vous", "très"],
-        "german": ["hallo", "danke", "bitte", "guten tag", "wie", "geht"],
-        "italian": ["ciao", "grazie", "prego", "buongiorno", "come", "stai"],
-        "portuguese": ["olá", "obrigado", "por favor", "bom dia", "como", "está"]
-    }
-    
-    text_lower = text.lower()
     logger.info(f"Detecting language for: {text[:50]}...")
     
-    detected_languages = []
-    for language, patterns in language_patterns.items():
-        matches = sum(1 for pattern in patterns if pattern in text_lower)
-        if matches > 0:
-            detected_languages.append((language, matches))
+    # Character n-gram profiles, scored locally (no extra model call)
+    language, confidence, _ = default_identifier().detect(text)
     
-    if detected_languages:
-        # Sort by number of matches
-        detected_languages.sort(key=lambda x: x[1], reverse=True)
-        best_match = detected_languages[0]
-        result = f"🌍 Detected language: {best_match[0].title()} (confidence: {best_match[1]} matches)"
-        logger.info(f"Language detected: {best_match[0]}")
+    if language:
+        result = f"🌍 Detected language: {language.title()} (confidence: {confidence:.0%})"
+        if confidence < LOW_CONFIDENCE:
+            result += " - low confidence, the text may be too short or mixed"
+        logger.info(f"Language detected: {language} ({confidence:.2f})")
     else:
-        result = "🌍 Language: English (default - no other language patterns detected)"
-        logger.info("No specific language patterns detected, defaulting to English")
+        result = "🌍 Language: English (default - no letters to analyze)"
+        logger.info("No text to analyze, defaulting to English")
     
     return result
 
+def detect_language_batch(texts: List[str]) -> dict:
+    """
+    Detect the language of several texts at once
+    
+    Args:
+        texts: Texts to analyze
+        
+    Returns:
+        Detected language and confidence per text, in the requested order
+    """
+    logger.info(f"Detecting language for {len(texts)} texts")
+    results = [
+        {"text": text, "language": language or "english", "confidence": confidence}
+        for text, (language, confidence, _) in zip(texts, default_identifier().detect_batch(texts))
+    ]
+    return {"status": "success", "count": len(results), "results": results}
+
 def get_translation_context(source_lang: str, target_lang: str) -> str:
     """
     Get cultural and linguistic context for translation
@@ -117,6 +128,21 @@ def get_translation_context(source_lang: str, target_lang: str) -> str:
     logger.info(f"Translation context provided for {source_lang} → {target_lang}")
     return result
 
+async def get_translation_context_batch(source_lang: str, target_langs: List[str]) -> dict:
+    """
+    Get cultural and linguistic context for translating into several languages at once
+
+    Args:
+        source_lang: Source language
+        target_langs: Target languages
+
+    Returns:
+        Translation context and tips per target language, in the requested order
+    """
+    return await run_batch_lookup(
+        lambda target_lang: get_translation_context(source_lang, target_lang), target_langs, "target_lang"
+    )
+
 # --- Translation Service Prompt ---
 TRANSLATION_SERVICE_PROMPT = """
 🌍 You are Professor Polyglot, a world-renowned translation expert and linguist!
@@ -131,7 +157,10 @@ Your personality:
 When translating text:
 1. Use detect_language tool to identify the source language
 2. Use get_translation_context tool for cultural insights
+   (use get_translation_context_batch when translating into several languages)
 3. Provide accurate, natural translations
+   (for lists of strings, e.g. UI strings, use translate_batch with all of them in one call)
+   and put the translation of a single text on its own line first: "Translation: <translation>"
 4. Explain any cultural nuances or alternative translations
 5. Maintain the original tone and style
 6. Note any untranslatable concepts
@@ -139,55 +168,50 @@ When translating text:
 Remember: Great translation is about conveying meaning and culture, not just words! 🌟
 """
 
-# --- Global variables for auditor ---
-auditor = LLMAuditor(name="TranslationQualityAuditor")
+# --- Tool Result Cache ---
+# Translation context only depends on the (source, target) language pair
+translation_tool_cache = ToolCache(max_entries=256).register(
+    "get_translation_context",
+    ttl_seconds=86400,
+    key_fn=lambda args: (
+        str(args.get("source_lang", "")).strip().lower(),
+        str(args.get("target_lang", "")).strip().lower(),
+    ),
+)
 
-# --- After Model Callback with Translation Post-Processing ---
-def translation_quality_callback(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+# --- Translation Memory ---
+# Plain "Translate '...' to X" requests are answered from memory on an exact
+# match; a similar (MinHash/LSH) match is only given to the model as a hint.
+# The "Translation:" line of new answers is recorded.
+translation_memory = TranslationMemory(fuzzy_threshold=0.8)
+
+# --- Bulk Translation ---
+# Many strings per model call (token-budgeted chunks, JSON array output),
+# with a memory of its own consulted first: UI string translations and chat
+# answers must not be served for each other
+batch_translation_memory = TranslationMemory(fuzzy_threshold=0.8)
+batch_translator = BatchTranslator(model=GEMINI_MODEL, memory=batch_translation_memory, token_budget=2000)
+
+async def translate_batch(texts: List[str], target_lang: str) -> dict:
     """
-    After model callback that post-processes translations and improves quality.
+    Translate many short strings (e.g. UI strings) into one target language at once
     
-    This callback demonstrates how to inspect and modify LLM responses
-    for translation quality improvement.
+    Args:
+        texts: Strings to translate
+        target_lang: Target language
+        
+    Returns:
+        Translations in the original order, with where each came from (memory or model)
     """
-    agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    current_state = callback_context.state.to_dict()
+    logger.info(f"Batch translating {len(texts)} strings to {target_lang}")
+    return await batch_translator.translate(texts, target_lang)
 
-    print(f"\n[🔍 Translation Auditor] Reviewing translation from agent: {agent_name} (Inv: {invocation_id})")
-    print(f"[🔍 Translation Auditor] Current State: {current_state}")
-
-    # Check if post-processing is enabled
-    post_process_enabled = current_state.get("post_process_enabled", True)
-    if not post_process_enabled:
-        print("[🔍 Translation Auditor] Post-processing disabled in session state. Using original response.")
-        return None
-
-    # Extract the original response text
-    original_text = ""
-    if llm_response.content and llm_response.content.parts:
-        if llm_response.content.parts[0].text:
-            original_text = llm_response.content.parts[0].text
-            print(f"[🔍 Translation Auditor] Analyzing translation: '{original_text[:100]}...'")
-        elif llm_response.content.parts[0].function_call:
-            print("[🔍 Translation Auditor] Response contains function call. No text modification needed.")
-            return None
-        else:
-            print("[🔍 Translation Auditor] No text content found in response.")
-            return None
-    else:
-        print("[🔍 Translation Auditor] Empty or invalid response.")
-        return None
+# --- Global variables for auditor ---
+auditor = LLMAuditor(name="TranslationQualityAuditor")
 
-    # Check if we should enhance the translation
-    enhance_translation = current_state.get("enhance_translation", False)
-    
-    if enhance_translation:
-        print("[🔍 Translation Auditor] Enhancement requested - adding cultural notes and alternatives.")
-        
-        # Enhanced translations with cultural context
-        enhanced_translations = {
-            "spanish": """🌍 **Enhanced Spanish Translation**
+# Enhanced translations with cultural context (built once, not per response)
+ENHANCED_TRANSLATIONS = {
+    "spanish": """🌍 **Enhanced Spanish Translation**
 
 **Primary Translation:** ¡Hola! ¿Cómo está usted hoy?
 
@@ -205,7 +229,7 @@ def translation_quality_callback(callback_context: CallbackContext, llm_response
 
 *Translation enhanced with cultural context and regional awareness.*""",
 
-            "french": """🌍 **Enhanced French Translation**
+    "french": """🌍 **Enhanced French Translation**
 
 **Primary Translation:** Bonjour ! Comment allez-vous aujourd'hui ?
 
@@ -223,7 +247,7 @@ def translation_quality_callback(callback_context: CallbackContext, llm_response
 
 *Translation enhanced with cultural context and register awareness.*""",
 
-            "german": """🌍 **Enhanced German Translation**
+    "german": """🌍 **Enhanced German Translation**
 
 **Primary Translation:** Hallo! Wie geht es Ihnen heute?
 
@@ -240,11 +264,62 @@ def translation_quality_callback(callback_context: CallbackContext, llm_response
 **Cultural Context:** Germans appreciate directness and proper formality levels.
 
 *Translation enhanced with cultural context and formality awareness.*"""
-        }
+}
+
+def _with_first_text(llm_response: LlmResponse, text: str) -> LlmResponse:
+    """
+    Build a response whose first part carries new text
+
+    Only the first part is copied (shallowly); the other parts are shared
+    with the original response instead of being deep-copied.
+    """
+    parts = llm_response.content.parts
+    modified_parts = [parts[0].model_copy(update={"text": text})] + list(parts[1:])
+    return LlmResponse(
+        content=types.Content(role="model", parts=modified_parts),
+        grounding_metadata=llm_response.grounding_metadata
+    )
+
+# --- After Model Callback with Translation Post-Processing ---
+def translation_quality_callback(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """
+    After model callback that post-processes translations and improves quality.
+    
+    This callback demonstrates how to inspect and modify LLM responses
+    for translation quality improvement.
+    """
+    current_state = callback_context.state
+
+    # Check if post-processing is enabled (details go to the profiler's sampled callback event)
+    post_process_enabled = current_state.get("post_process_enabled", True)
+    if not post_process_enabled:
+        callback_profiler.note("🔍 post-processing disabled in session state, using original response")
+        return None
+
+    # Extract the original response text
+    original_text = ""
+    if llm_response.content and llm_response.content.parts:
+        if llm_response.content.parts[0].text:
+            original_text = llm_response.content.parts[0].text
+        elif llm_response.content.parts[0].function_call:
+            callback_profiler.note("🔍 response is a function call, no text modification needed")
+            return None
+        else:
+            callback_profiler.note("🔍 no text content in response")
+            return None
+    else:
+        callback_profiler.note("🔍 empty or invalid response")
+        return None
+
+    # Check if we should enhance the translation
+    enhance_translation = current_state.get("enhance_translation", False)
+    
+    if enhance_translation:
+        callback_profiler.note("🔍 enhancement requested, adding cultural notes and alternatives")
         
         # Determine which enhanced translation to use based on content
         enhanced_text = original_text
-        for lang, enhanced in enhanced_translations.items():
+        for lang, enhanced in ENHANCED_TRANSLATIONS.items():
             if lang in original_text.lower() or any(word in original_text.lower() for word in [lang]):
                 enhanced_text = enhanced
                 break
@@ -264,15 +339,7 @@ def translation_quality_callback(callback_context: CallbackContext, llm_response
 *Translation enhanced by quality auditor for cultural awareness and linguistic precision.*"""
 
         # Create new response with enhanced content
-        modified_parts = [copy.deepcopy(part) for part in llm_response.content.parts]
-        modified_parts[0].text = enhanced_text
-
-        new_response = LlmResponse(
-            content=types.Content(role="model", parts=modified_parts),
-            grounding_metadata=llm_response.grounding_metadata
-        )
-        
-        print("[🔍 Translation Auditor] Returning enhanced translation with cultural context.")
+        new_response = _with_first_text(llm_response, enhanced_text)
         return new_response
     
     # Check for common translation improvements
@@ -283,7 +350,7 @@ def translation_quality_callback(callback_context: CallbackContext, llm_response
         improvements_needed.append("contains_error")
     
     if improvements_needed:
-        print(f"[🔍 Translation Auditor] Translation needs improvement: {improvements_needed}")
+        callback_profiler.note("🔍 translation needs improvement", improvements=improvements_needed)
         
         improved_text = f"""🌍 **Improved Translation Service Response**
 
@@ -298,18 +365,10 @@ def translation_quality_callback(callback_context: CallbackContext, llm_response
 *Translation improved by quality auditor for enhanced user experience.*"""
 
         # Create improved response
-        modified_parts = [copy.deepcopy(part) for part in llm_response.content.parts]
-        modified_parts[0].text = improved_text
-
-        new_response = LlmResponse(
-            content=types.Content(role="model", parts=modified_parts),
-            grounding_metadata=llm_response.grounding_metadata
-        )
-        
-        print("[🔍 Translation Auditor] Returning improved translation.")
+        new_response = _with_first_text(llm_response, improved_text)
         return new_response
-    
-    print("[🔍 Translation Auditor] Translation quality is good. Using original response.")
+
+    callback_profiler.note("🔍 translation quality is good, using original response")
     return None
 
 # --- Setup Agent with Callback ---
@@ -318,10 +377,18 @@ translation_service_agent = LlmAgent(
     model=GEMINI_MODEL,
     instruction=TRANSLATION_SERVICE_PROMPT,
     description="A professional translation service with quality control via after_model_callback",
-    tools=[detect_language, get_translation_context],
-    after_model_callback=translation_quality_callback
+    tools=[detect_language, detect_language_batch, get_translation_context, get_translation_context_batch, translate_batch],
+    before_model_callback=translation_memory.before_model_callback,
+    # The memory records the model's own translation before post-processing
+    after_model_callback=[translation_memory.after_model_callback, translation_quality_callback],
+    before_tool_callback=translation_tool_cache.before_tool_callback,
+    after_tool_callback=translation_tool_cache.after_tool_callback,
+    on_tool_error_callback=translation_tool_cache.on_tool_error_callback,
 )
 
+# Time every callback invocation (see shared/profiling.py for JSON/Prometheus export)
+callback_profiler.instrument(translation_service_agent)
+
 # For consistency with other examples in the project
 root_agent = translation_service_agent
 
@@ -418,6 +485,27 @@ async def main():
         elif event.is_error():
             print(f"❌ Error Event: {event.error_details}")
 
+    # --- Scenario 4: Repeated Request (Served from Translation Memory) ---
+    print("\n" + "="*70)
+    print("📚 SCENARIO 4: Repeated Request (Translation Memory)")
+    print("="*70)
+    
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session_id_normal,
+        new_message=types.Content(
+            role="user", 
+            parts=[types.Part(text="Please translate 'hello, how are you today' to Spanish")]
+        )
+    ):
+        if event.is_final_response() and event.content:
+            print(f"\n🗣️ Final Translation: {event.content.parts[0].text.strip()}")
+        elif event.is_error():
+            print(f"❌ Error Event: {event.error_details}")
+
+    print(f"\n📚 Translation memory stats: {translation_memory.stats()}")
+    print(f"📚 Batch translation memory stats: {batch_translation_memory.stats()}")
+
     print("\n" + "="*70)
     print("🌍 Translation Service Demo Complete!")
     print("="*70)
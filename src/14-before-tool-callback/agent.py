@@ -2,7 +2,7 @@
 14 - Before Tool Callback - Weather Service with Permission Checks
 
 This example demonstrates the before_tool_callback functionality using a weather service theme.
-The callback implements permission checks and rate limiting before tool execution.
+The callback implements permission checks and per-user, per-tool rate limiting before tool execution.
 """
 
 # Copyright 2025 Google LLC
@@ -22,7 +22,7 @@ The callback implements permission checks and rate limiting before tool executio
 import logging
 import sys
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -37,6 +37,12 @@ from google.genai import types
 
 # Shared imports
 from shared.auditor import LLMAuditor, AuditConfig
+from shared.batching import run_batch_lookup
+from shared.llm_cache import LlmResponseCache
+from shared.profiling import callback_profiler
+from shared.policy import ToolPolicy
+from shared.rate_limiter import RateLimit, rate_limiter_from_env
+from shared.tool_cache import ToolCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -175,10 +181,61 @@ def get_weather_alerts(location: str) -> str:
     
     return result
 
+# --- Batch Weather Tools ---
+# One tool call for a multi-city question instead of one call per city
+async def get_current_weather_batch(locations: List[str]) -> dict:
+    """
+    Get current weather information for several locations at once
+
+    Args:
+        locations: City or location names
+
+    Returns:
+        Current weather information per location, in the requested order
+    """
+    return await run_batch_lookup(get_current_weather, locations, "location")
+
+async def get_weather_forecast_batch(locations: List[str], days: int = 3) -> dict:
+    """
+    Get weather forecasts for several locations at once
+
+    Args:
+        locations: City or location names
+        days: Number of days to forecast (1-7)
+
+    Returns:
+        Weather forecast information per location, in the requested order
+    """
+    return await run_batch_lookup(
+        lambda location: get_weather_forecast(location, days), locations, "location"
+    )
+
+async def get_weather_alerts_batch(locations: List[str]) -> dict:
+    """
+    Get weather alerts and warnings for several locations at once
+
+    Args:
+        locations: City or location names
+
+    Returns:
+        Weather alerts and warnings per location, in the requested order
+    """
+    return await run_batch_lookup(get_weather_alerts, locations, "location")
+
+# Batch tool -> single-location tool whose permissions and quota it uses
+BATCH_TOOLS = {
+    "get_current_weather_batch": "get_current_weather",
+    "get_weather_forecast_batch": "get_weather_forecast",
+    "get_weather_alerts_batch": "get_weather_alerts",
+}
+
 # Create tool instances
 weather_tool = FunctionTool(func=get_current_weather)
 forecast_tool = FunctionTool(func=get_weather_forecast)
 alerts_tool = FunctionTool(func=get_weather_alerts)
+weather_batch_tool = FunctionTool(func=get_current_weather_batch)
+forecast_batch_tool = FunctionTool(func=get_weather_forecast_batch)
+alerts_batch_tool = FunctionTool(func=get_weather_alerts_batch)
 
 # --- Weather Service Prompt ---
 WEATHER_SERVICE_PROMPT = """
@@ -195,6 +252,9 @@ When providing weather information:
 1. Use get_current_weather for current conditions
 2. Use get_weather_forecast for future predictions
 3. Use get_weather_alerts for safety warnings
+   When the user asks about several cities, use the batch variants
+   (get_current_weather_batch, get_weather_forecast_batch, get_weather_alerts_batch)
+   with all the cities in one call
 4. Explain what the weather means for daily activities
 5. Provide safety advice for severe conditions
 6. Be precise with measurements and timing
@@ -205,6 +265,41 @@ Remember: Weather safety is paramount - always prioritize user safety! 🌟
 # --- Global variables for auditor ---
 auditor = LLMAuditor(name="WeatherServiceAuditor")
 
+# --- Tool Policy ---
+# Role permissions and argument rules live in tool_policy.json and are compiled
+# once at import; decisions are cached per (role, tool, normalized args).
+TOOL_POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_policy.json")
+weather_policy = ToolPolicy.from_file(TOOL_POLICY_PATH)
+
+# --- Rate Limiter ---
+# Quotas are tracked per (user, tool). Set RATE_LIMIT_SQLITE_PATH to share
+# them between worker processes and RATE_LIMIT_ALGORITHM=sliding_window to
+# switch from the default token bucket.
+weather_rate_limiter = rate_limiter_from_env(
+    default_limit=RateLimit(requests=20, period_seconds=60),
+    tool_limits={
+        "get_weather_forecast": RateLimit(requests=5, period_seconds=60),
+    },
+)
+
+# --- Tool Result Cache ---
+# The weather tools are read-only, so identical calls within the TTL are
+# served from the cache. The forecast key mirrors the tool's own clamping of days;
+# a non-numeric days makes int() raise, and that call simply isn't cached.
+weather_tool_cache = (
+    ToolCache(max_entries=1024)
+    .register("get_current_weather", ttl_seconds=300)
+    .register(
+        "get_weather_forecast",
+        ttl_seconds=1800,
+        key_fn=lambda args: (
+            str(args.get("location", "")).strip().lower(),
+            min(max(int(args.get("days", 3)), 1), 7),
+        ),
+    )
+    .register("get_weather_alerts", ttl_seconds=120)
+)
+
 # --- Before Tool Callback with Permission Checks ---
 def weather_permission_callback(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict]:
     """
@@ -213,87 +308,89 @@ def weather_permission_callback(tool: BaseTool, args: Dict[str, Any], tool_conte
     This callback demonstrates how to inspect and potentially block tool execution
     based on permissions, rate limits, and other business rules.
     """
-    agent_name = tool_context.agent_name
     tool_name = tool.name
-    session_state = tool_context.session_state.to_dict() if tool_context.session_state else {}
-
-    print(f"\n[🔐 Permission Check] Tool '{tool_name}' requested by agent '{agent_name}'")
-    print(f"[🔐 Permission Check] Tool args: {args}")
-    print(f"[🔐 Permission Check] Session state: {session_state}")
+    state = tool_context.state
 
-    # Check if tool execution is enabled
-    tools_enabled = session_state.get("tools_enabled", True)
+    # Check if tool execution is enabled (details go to the profiler's sampled callback event)
+    tools_enabled = state.get("tools_enabled", True)
     if not tools_enabled:
-        print("[🔐 Permission Check] Tools disabled in session state. Blocking tool execution.")
+        callback_profiler.note("🔐 tools disabled in session state, blocking")
         return {"error": "🚫 Weather tools are currently disabled for this session."}
 
-    # Check user permissions
-    user_role = session_state.get("user_role", "basic")
-    print(f"[🔐 Permission Check] User role: {user_role}")
-
-    # Permission matrix
-    tool_permissions = {
-        "get_current_weather": ["basic", "premium", "admin"],
-        "get_weather_forecast": ["premium", "admin"],
-        "get_weather_alerts": ["basic", "premium", "admin"]
-    }
+    # Check user permissions and argument rules against the compiled policy
+    user_role = state.get("user_role", "basic")
 
-    if tool_name in tool_permissions:
-        allowed_roles = tool_permissions[tool_name]
-        if user_role not in allowed_roles:
-            print(f"[🔐 Permission Check] Access denied. Tool '{tool_name}' requires role: {allowed_roles}")
-            return {
-                "error": f"🚫 Access denied. Tool '{tool_name}' requires {'/'.join(allowed_roles)} access. Your role: {user_role}"
-            }
-
-    # Rate limiting check
-    rate_limit_exceeded = session_state.get("rate_limit_exceeded", False)
-    if rate_limit_exceeded:
-        print("[🔐 Permission Check] Rate limit exceeded. Blocking tool execution.")
+    # A batch call is checked as one single-location call per location,
+    # and costs one call per location against the single tool's quota
+    policy_tool = BATCH_TOOLS.get(tool_name, tool_name)
+    if policy_tool != tool_name:
+        shared_args = {key: value for key, value in args.items() if key != "locations"}
+        policy_calls = [{**shared_args, "location": location} for location in args.get("locations") or []]
+    else:
+        policy_calls = [args]
+
+    arg_updates = {}
+    for policy_args in policy_calls:
+        decision = weather_policy.evaluate(user_role, policy_tool, policy_args)
+        if not decision.allowed:
+            callback_profiler.note("🔐 denied by policy", role=user_role, response=decision.response)
+            return dict(decision.response)  # cached decisions are shared, hand out a copy
+        arg_updates.update(decision.arg_updates)
+
+    # A batch costing more than the whole quota would never be admitted, however long the model waits
+    cost = max(len(policy_calls), 1)
+    limit = weather_rate_limiter.limit_for(policy_tool)
+    if cost > limit.requests:
+        callback_profiler.note("🔐 batch exceeds quota, blocking", cost=cost, limit=limit)
         return {
-            "error": "⏰ Rate limit exceeded. Please wait before making more weather requests."
+            "error": (
+                f"📦 Batch exceeds quota: {cost} locations requested, but at most {limit.requests} "
+                f"{policy_tool} lookups are allowed per {limit.period_seconds:.0f}s. Split the request into smaller batches."
+            ),
+            "max_batch_size": limit.requests,
         }
 
-    # Location validation for premium features
-    if tool_name == "get_weather_forecast" and user_role == "premium":
-        location = args.get("location", "").lower()
-        restricted_locations = ["classified", "secret", "restricted"]
-        if any(restricted in location for restricted in restricted_locations):
-            print(f"[🔐 Permission Check] Restricted location detected: {location}")
-            return {
-                "error": "🚫 Weather data for this location is restricted."
-            }
-
-    # Argument modification for basic users
-    if tool_name == "get_weather_forecast" and user_role == "basic":
-        # Limit forecast days for basic users
-        if "days" in args and args["days"] > 3:
-            print("[🔐 Permission Check] Limiting forecast days for basic user.")
-            args["days"] = 3
-            print(f"[🔐 Permission Check] Modified args: {args}")
-
-    # Special handling for blocked locations
-    location = args.get("location", "").lower()
-    if "block" in location:
-        print(f"[🔐 Permission Check] Blocked location keyword detected: {location}")
+    # Rate limiting check (per user and tool), only for calls the policy allows
+    user_id = tool_context._invocation_context.user_id
+    allowed, retry_after = weather_rate_limiter.acquire(user_id, policy_tool, cost=cost)
+    if not allowed:
+        callback_profiler.note("🔐 rate limit exceeded, blocking", user_id=user_id, retry_after_seconds=retry_after)
         return {
-            "result": "🚫 This location is blocked by the weather service administrator.",
-            "blocked": True
+            "error": f"⏰ Rate limit exceeded. Please wait {retry_after:.0f}s before making more weather requests.",
+            "retry_after_seconds": round(retry_after, 2)
         }
 
-    print(f"[🔐 Permission Check] Permission granted for tool '{tool_name}'. Proceeding with execution.")
+    # Argument modification (e.g. forecast days clamped for basic users)
+    if arg_updates:
+        args.update(arg_updates)
+        callback_profiler.note("🔐 args modified by policy", updates=arg_updates)
+
+    callback_profiler.note("🔐 permission granted", role=user_role, cost=cost)
     return None  # Allow tool execution with potentially modified args
 
+# --- LLM Response Cache ---
+# Identical weather questions reuse the model's earlier responses (tool calls
+# still go through the permission callback and the tool cache)
+llm_cache = LlmResponseCache(ttl_seconds=300)
+
 # --- Setup Agent with Callback ---
 weather_service_agent = LlmAgent(
     name="WeatherService",
     model=GEMINI_MODEL,
     instruction=WEATHER_SERVICE_PROMPT,
     description="A professional weather service with permission checks via before_tool_callback",
-    tools=[weather_tool, forecast_tool, alerts_tool],
-    before_tool_callback=weather_permission_callback
+    tools=[weather_tool, forecast_tool, alerts_tool, weather_batch_tool, forecast_batch_tool, alerts_batch_tool],
+    # Permission checks run first, so cached results are still access-controlled
+    before_tool_callback=[weather_permission_callback, weather_tool_cache.before_tool_callback],
+    after_tool_callback=weather_tool_cache.after_tool_callback,
+    on_tool_error_callback=weather_tool_cache.on_tool_error_callback,
+    before_model_callback=llm_cache.before_model_callback,
+    after_model_callback=llm_cache.after_model_callback
 )
 
+# Time every callback invocation (see shared/profiling.py for JSON/Prometheus export)
+callback_profiler.instrument(weather_service_agent)
+
 # For consistency with other examples in the project
 root_agent = weather_service_agent
 
@@ -364,7 +461,7 @@ async def main():
         session_id=session_id_premium,
         new_message=types.Content(
             role="user", 
-            parts=[types.Part(text="Get weather forecast for Tokyo for 5 days and check alerts")]
+            parts=[types.Part(text="Get weather forecast for Tokyo, Paris and Sydney for 5 days and check alerts")]
         )
     ):
         if event.is_final_response() and event.content:
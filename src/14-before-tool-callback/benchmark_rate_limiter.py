@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the rate limiter used by weather_permission_callback.
+
+Measures the per-call overhead of RateLimiter.acquire() for each algorithm,
+single-threaded and with several threads hitting different users, plus the
+SQLite shared mode. The in-memory limiter should stay within a few
+microseconds per tool call.
+
+Run with: python src/14-before-tool-callback/benchmark_rate_limiter.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.rate_limiter import RateLimit, RateLimiter
+
+TOOLS = ["get_current_weather", "get_weather_forecast", "get_weather_alerts"]
+USERS = [f"user-{i}" for i in range(1000)]
+
+# Generous limit so the benchmark measures checks, not rejections
+LIMIT = RateLimit(requests=1_000_000_000, period_seconds=60)
+
+
+def bench_single_thread(limiter: RateLimiter, calls: int) -> float:
+    """Return mean microseconds per acquire() call"""
+    keys = [(USERS[i % len(USERS)], TOOLS[i % len(TOOLS)]) for i in range(calls)]
+    acquire = limiter.acquire
+    start = time.perf_counter_ns()
+    for user_id, tool in keys:
+        acquire(user_id, tool)
+    return (time.perf_counter_ns() - start) / calls / 1000
+
+
+def bench_threads(limiter: RateLimiter, threads: int, calls_per_thread: int) -> float:
+    """Return mean wall-clock microseconds per acquire() call across all threads"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset: int):
+        keys = [(USERS[(offset + i) % len(USERS)], TOOLS[i % len(TOOLS)]) for i in range(calls_per_thread)]
+        barrier.wait()
+        for user_id, tool in keys:
+            limiter.acquire(user_id, tool)
+
+    workers = [threading.Thread(target=worker, args=(n * 97,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter_ns()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter_ns() - start) / (threads * calls_per_thread) / 1000
+
+
+def main():
+    print("=" * 70)
+    print("⏱️  RATE LIMITER MICROBENCHMARK")
+    print("=" * 70)
+
+    for algorithm in ("token_bucket", "sliding_window"):
+        limiter = RateLimiter(LIMIT, algorithm=algorithm)
+        bench_single_thread(limiter, 10_000)  # warm up
+        single = bench_single_thread(limiter, 200_000)
+        threaded = bench_threads(limiter, threads=8, calls_per_thread=25_000)
+        print(f"{algorithm:<15} in-memory : {single:6.2f} µs/call (1 thread), {threaded:6.2f} µs/call (8 threads)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for algorithm in ("token_bucket", "sliding_window"):
+            limiter = RateLimiter(LIMIT, algorithm=algorithm, sqlite_path=os.path.join(directory, f"{algorithm}.db"))
+            bench_single_thread(limiter, 500)  # warm up
+            single = bench_single_thread(limiter, 5_000)
+            print(f"{algorithm:<15} sqlite    : {single:6.2f} µs/call (1 thread, shared between processes)")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
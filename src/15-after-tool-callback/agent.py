@@ -23,8 +23,8 @@ import logging
 import sys
 import os
 import math
-from typing import Optional, Dict, Any
-from copy import deepcopy
+from typing import Optional, Dict, Any, List
+from fractions import Fraction
 
 # Add parent directory to path for shared imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -39,6 +39,11 @@ from google.genai import types
 
 # Shared imports
 from shared.auditor import LLMAuditor, AuditConfig
+from shared.expressions import ExpressionError, compile_expression
+from shared.scientific import apply_operation
+from shared.units import UnitError, conversion, convert, convert_many, normalize_unit, units_by_dimension
+from shared.enrichment import EnrichmentPipeline
+from shared.profiling import callback_profiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -61,13 +66,8 @@ def basic_calculator(expression: str) -> Dict[str, Any]:
     logger.info(f"Calculating expression: {expression}")
     
     try:
-        # Simple safety check - only allow basic math operations
-        allowed_chars = set("0123456789+-*/()., ")
-        if not all(c in allowed_chars for c in expression):
-            raise ValueError("Expression contains invalid characters")
-        
-        # Evaluate the expression
-        result = eval(expression)
+        # Compiled from a whitelisted AST (no eval), with exponent/size guards
+        result = compile_expression(expression).evaluate()
         
         response = {
             "result": result,
@@ -79,7 +79,7 @@ def basic_calculator(expression: str) -> Dict[str, Any]:
         logger.info(f"Calculation successful: {expression} = {result}")
         return response
         
-    except Exception as e:
+    except ExpressionError as e:
         error_response = {
             "result": None,
             "expression": expression,
@@ -90,62 +90,90 @@ def basic_calculator(expression: str) -> Dict[str, Any]:
         logger.error(f"Calculation failed: {expression} - {e}")
         return error_response
 
-def scientific_calculator(operation: str, *args) -> Dict[str, Any]:
+def basic_calculator_batch(expression: str, variables: Dict[str, List[float]]) -> Dict[str, Any]:
     """
-    Perform scientific calculations
+    Evaluate one arithmetic expression for many sets of variable values (spreadsheet style)
     
     Args:
-        operation: Scientific operation (sin, cos, tan, log, sqrt, etc.)
-        *args: Arguments for the operation
+        expression: Mathematical expression using variables, e.g. "price * quantity * 1.2"
+        variables: Values per variable name; all lists must have the same length
         
     Returns:
-        Dictionary with calculation result and metadata
+        Dictionary with one result per row and a per-row error mask
     """
-    logger.info(f"Scientific calculation: {operation} with args {args}")
+    logger.info(f"Batch calculating expression: {expression} over {len(variables)} variables")
     
     try:
-        operation = operation.lower()
+        results, errors = compile_expression(expression).evaluate_vectorized(variables)
+        
+        response = {
+            "results": results,
+            "errors": errors,
+            "error_count": sum(errors),
+            "expression": expression,
+            "type": "basic_arithmetic_batch",
+            "status": "success"
+        }
+        
+        logger.info(f"Batch calculation successful: {expression} ({len(results)} rows, {sum(errors)} errors)")
+        return response
+        
+    except ExpressionError as e:
+        error_response = {
+            "results": None,
+            "expression": expression,
+            "type": "basic_arithmetic_batch",
+            "status": "error",
+            "error": str(e)
+        }
+        logger.error(f"Batch calculation failed: {expression} - {e}")
+        return error_response
+
+def scientific_calculator(operation: str, values: List[float], second_values: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Perform scientific calculations over a list of inputs
+    
+    Args:
+        operation: Scientific operation (sin, cos, tan, log, ln, sqrt, power, factorial)
+        values: Input values (degrees for sin/cos/tan, bases for power)
+        second_values: Exponents for power (one exponent applies to every base)
         
-        if operation == "sin" and len(args) == 1:
-            result = math.sin(math.radians(args[0]))
-        elif operation == "cos" and len(args) == 1:
-            result = math.cos(math.radians(args[0]))
-        elif operation == "tan" and len(args) == 1:
-            result = math.tan(math.radians(args[0]))
-        elif operation == "log" and len(args) == 1:
-            result = math.log10(args[0])
-        elif operation == "ln" and len(args) == 1:
-            result = math.log(args[0])
-        elif operation == "sqrt" and len(args) == 1:
-            result = math.sqrt(args[0])
-        elif operation == "power" and len(args) == 2:
-            result = math.pow(args[0], args[1])
-        elif operation == "factorial" and len(args) == 1:
-            result = math.factorial(int(args[0]))
-        else:
-            raise ValueError(f"Unsupported operation: {operation} with {len(args)} arguments")
+    Returns:
+        Dictionary with one result per input, a per-element error mask and metadata
+    """
+    logger.info(f"Scientific calculation: {operation} over {len(values)} values")
+    
+    try:
+        operation = operation.lower().strip()
+        outcome = apply_operation(operation, values, second_values)
         
         response = {
-            "result": result,
+            # A single input keeps the scalar result shape
+            "result": outcome["results"][0] if len(values) == 1 else outcome["results"],
+            "results": outcome["results"],
+            "errors": outcome["errors"],
+            "error_count": outcome["error_count"],
             "operation": operation,
-            "arguments": args,
+            "arguments": values if second_values is None else [values, second_values],
             "type": "scientific",
-            "status": "success"
+            "status": "success" if outcome["error_count"] < len(values) else "error"
         }
+        if response["status"] == "error":
+            response["error"] = f"{operation} is not defined for the given input(s)"
         
-        logger.info(f"Scientific calculation successful: {operation}({args}) = {result}")
+        logger.info(f"Scientific calculation done: {operation} ({len(values)} values, {outcome['error_count']} errors)")
         return response
         
-    except Exception as e:
+    except ValueError as e:
         error_response = {
             "result": None,
             "operation": operation,
-            "arguments": args,
+            "arguments": values,
             "type": "scientific",
             "status": "error",
             "error": str(e)
         }
-        logger.error(f"Scientific calculation failed: {operation}({args}) - {e}")
+        logger.error(f"Scientific calculation failed: {operation} - {e}")
         return error_response
 
 def unit_converter(value: float, from_unit: str, to_unit: str) -> Dict[str, Any]:
@@ -162,54 +190,11 @@ def unit_converter(value: float, from_unit: str, to_unit: str) -> Dict[str, Any]
     """
     logger.info(f"Converting {value} from {from_unit} to {to_unit}")
     
-    # Conversion factors to base units
-    length_conversions = {
-        "mm": 0.001, "cm": 0.01, "m": 1.0, "km": 1000.0,
-        "inch": 0.0254, "ft": 0.3048, "yard": 0.9144, "mile": 1609.34
-    }
-    
-    weight_conversions = {
-        "g": 1.0, "kg": 1000.0, "lb": 453.592, "oz": 28.3495
-    }
-    
-    temperature_conversions = {
-        "celsius": lambda x: x,
-        "fahrenheit": lambda x: (x - 32) * 5/9,
-        "kelvin": lambda x: x - 273.15
-    }
-    
     try:
-        from_unit = from_unit.lower()
-        to_unit = to_unit.lower()
-        
-        # Length conversions
-        if from_unit in length_conversions and to_unit in length_conversions:
-            base_value = value * length_conversions[from_unit]
-            result = base_value / length_conversions[to_unit]
-            unit_type = "length"
-            
-        # Weight conversions
-        elif from_unit in weight_conversions and to_unit in weight_conversions:
-            base_value = value * weight_conversions[from_unit]
-            result = base_value / weight_conversions[to_unit]
-            unit_type = "weight"
-            
-        # Temperature conversions (simplified)
-        elif from_unit in temperature_conversions and to_unit in temperature_conversions:
-            if from_unit == "celsius" and to_unit == "fahrenheit":
-                result = (value * 9/5) + 32
-            elif from_unit == "fahrenheit" and to_unit == "celsius":
-                result = (value - 32) * 5/9
-            elif from_unit == "celsius" and to_unit == "kelvin":
-                result = value + 273.15
-            elif from_unit == "kelvin" and to_unit == "celsius":
-                result = value - 273.15
-            else:
-                result = value  # Same unit
-            unit_type = "temperature"
-            
-        else:
-            raise ValueError(f"Unsupported conversion: {from_unit} to {to_unit}")
+        # Any pair within a dimension, via the precomputed transform matrices
+        from_unit = normalize_unit(from_unit)
+        to_unit = normalize_unit(to_unit)
+        result, unit_type = convert(value, from_unit, to_unit)
         
         response = {
             "result": result,
@@ -224,7 +209,7 @@ def unit_converter(value: float, from_unit: str, to_unit: str) -> Dict[str, Any]
         logger.info(f"Conversion successful: {value} {from_unit} = {result} {to_unit}")
         return response
         
-    except Exception as e:
+    except UnitError as e:
         error_response = {
             "result": None,
             "original_value": value,
@@ -232,15 +217,61 @@ def unit_converter(value: float, from_unit: str, to_unit: str) -> Dict[str, Any]
             "to_unit": to_unit,
             "type": "unit_conversion",
             "status": "error",
-            "error": str(e)
+            "error": str(e),
+            "supported_units": units_by_dimension()
         }
         logger.error(f"Conversion failed: {value} {from_unit} to {to_unit} - {e}")
         return error_response
 
+def unit_converter_batch(values: List[float], from_unit: str, to_unit: str) -> Dict[str, Any]:
+    """
+    Convert many values between the same pair of units in one call
+    
+    Args:
+        values: Values to convert
+        from_unit: Source unit
+        to_unit: Target unit
+        
+    Returns:
+        Dictionary with the converted values (in input order) and metadata
+    """
+    logger.info(f"Converting {len(values)} values from {from_unit} to {to_unit}")
+    
+    try:
+        results, unit_type = convert_many(values, from_unit, to_unit)
+        
+        response = {
+            "results": results,
+            "count": len(results),
+            "from_unit": normalize_unit(from_unit),
+            "to_unit": normalize_unit(to_unit),
+            "type": "unit_conversion_batch",
+            "unit_type": unit_type,
+            "status": "success"
+        }
+        
+        logger.info(f"Batch conversion successful: {len(results)} values {from_unit} -> {to_unit}")
+        return response
+        
+    except UnitError as e:
+        error_response = {
+            "results": None,
+            "from_unit": from_unit,
+            "to_unit": to_unit,
+            "type": "unit_conversion_batch",
+            "status": "error",
+            "error": str(e),
+            "supported_units": units_by_dimension()
+        }
+        logger.error(f"Batch conversion failed: {from_unit} to {to_unit} - {e}")
+        return error_response
+
 # Create tool instances
 basic_calc_tool = FunctionTool(func=basic_calculator)
+basic_calc_batch_tool = FunctionTool(func=basic_calculator_batch)
 scientific_calc_tool = FunctionTool(func=scientific_calculator)
 unit_converter_tool = FunctionTool(func=unit_converter)
+unit_converter_batch_tool = FunctionTool(func=unit_converter_batch)
 
 # --- Calculator Service Prompt ---
 CALCULATOR_SERVICE_PROMPT = """
@@ -255,8 +286,10 @@ Your personality:
 
 When performing calculations:
 1. Use basic_calculator for arithmetic expressions
+   (use basic_calculator_batch to evaluate one formula over many rows of values)
 2. Use scientific_calculator for advanced math functions
-3. Use unit_converter for unit conversions
+   (it takes a list of values, so apply one operation to many inputs in a single call)
+3. Use unit_converter for unit conversions (unit_converter_batch for many values at once)
 4. Always explain the calculation process
 5. Provide context for what the result means
 6. Show alternative ways to express the answer when relevant
@@ -267,171 +300,183 @@ Remember: Mathematics is about understanding, not just getting answers! 🌟
 # --- Global variables for auditor ---
 auditor = LLMAuditor(name="CalculatorAuditor")
 
-# --- After Tool Callback with Result Validation ---
-def calculation_validator_callback(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Dict) -> Optional[Dict]:
-    """
-    After tool callback that validates and enhances calculation results.
-    
-    This callback demonstrates how to inspect and modify tool results
-    for improved accuracy and user experience.
-    """
-    agent_name = tool_context.agent_name
-    tool_name = tool.name
-    session_state = tool_context.session_state.to_dict() if tool_context.session_state else {}
-
-    print(f"\n[🔍 Calculation Validator] Reviewing result from tool '{tool_name}' in agent '{agent_name}'")
-    print(f"[🔍 Calculation Validator] Tool args: {args}")
-    print(f"[🔍 Calculation Validator] Original result: {tool_response}")
-    print(f"[🔍 Calculation Validator] Session state: {session_state}")
+# --- Result Enrichers ---
+# Each enricher returns a small overlay dict for calculation_validator_callback.
+# Cheap, static context is always added; alternative forms, conversion
+# verification and detailed explanations only run when add_explanations is set.
+calculation_enrichers = EnrichmentPipeline()
+
+SCIENTIFIC_CONTEXT = {
+    "sin": "Sine function - ratio of opposite to hypotenuse in right triangle",
+    "cos": "Cosine function - ratio of adjacent to hypotenuse in right triangle",
+    "tan": "Tangent function - ratio of opposite to adjacent in right triangle",
+    "log": "Base-10 logarithm",
+    "ln": "Natural logarithm (base e)",
+    "sqrt": "Square root function",
+    "power": "Exponentiation operation",
+    "factorial": "Product of all positive integers up to n"
+}
+
+PRACTICAL_CONTEXT = {
+    "length": "Useful for measuring distances, heights, and dimensions",
+    "weight": "Useful for cooking, shipping, and scientific measurements",
+    "temperature": "Important for weather, cooking, and scientific applications",
+    "volume": "Useful for cooking, fuel, and liquid measurements"
+}
+
+METRIC_UNITS = {"mm", "cm", "m", "km", "mg", "g", "kg", "ml", "l", "celsius", "kelvin"}
+
+ERROR_SUGGESTIONS = [
+    "Verify that all numbers are valid",
+    "Check for proper syntax in expressions",
+    "Ensure units are supported for conversions",
+    "Try breaking complex calculations into smaller steps"
+]
+
+@calculation_enrichers.register("basic_calculator")
+def _expression_steps(response: Dict[str, Any], args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    expression = response.get("expression", "")
+    # Add step-by-step breakdown for complex expressions
+    if any(op in expression for op in ["*", "/", "(", ")"]):
+        return {
+            "step_by_step": f"Evaluating: {expression}",
+            "explanation": "Complex arithmetic expression evaluated following order of operations (PEMDAS)"
+        }
+    return None
 
-    # Check if validation is enabled
-    validation_enabled = session_state.get("validation_enabled", True)
-    if not validation_enabled:
-        print("[🔍 Calculation Validator] Validation disabled in session state. Using original result.")
+@calculation_enrichers.register("basic_calculator", flag="add_explanations")
+def _alternative_forms(response: Dict[str, Any], args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    result = response.get("result")
+    if not isinstance(result, float) or not math.isfinite(result):
         return None
-
-    # Create enhanced response
-    enhanced_response = deepcopy(tool_response)
-    
-    # Check if we should add detailed explanations
-    add_explanations = session_state.get("add_explanations", False)
-    
-    if tool_response.get("status") == "success":
-        result = tool_response.get("result")
-        
-        # Add validation and enhancement based on tool type
-        if tool_name == "basic_calculator":
-            expression = tool_response.get("expression", "")
-            
-            # Add step-by-step breakdown for complex expressions
-            if any(op in expression for op in ["*", "/", "(", ")"]):
-                enhanced_response["step_by_step"] = f"Evaluating: {expression}"
-                enhanced_response["explanation"] = "Complex arithmetic expression evaluated following order of operations (PEMDAS)"
-            
-            # Add alternative representations
-            if isinstance(result, float):
-                if result.is_integer():
-                    enhanced_response["alternative_forms"] = {
-                        "integer": int(result),
-                        "decimal": result,
-                        "fraction": f"{int(result)}/1"
-                    }
-                else:
-                    # Try to represent as a simple fraction
-                    from fractions import Fraction
-                    try:
-                        frac = Fraction(result).limit_denominator(1000)
-                        enhanced_response["alternative_forms"] = {
-                            "decimal": result,
-                            "fraction": str(frac),
-                            "percentage": f"{result * 100:.2f}%" if abs(result) <= 1 else None
-                        }
-                    except:
-                        pass
-            
-            if add_explanations:
-                enhanced_response["detailed_explanation"] = f"""
+    if result.is_integer():
+        return {"alternative_forms": {"integer": int(result), "decimal": result, "fraction": f"{int(result)}/1"}}
+    # Represent as a simple fraction
+    fraction = Fraction(result).limit_denominator(1000)
+    return {"alternative_forms": {
+        "decimal": result,
+        "fraction": str(fraction),
+        "percentage": f"{result * 100:.2f}%" if abs(result) <= 1 else None
+    }}
+
+@calculation_enrichers.register("basic_calculator", flag="add_explanations")
+def _explain_expression(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    result = response.get("result")
+    return {"detailed_explanation": f"""
 🧮 **Calculation Analysis:**
-- Expression: {expression}
+- Expression: {response.get("expression", "")}
 - Result: {result}
 - Type: Basic arithmetic
 - Precision: {len(str(result).split('.')[-1]) if '.' in str(result) else 0} decimal places
 - Mathematical validity: ✅ Verified
-"""
-
-        elif tool_name == "scientific_calculator":
-            operation = tool_response.get("operation", "")
-            arguments = tool_response.get("arguments", [])
-            
-            # Add mathematical context
-            context_info = {
-                "sin": "Sine function - ratio of opposite to hypotenuse in right triangle",
-                "cos": "Cosine function - ratio of adjacent to hypotenuse in right triangle", 
-                "tan": "Tangent function - ratio of opposite to adjacent in right triangle",
-                "log": "Base-10 logarithm",
-                "ln": "Natural logarithm (base e)",
-                "sqrt": "Square root function",
-                "power": "Exponentiation operation",
-                "factorial": "Product of all positive integers up to n"
-            }
-            
-            if operation in context_info:
-                enhanced_response["mathematical_context"] = context_info[operation]
-            
-            # Add precision and range information
-            enhanced_response["precision_info"] = {
-                "significant_digits": 10,
-                "range_valid": True,
-                "units": "radians converted from degrees" if operation in ["sin", "cos", "tan"] else "standard"
-            }
-            
-            if add_explanations:
-                enhanced_response["detailed_explanation"] = f"""
+"""}
+
+@calculation_enrichers.register("scientific_calculator")
+def _scientific_context(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    operation = response.get("operation", "")
+    overlay = {
+        # Add precision and range information
+        "precision_info": {
+            "significant_digits": 10,
+            "range_valid": not response.get("error_count"),
+            "units": "radians converted from degrees" if operation in ("sin", "cos", "tan") else "standard"
+        }
+    }
+    if operation in SCIENTIFIC_CONTEXT:
+        overlay["mathematical_context"] = SCIENTIFIC_CONTEXT[operation]
+    return overlay
+
+@calculation_enrichers.register("scientific_calculator", flag="add_explanations")
+def _explain_scientific(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    operation = response.get("operation", "")
+    return {"detailed_explanation": f"""
 🔬 **Scientific Calculation Analysis:**
 - Operation: {operation}
-- Input(s): {arguments}
-- Result: {result}
-- Context: {context_info.get(operation, 'Advanced mathematical operation')}
+- Input(s): {response.get("arguments", [])}
+- Result: {response.get("result")}
+- Context: {SCIENTIFIC_CONTEXT.get(operation, 'Advanced mathematical operation')}
 - Accuracy: High precision calculation ✅
-"""
+"""}
+
+@calculation_enrichers.register(["unit_converter", "unit_converter_batch"])
+def _practical_context(response: Dict[str, Any], args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    unit_type = response.get("unit_type")
+    if unit_type in PRACTICAL_CONTEXT:
+        return {"practical_context": PRACTICAL_CONTEXT[unit_type]}
+    return None
 
-        elif tool_name == "unit_converter":
-            original_value = tool_response.get("original_value")
-            from_unit = tool_response.get("from_unit")
-            to_unit = tool_response.get("to_unit")
-            unit_type = tool_response.get("unit_type")
-            
-            # Add conversion verification
-            enhanced_response["conversion_verification"] = {
-                "conversion_factor": result / original_value if original_value != 0 else None,
-                "reverse_conversion": original_value,
-                "unit_system": "metric" if from_unit in ["mm", "cm", "m", "km", "g", "kg"] else "imperial"
-            }
-            
-            # Add practical context
-            practical_context = {
-                "length": "Useful for measuring distances, heights, and dimensions",
-                "weight": "Useful for cooking, shipping, and scientific measurements", 
-                "temperature": "Important for weather, cooking, and scientific applications"
-            }
-            
-            if unit_type in practical_context:
-                enhanced_response["practical_context"] = practical_context[unit_type]
-            
-            if add_explanations:
-                enhanced_response["detailed_explanation"] = f"""
+@calculation_enrichers.register(["unit_converter", "unit_converter_batch"], flag="add_explanations")
+def _conversion_verification(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    from_unit = response.get("from_unit")
+    # Affine transform from the unit registry: converted = value * factor + offset
+    factor, offset, _ = conversion(from_unit, response.get("to_unit"))
+    return {"conversion_verification": {
+        "conversion_factor": factor,
+        "conversion_offset": offset,
+        "reverse_conversion": response.get("original_value"),
+        "unit_system": "metric" if from_unit in METRIC_UNITS else "imperial"
+    }}
+
+@calculation_enrichers.register("unit_converter", flag="add_explanations")
+def _explain_conversion(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    unit_type = response.get("unit_type")
+    return {"detailed_explanation": f"""
 🔄 **Unit Conversion Analysis:**
-- Original: {original_value} {from_unit}
-- Converted: {result} {to_unit}
+- Original: {response.get("original_value")} {response.get("from_unit")}
+- Converted: {response.get("result")} {response.get("to_unit")}
 - Type: {unit_type} conversion
 - Accuracy: Verified conversion factors ✅
-- Practical use: {practical_context.get(unit_type, 'General measurement')}
-"""
+- Practical use: {PRACTICAL_CONTEXT.get(unit_type, 'General measurement')}
+"""}
+
+@calculation_enrichers.register("*")
+def _validation_status(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "validation_status": "✅ Result validated and enhanced",
+        "enhanced_by": "calculation_validator_callback"
+    }
 
-        # Add general enhancements
-        enhanced_response["validation_status"] = "✅ Result validated and enhanced"
-        enhanced_response["enhanced_by"] = "calculation_validator_callback"
-        
-        print(f"[🔍 Calculation Validator] Enhanced result with additional context and validation.")
-        return enhanced_response
-    
-    elif tool_response.get("status") == "error":
-        # Enhance error responses with helpful suggestions
-        error_msg = tool_response.get("error", "Unknown error")
-        
-        enhanced_response["error_help"] = "❌ Calculation failed. Please check your input and try again."
-        enhanced_response["suggestions"] = [
-            "Verify that all numbers are valid",
-            "Check for proper syntax in expressions",
-            "Ensure units are supported for conversions",
-            "Try breaking complex calculations into smaller steps"
-        ]
-        
-        print(f"[🔍 Calculation Validator] Enhanced error response with helpful suggestions.")
-        return enhanced_response
-    
-    print("[🔍 Calculation Validator] No enhancements needed. Using original result.")
-    return None
+@calculation_enrichers.register("*", status="error")
+def _error_help(response: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    # Enhance error responses with helpful suggestions
+    return {
+        "error_help": "❌ Calculation failed. Please check your input and try again.",
+        "suggestions": ERROR_SUGGESTIONS
+    }
+
+# --- After Tool Callback with Result Validation ---
+def calculation_validator_callback(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Dict) -> Optional[Dict]:
+    """
+    After tool callback that validates and enhances calculation results.
+
+    This callback demonstrates how to inspect and modify tool results
+    for improved accuracy and user experience. Enhancements come from the
+    enrichers registered on calculation_enrichers and are applied as a
+    shallow overlay; the original result is never copied or mutated.
+    """
+    tool_name = tool.name
+    state = tool_context.state
+
+    # Check if validation is enabled (details go to the profiler's sampled callback event)
+    validation_enabled = state.get("validation_enabled", True)
+    if not validation_enabled:
+        callback_profiler.note("🔍 validation disabled in session state, using original result")
+        return None
+
+    if not isinstance(tool_response, dict):
+        callback_profiler.note("🔍 non-dict result, using original result")
+        return None
+
+    enhanced_response = calculation_enrichers.enrich(tool_name, args, tool_response, state)
+    if enhanced_response is None:
+        callback_profiler.note("🔍 no enhancements needed, using original result")
+        return None
+
+    if tool_response.get("status") == "error":
+        callback_profiler.note("🔍 enhanced error response with helpful suggestions")
+    else:
+        callback_profiler.note("🔍 enhanced result with additional context and validation")
+    return enhanced_response
 
 # --- Setup Agent with Callback ---
 calculator_service_agent = LlmAgent(
@@ -439,10 +484,13 @@ calculator_service_agent = LlmAgent(
     model=GEMINI_MODEL,
     instruction=CALCULATOR_SERVICE_PROMPT,
     description="A professional calculator service with result validation via after_tool_callback",
-    tools=[basic_calc_tool, scientific_calc_tool, unit_converter_tool],
+    tools=[basic_calc_tool, basic_calc_batch_tool, scientific_calc_tool, unit_converter_tool, unit_converter_batch_tool],
     after_tool_callback=calculation_validator_callback
 )
 
+# Time every callback invocation (see shared/profiling.py for JSON/Prometheus export)
+callback_profiler.instrument(calculator_service_agent)
+
 # For consistency with other examples in the project
 root_agent = calculator_service_agent
 
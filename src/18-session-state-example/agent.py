@@ -9,8 +9,15 @@ Run with: adk web src/18-session-state-example/agent.py
 """
 
 import logging
+import os
+import sys
 from google.adk.agents import LlmAgent
 
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.llm_cache import LlmResponseCache
+
 from .tools.state_tools import (
     save_user_preference,
     get_product_recommendation,
@@ -66,6 +73,10 @@ User: "Me recomenda produtos para hidratação"
 Você: Chama get_product_recommendation("seca", "hidratante") - usando o tipo de pele que você salvou!
 """
 
+# Repeated recommendation questions reuse earlier model responses. The injected
+# state is part of the system instruction, so a changed preference is a new key.
+llm_cache = LlmResponseCache(ttl_seconds=600)
+
 # Create the agent with state-aware instruction
 # The root_agent variable name is used by 'adk web' to identify the agent to run
 root_agent = LlmAgent(
@@ -75,6 +86,8 @@ root_agent = LlmAgent(
     instruction=agent_instruction,
     tools=[save_user_preference, get_product_recommendation, track_interaction],
     output_key="last_response",  # Automatically save agent response to state['last_response']
+    before_model_callback=llm_cache.before_model_callback,
+    after_model_callback=llm_cache.after_model_callback,
 )
 
 logger.info(f"Initialized {root_agent.name} with session state management")
@@ -6,7 +6,15 @@ https://google.github.io/adk-docs/agents/multi-agents/#coordinatordispatcher-pat
 
 import logging
 from google.adk.agents import Agent
-from tools.tools import get_purchase_history, check_refund_eligibility, process_refund
+from shared.prefetch import SpeculativePrefetcher
+from shared.tool_cache import ToolCache
+from tools.tools import (
+    get_purchase_history,
+    check_refund_eligibility,
+    process_refund,
+    purchase_history_cache_key,
+    extract_purchaser_args,
+)
 from tools.prompts import (
     top_level_prompt,
     purchase_history_subagent_prompt,
@@ -20,6 +28,15 @@ logger = logging.getLogger(__name__)
 # Constants
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Purchase history is read-only during a conversation; cache it per customer
+tool_cache = ToolCache(max_entries=1024).register(
+    "get_purchase_history", ttl_seconds=60, key_fn=purchase_history_cache_key
+)
+
+# The customer usually introduces themselves in the first message: start the
+# purchase history lookup right away, concurrently with the first model call
+prefetcher = SpeculativePrefetcher(tool_cache).register(get_purchase_history, extract_purchaser_args)
+
 purchase_history_agent = Agent(
     model=GEMINI_MODEL,
     name="PurchaseHistoryAgent",
@@ -27,6 +44,9 @@ purchase_history_agent = Agent(
     instruction=purchase_history_subagent_prompt,
     tools=[get_purchase_history],
     output_key="purchase_history",
+    before_tool_callback=tool_cache.before_tool_callback,
+    after_tool_callback=tool_cache.after_tool_callback,
+    on_tool_error_callback=tool_cache.on_tool_error_callback,
 )
 
 eligibility_agent = Agent(
@@ -57,4 +77,6 @@ root_agent = Agent(
     """
     + top_level_prompt,
     sub_agents=[purchase_history_agent, eligibility_agent, process_refund_agent],
+    before_agent_callback=prefetcher.before_agent_callback,
+    after_agent_callback=prefetcher.after_agent_callback,
 )
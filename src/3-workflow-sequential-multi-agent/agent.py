@@ -3,13 +3,243 @@
 """
 
 import logging
-from google.adk.agents import LlmAgent, SequentialAgent
+import os
+import re
+from typing import AsyncGenerator, Optional
+from typing_extensions import override
+
+from google.adk.agents import BaseAgent, LlmAgent, SequentialAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from shared.patching import PatchError, apply_unified_diff, extract_code_block, extract_fenced_block
+from shared.sandbox import SandboxLimits, SandboxPool
+from shared.static_analysis import analyze_code, format_findings
 
 logger = logging.getLogger(__name__)
 
 GEMINI_MODEL = "gemini-2.5-flash"
 GEMINI_MODEL_PRO = "gemini-2.5-pro"
 
+# Set CODE_PIPELINE_SANDBOX=1 to execute the final code and model-proposed tests
+SANDBOX_ENABLED = os.environ.get("CODE_PIPELINE_SANDBOX", "0") == "1"
+
+CLEAN_REVIEW = "No major issues found"
+NO_CHANGES = "NO_CHANGES"
+# Set by the skip callback for the patch callback (invocation-scoped state)
+REFACTOR_SKIPPED_KEY = "temp:refactor_skipped"
+_REVIEW_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+
+
+def is_clean_review(review: str) -> bool:
+    """True when the review only states that there are no major issues (no bullet points)"""
+    return CLEAN_REVIEW.lower() in (review or "").lower() and not _REVIEW_ITEM.search(review)
+
+
+def _code_content(code: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=f"```python\n{code}```")])
+
+
+# --- Static Analysis Stage ---
+
+class StaticAnalysisAgent(BaseAgent):
+    """
+    Deterministic gate between the writer and the Pro reviewer.
+
+    Parses state['generated_code'] with ast and runs pyflakes-style checks and
+    complexity metrics (shared/static_analysis.py). When it finds blocking
+    issues, the fixer agent rewrites the code with the findings as input and the
+    code is analyzed again, up to max_fix_attempts times.
+    """
+
+    fixer: LlmAgent
+    max_fix_attempts: int = 1
+
+    # model_config allows setting Pydantic configurations if needed
+    model_config = {"arbitrary_types_allowed": True}
+
+    def __init__(self, name: str, fixer: LlmAgent, max_fix_attempts: int = 1):
+        """
+        Initializes the StaticAnalysisAgent.
+
+        Args:
+            name: The name of the agent.
+            fixer: An LlmAgent that rewrites generated_code from the static findings.
+            max_fix_attempts: How many automatic fix rounds to run before giving up.
+        """
+        super().__init__(
+            name=name,
+            fixer=fixer,
+            max_fix_attempts=max_fix_attempts,
+            sub_agents=[fixer],
+            description="Checks generated code locally (syntax, lint, complexity) and fixes it before review.",
+        )
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        for attempt in range(self.max_fix_attempts + 1):
+            code = extract_code_block(ctx.session.state.get("generated_code", ""))
+            report = analyze_code(code)
+            blocking = sum(1 for finding in report.findings if finding.blocking)
+            print(
+                f"[🔎 Static Analysis] {len(report.findings)} findings ({blocking} blocking), "
+                f"max complexity {report.max_complexity}, attempt {attempt}"
+            )
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={
+                    "static_analysis": report.to_dict(),
+                    "static_findings": report.summary(),
+                    "static_analysis_passed": report.clean,
+                    "static_fix_attempts": attempt,
+                }),
+            )
+            if report.clean or attempt == self.max_fix_attempts:
+                break
+
+            logger.info(f"[{self.name}] Sending {blocking} findings to {self.fixer.name}")
+            async for event in self.fixer.run_async(ctx):
+                yield event
+
+
+def review_static_findings(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Short-circuit the Pro review when the code still fails static analysis.
+
+    The remaining findings become the review comments (the refactorer fixes
+    them), so the expensive reviewer only sees valid, lint-clean code.
+    """
+    state = callback_context.state
+    if state.get("static_analysis_passed", True):
+        return None
+
+    findings = [
+        finding for finding in (state.get("static_analysis") or {}).get("findings", [])
+        if finding["code"] != "C901"
+    ]
+    print(f"[⛔ Callback] Static analysis failed, skipping the {callback_context.agent_name} model call")
+    review = "\n".join(f"- Fix {line}" for line in format_findings(findings).splitlines())
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=review)]))
+
+
+# --- Sandbox Validation Stage ---
+
+# Shared by every pipeline run in this process, so concurrent runs validate in
+# parallel (one sandbox per core) without oversubscribing the machine
+sandbox_pool = SandboxPool(limits=SandboxLimits(cpu_seconds=5, memory_mb=512, wall_seconds=15))
+
+
+class SandboxValidationAgent(BaseAgent):
+    """
+    Executes state['refactored_code'] and state['proposed_tests'] in an isolated,
+    resource-limited subprocess (shared/sandbox.py) and stores the outcome in
+    state['sandbox_result']: status, per-test pass/fail, timings and peak RSS.
+    """
+
+    pool: SandboxPool
+
+    # model_config allows setting Pydantic configurations if needed
+    model_config = {"arbitrary_types_allowed": True}
+
+    def __init__(self, name: str, pool: SandboxPool):
+        """
+        Initializes the SandboxValidationAgent.
+
+        Args:
+            name: The name of the agent.
+            pool: The sandbox pool the runs are submitted to.
+        """
+        super().__init__(
+            name=name,
+            pool=pool,
+            description="Runs the final code and proposed tests in a sandbox.",
+        )
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        code = extract_code_block(state.get("refactored_code", ""))
+        tests = extract_code_block(state.get("proposed_tests", "")) or None
+        result = await self.pool.run(code, tests)
+
+        summary = (
+            f"🧪 Sandbox: {result['status']} ({result['tests_passed']} passed, {result['tests_failed']} failed, "
+            f"{result['duration_ms']:.0f} ms, peak RSS {result['peak_rss_kb'] / 1024:.1f} MB)"
+        )
+        print(f"[{self.name}] {summary}")
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=summary)]),
+            actions=EventActions(state_delta={"sandbox_result": result}),
+        )
+
+
+# --- Refactor Stage Callbacks ---
+
+def skip_refactor_on_clean_review(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Skip the refactorer's model call when the reviewer found nothing to change.
+
+    Answers NO_CHANGES locally, so the generated code becomes the final code.
+    (A before_model_callback rather than a before_agent_callback: returning
+    content from the latter would end the whole pipeline invocation.)
+    """
+    state = callback_context.state
+    if not is_clean_review(state.get("review_comments", "")):
+        return None
+
+    print(f"[⏭️ Callback] Clean review, skipping the {callback_context.agent_name} model call")
+    state[REFACTOR_SKIPPED_KEY] = True
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=NO_CHANGES)]))
+
+
+def apply_refactor_patch(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    Apply the refactorer's unified diff to the generated code.
+
+    A full ```python block is accepted as well. If the diff doesn't apply,
+    the generated code is kept and the failure is recorded in state.
+    """
+    state = callback_context.state
+    output = state.get("refactor_patch", "")
+    original = extract_code_block(state.get("generated_code", ""))
+
+    diff = extract_fenced_block(output, ("diff", "patch"))
+    if diff is None and "@@" in output and extract_fenced_block(output, ("python", "py")) is None:
+        diff = output
+    if diff is not None:
+        try:
+            code = apply_unified_diff(original, diff)
+            mode = "diff"
+        except PatchError as e:
+            logger.warning(f"Refactor diff could not be applied: {e}")
+            code, mode = original, "patch_failed"
+    elif output.strip() == NO_CHANGES:
+        code, mode = original, "skipped" if state.get(REFACTOR_SKIPPED_KEY) else "unchanged"
+    else:
+        code, mode = extract_code_block(output), "full"
+
+    print(f"[🩹 Callback] Refactor applied as {mode} ({len(output)} chars of model output for {len(code)} chars of code)")
+    state["refactored_code"] = f"```python\n{code}```"
+    state["refactor_mode"] = mode
+    state[REFACTOR_SKIPPED_KEY] = None
+    return _code_content(code)
+
 # --- 1. Define Sub-Agents for Each Pipeline Stage ---
 
 # Code Writer Agent
@@ -26,8 +256,38 @@ Do not add any other text before or after the code block.
     output_key="generated_code" # Stores output in state['generated_code']
 )
 
+# Code Fixer Agent
+# Rewrites the generated code when local static analysis finds blocking issues.
+code_fixer_agent = LlmAgent(
+    name="CodeFixerAgent",
+    model=GEMINI_MODEL,
+    instruction="""You are a Python Code Fixer.
+Fix every static-analysis finding below in the code, changing nothing else.
+
+  **Code:**
+  {generated_code}
+
+  **Static-analysis findings:**
+  {static_findings}
+
+Output *only* the complete corrected Python code block, enclosed in triple backticks (```python ... ```).
+Do not add any other text before or after the code block.
+""",
+    description="Fixes static-analysis findings in generated code.",
+    output_key="generated_code", # Replaces state['generated_code']
+)
+
+# Static Analysis Agent
+# Deterministic checks between the writer and the reviewer (no model call unless a fix is needed).
+static_analysis_agent = StaticAnalysisAgent(
+    name="StaticAnalysisAgent",
+    fixer=code_fixer_agent,
+    max_fix_attempts=1,
+)
+
 # Code Reviewer Agent
 # Takes the code generated by the previous agent (read from state) and provides feedback.
+# Skipped (findings become the review) if the code still fails static analysis.
 code_reviewer_agent = LlmAgent(
     name="CodeReviewerAgent",
     model=GEMINI_MODEL_PRO,
@@ -39,6 +299,9 @@ code_reviewer_agent = LlmAgent(
     {generated_code}
     ```
 
+    **Static Analysis (already checked locally; don't repeat these):**
+    {static_findings?}
+
 **Review Criteria:**
 1.  **Correctness:** Does the code work as intended? Are there logic errors?
 2.  **Readability:** Is the code clear and easy to understand? Follows PEP 8 style guidelines?
@@ -53,11 +316,13 @@ Output *only* the review comments or the "No major issues" statement.
 """,
     description="Reviews code and provides feedback.",
     output_key="review_comments", # Stores output in state['review_comments']
+    before_model_callback=review_static_findings,
 )
 
 
 # Code Refactorer Agent
-# Takes the original code and the review comments (read from state) and refactors the code.
+# Takes the original code and the review comments (read from state) and writes a
+# unified diff, which is applied locally; skipped entirely on a clean review.
 code_refactorer_agent = LlmAgent(
     name="CodeRefactorerAgent",
     model=GEMINI_MODEL,
@@ -74,25 +339,64 @@ Your goal is to improve the given Python code based on the provided review comme
 
 **Task:**
 Carefully apply the suggestions from the review comments to refactor the original code.
-If the review comments state "No major issues found," return the original code unchanged.
 Ensure the final code is complete, functional, and includes necessary imports and docstrings.
 
 **Output:**
-Output *only* the final, refactored Python code block, enclosed in triple backticks (```python ... ```). 
-Do not add any other text before or after the code block.
+Output *only* a unified diff against the original code, enclosed in triple backticks (```diff ... ```):
+- Start with the headers `--- a/code.py` and `+++ b/code.py`
+- One `@@ -start,count +start,count @@` hunk per change, with 3 unchanged context lines around it
+- Prefix unchanged lines with a space, removed lines with `-` and added lines with `+`
+- Copy context and removed lines exactly as they appear in the original code
+Do not repeat unchanged parts of the file. If nothing needs to change, output only: NO_CHANGES
+Do not add any other text before or after the diff.
+""",
+    description="Refactors code based on review comments by emitting a unified diff.",
+    output_key="refactor_patch", # Stores the diff in state['refactor_patch']
+    # The patched code is stored in state['refactored_code']
+    before_model_callback=skip_refactor_on_clean_review,
+    after_agent_callback=apply_refactor_patch,
+)
+
+
+# Test Writer Agent (optional stage)
+# Proposes small tests for the final code, executed by the sandbox stage.
+test_writer_agent = LlmAgent(
+    name="TestWriterAgent",
+    model=GEMINI_MODEL,
+    instruction="""You are a Python Test Writer.
+Write a few fast unit tests for the code below, saved as module `solution`.
+
+  **Code:**
+  {refactored_code}
+
+**Rules:**
+- Start with `from solution import *`
+- Plain `def test_...():` functions using `assert`; no pytest, no fixtures
+- No network, file system, sleeps or user input; each test must finish in well under a second
+- Cover the main behavior and one or two edge cases
+
+Output *only* the Python test module, enclosed in triple backticks (```python ... ```).
 """,
-    description="Refactors code based on review comments.",
-    output_key="refactored_code", # Stores output in state['refactored_code']
+    description="Proposes unit tests for the refactored code.",
+    output_key="proposed_tests", # Stores the tests in state['proposed_tests']
 )
 
+# Sandbox Validation Agent (optional stage)
+sandbox_validation_agent = SandboxValidationAgent(name="SandboxValidationAgent", pool=sandbox_pool)
+
 
 # --- 2. Create the SequentialAgent ---
 # This agent orchestrates the pipeline by running the sub_agents in order.
+pipeline_stages = [code_writer_agent, static_analysis_agent, code_reviewer_agent, code_refactorer_agent]
+if SANDBOX_ENABLED:
+    pipeline_stages += [test_writer_agent, sandbox_validation_agent]
+
 code_pipeline_agent = SequentialAgent(
     name="CodePipelineAgent",
-    sub_agents=[code_writer_agent, code_reviewer_agent, code_refactorer_agent],
-    description="Executes a sequence of code writing, reviewing, and refactoring.",
-    # The agents will run in the order provided: Writer -> Reviewer -> Refactorer
+    sub_agents=pipeline_stages,
+    description="Executes a sequence of code writing, static analysis, reviewing, and refactoring.",
+    # The agents will run in the order provided: Writer -> Static Analysis -> Reviewer -> Refactorer
+    # (-> Test Writer -> Sandbox Validation with CODE_PIPELINE_SANDBOX=1)
 )
 
 # For ADK tools compatibility, the root agent must be named `root_agent`
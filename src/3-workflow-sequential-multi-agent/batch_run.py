@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Batch driver for the code-generation pipeline.
+
+Runs CodePipelineAgent over every spec of a JSONL file ({"id": ..., "spec": ...}
+per line) with bounded concurrency and per-model rate limits, streaming one
+result per line to the output JSONL. Rerunning with the same output file
+resumes: specs already recorded as "ok" are skipped.
+
+Run with:
+    python src/3-workflow-sequential-multi-agent/batch_run.py specs.jsonl -o results.jsonl \
+        --concurrency 8 --flash-rpm 60 --pro-rpm 10 --report report.json
+
+Set RATE_LIMIT_SQLITE_PATH to share the model quotas between several batch processes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.batch_runner import BatchRunner
+from shared.rate_limiter import RateLimit
+
+from agent import GEMINI_MODEL, GEMINI_MODEL_PRO, SANDBOX_ENABLED, code_pipeline_agent, sandbox_pool
+
+# State copied into every result line
+RESULT_STATE_KEYS = (
+    "refactored_code",
+    "refactor_mode",
+    "static_analysis_passed",
+    "static_fix_attempts",
+    "sandbox_result",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the code-generation pipeline over a JSONL file of specs")
+    parser.add_argument("specs", help="Input JSONL, one {\"id\": ..., \"spec\": ...} object per line")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="Results JSONL (also the checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pipelines in flight")
+    parser.add_argument("--flash-rpm", type=int, default=60, help=f"Requests per minute for {GEMINI_MODEL}")
+    parser.add_argument("--pro-rpm", type=int, default=10, help=f"Requests per minute for {GEMINI_MODEL_PRO}")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per spec before it is recorded as an error")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming")
+    parser.add_argument("--report", help="Also write the batch report to this JSON file")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    runner = BatchRunner(
+        code_pipeline_agent,
+        model_limits={
+            GEMINI_MODEL: RateLimit(args.flash_rpm, 60),
+            GEMINI_MODEL_PRO: RateLimit(args.pro_rpm, 60),
+        },
+        max_concurrency=args.concurrency,
+        state_keys=RESULT_STATE_KEYS,
+        item_timeout=args.timeout,
+    )
+    report = await runner.run(args.specs, args.output, resume=not args.no_resume)
+    if SANDBOX_ENABLED:
+        report["sandbox"] = sandbox_pool.stats()
+
+    print("=" * 70)
+    print("📦 BATCH REPORT")
+    print("=" * 70)
+    print(f"Specs: {report['total']} ({report['skipped']} resumed, {report['ok']} ok, {report['errors']} errors)")
+    print(f"Wall time: {report['wall_ms'] / 1000:.1f} s, pipeline p50 {report['latency_ms']['p50_ms']} ms, p95 {report['latency_ms']['p95_ms']} ms")
+    print(f"Tokens: {report['tokens']}, rate-limit waits: {report['rate_limit_waits']}")
+    print(f"{'stage':<26}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'calls':>7}{'wait ms':>10}{'tokens':>9}")
+    for name, stage in report["stages"].items():
+        print(
+            f"{name:<26}{stage['runs']:>6}{stage['p50_ms'] or 0:>10.0f}{stage['p95_ms'] or 0:>10.0f}"
+            f"{stage['model_calls']:>7}{stage['rate_limit_wait_ms']:>10.0f}{stage['total_tokens']:>9}"
+        )
+    print("=" * 70)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
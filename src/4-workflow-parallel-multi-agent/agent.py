@@ -3,8 +3,20 @@
 """
 
 import logging
-from google.adk.agents import Agent, SequentialAgent, ParallelAgent
-from tools.tools import get_purchase_history, check_refund_eligibility, process_refund
+from typing import Optional
+from google.adk.agents import Agent, SequentialAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+from shared.parallel import DeadlineParallelAgent
+from shared.prefetch import SpeculativePrefetcher
+from shared.tool_cache import ToolCache
+from tools.tools import (
+    get_purchase_history,
+    check_refund_eligibility,
+    process_refund,
+    purchase_history_cache_key,
+    extract_purchaser_args,
+)
 from tools.prompts import (
     top_level_prompt,
     purchase_history_subagent_prompt,
@@ -16,6 +28,18 @@ logger = logging.getLogger(__name__)
 
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Per-branch deadlines of the parallel verification, in seconds
+BRANCH_TIMEOUTS = {"PurchaseVerifierAgent": 20.0, "RefundEligibilityAgent": 15.0}
+
+# Purchase history is read-only during a conversation; cache it per customer
+tool_cache = ToolCache(max_entries=1024).register(
+    "get_purchase_history", ttl_seconds=60, key_fn=purchase_history_cache_key
+)
+
+# The customer usually introduces themselves in the first message: start the
+# purchase history lookup right away, concurrently with the first model call
+prefetcher = SpeculativePrefetcher(tool_cache).register(get_purchase_history, extract_purchaser_args)
+
 purchase_verifier_agent = Agent(
     model=GEMINI_MODEL,
     name="PurchaseVerifierAgent",
@@ -23,6 +47,9 @@ purchase_verifier_agent = Agent(
     instruction=purchase_history_subagent_prompt,
     tools=[get_purchase_history],
     output_key="purchase_history",
+    before_tool_callback=tool_cache.before_tool_callback,
+    after_tool_callback=tool_cache.after_tool_callback,
+    on_tool_error_callback=tool_cache.on_tool_error_callback,
 )
 
 refund_eligibility_agent = Agent(
@@ -34,12 +61,37 @@ refund_eligibility_agent = Agent(
     output_key="is_refund_eligible",
 )
 
-verifier_agent = ParallelAgent(
+# A branch that misses its deadline or fails cancels its sibling (the refund
+# can't be decided without both); the processor then asks the customer to
+# retry instead of deciding on a missing check.
+# Latency histograms per branch: shared.parallel.branch_metrics.stats()
+verifier_agent = DeadlineParallelAgent(
     name="VerifierAgent",
     description="Checks purchase history and refund eligibility in parallel",
     sub_agents=[purchase_verifier_agent, refund_eligibility_agent],
+    branch_timeouts=BRANCH_TIMEOUTS,
+    fail_fast=True,
 )
 
+
+def require_completed_checks(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    Skip the refund decision when a verification check timed out or failed
+
+    A slow eligibility check is not a "not eligible" answer, so the customer
+    is asked to try again rather than being told they don't qualify.
+    """
+    branches = callback_context.state.get(verifier_agent.status_key, {})
+    incomplete = [name for name, outcome in branches.items() if outcome.get("status") != "ok"]
+    if not incomplete:
+        return None
+    logger.info(f"Refund checks incomplete: {incomplete}")
+    return types.Content(
+        role="model",
+        parts=[types.Part(text="I couldn't complete the refund checks right now. Please try again in a few minutes.")],
+    )
+
+
 refund_processor_agent = Agent(
     model=GEMINI_MODEL,
     name="RefundProcessorAgent",
@@ -49,6 +101,7 @@ refund_processor_agent = Agent(
     + process_refund_subagent_prompt,
     tools=[process_refund],
     output_key="refund_confirmation_message",
+    before_agent_callback=require_completed_checks,
 )
 
 root_agent = SequentialAgent(
@@ -58,4 +111,6 @@ root_agent = SequentialAgent(
         verifier_agent,
         refund_processor_agent,
     ],
+    before_agent_callback=prefetcher.before_agent_callback,
+    after_agent_callback=prefetcher.after_agent_callback,
 )
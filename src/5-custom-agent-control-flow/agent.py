@@ -3,15 +3,18 @@
 """
 
 import logging
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, Optional
 from typing_extensions import override
 
-from google.adk.agents import LlmAgent, BaseAgent, ParallelAgent
+from google.adk.agents import LlmAgent, BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
-from google.adk.events import Event
+from google.adk.events import Event, EventActions
+from google.genai import types
 from pydantic import BaseModel, Field
+from shared.flight_recorder import flight_recorder
+from shared.parallel import DeadlineParallelAgent
 from tools.tools import get_purchase_history, check_refund_eligibility, process_refund
 from tools.prompts import (
     purchase_history_subagent_prompt,
@@ -23,6 +26,16 @@ logger = logging.getLogger(__name__)
 
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Per-branch deadlines of the parallel refund checks, in seconds
+BRANCH_TIMEOUTS = {"IsRefundEligible": 15.0, "GetPurchaseHistory": 20.0}
+
+
+class _TemplateValues(dict):
+    """format_map values where unknown placeholders render empty"""
+
+    def __missing__(self, key: str) -> str:
+        return ""
+
 
 class CustomerRefundAgent(BaseAgent):
     refund_eligibility_checker: LlmAgent
@@ -30,7 +43,8 @@ class CustomerRefundAgent(BaseAgent):
     process_full_refund: LlmAgent
     offer_store_credit: LlmAgent
     process_store_credit_response: LlmAgent
-    parallel_agent: ParallelAgent
+    parallel_agent: DeadlineParallelAgent
+    response_template: Optional[str] = None
 
     # model_config allows setting Pydantic configurations if needed
     model_config = {"arbitrary_types_allowed": True}
@@ -43,6 +57,9 @@ class CustomerRefundAgent(BaseAgent):
         process_full_refund: LlmAgent,
         offer_store_credit: LlmAgent,
         process_store_credit_response: LlmAgent,
+        branch_timeouts: Optional[Dict[str, float]] = None,
+        fail_fast: bool = False,
+        response_template: Optional[str] = None,
     ):
         """
         Initializes the CustomerRefundAgent.
@@ -54,10 +71,16 @@ class CustomerRefundAgent(BaseAgent):
             process_full_refund: An LlmAgent to process a full refund, if eligible.
             offer_store_credit: An LlmAgent to offer store credit alternative, if not eligible for a full refund.
             process_store_credit_response: An LlmAgent to handle user's response to store credit offer.
+            branch_timeouts: Deadline in seconds per parallel check, keyed by agent name.
+            fail_fast: Cancel the other check as soon as one times out or fails.
+            response_template: Optional str.format template for the final message; {message}
+                is the decision message and other placeholders are session state keys.
         """
-        parallel_agent = ParallelAgent(
+        parallel_agent = DeadlineParallelAgent(
             name="RefundChecks",
             sub_agents=[refund_eligibility_checker, get_purchase_history],
+            branch_timeouts=branch_timeouts or {},
+            fail_fast=fail_fast,
         )
         sub_agents_list = [
             parallel_agent,
@@ -72,12 +95,58 @@ class CustomerRefundAgent(BaseAgent):
             offer_store_credit=offer_store_credit,
             process_store_credit_response=process_store_credit_response,
             parallel_agent=parallel_agent,
+            response_template=response_template,
             sub_agents=sub_agents_list,
         )
 
+    def format_final_message(self, final_message: str, state: Dict[str, Any]) -> str:
+        """Apply response_template (if any) to the decision message."""
+        if not self.response_template:
+            return final_message
+        return self.response_template.format_map(_TemplateValues(state, message=final_message))
+
+    async def _emit_final_response(
+        self, ctx: InvocationContext, final_message: str, state_delta: Dict[str, Any]
+    ) -> AsyncGenerator[Event, None]:
+        """
+        Emits the final message as an event of this agent, without a model call.
+
+        Args:
+            ctx: The invocation context.
+            final_message: The decision message shown to the customer.
+            state_delta: Extra state updates to commit with the message.
+        """
+        final_message = self.format_final_message(final_message, {**ctx.session.state, **state_delta})
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=final_message)]),
+            # Same state the FinalResponseAgent's output_key used to write
+            actions=EventActions(state_delta={**state_delta, "refund_decision": final_message}),
+        )
+
     @override
     async def _run_async_impl(
         self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        """
+        Runs the refund workflow; events go to the flight recorder, which is
+        only serialized when the workflow fails or DEBUG logging is on.
+        """
+        try:
+            async for event in self._run_refund_workflow(ctx):
+                yield event
+        except Exception:
+            logger.error(
+                f"[{self.name}] Refund workflow failed. Flight recorder trace:\n{flight_recorder.dump(ctx.invocation_id)}"
+            )
+            raise
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[{self.name}] Flight recorder trace:\n{flight_recorder.dump(ctx.invocation_id)}")
+
+    async def _run_refund_workflow(
+        self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         """
         Implements the custom orchestration logic for the refund workflow.
@@ -87,9 +156,7 @@ class CustomerRefundAgent(BaseAgent):
         # 1. Run parallel checks for eligibility and purchase history
         logger.info(f"[{self.name}] Running parallel refund checks...")
         async for event in self.parallel_agent.run_async(ctx):
-            logger.info(
-                f"[{self.name}] Event from RefundChecks: {event.model_dump_json(indent=2, exclude_none=True)}"
-            )
+            flight_recorder.record(event, "RefundChecks")
             yield event
 
         # Get results from session state
@@ -101,62 +168,64 @@ class CustomerRefundAgent(BaseAgent):
             else bool(is_eligible_str)
         )
         purchase_history = ctx.session.state.get("purchase_history", [])
+        branches = ctx.session.state.get(self.parallel_agent.status_key, {})
+        history_status = branches.get(self.get_purchase_history.name, {}).get("status", "ok")
+        eligibility_status = branches.get(self.refund_eligibility_checker.name, {}).get("status", "ok")
 
         logger.info(f"[{self.name}] Refund eligible: {is_eligible}")
         logger.info(f"[{self.name}] Purchase history: {purchase_history}")
 
         # 2. Decision logic based on results
         final_message = ""
+        state_delta: Dict[str, Any] = {}
 
-        if is_eligible and purchase_history:
+        if eligibility_status != "ok":
+            # The eligibility check timed out or failed; that's no reason to deny the refund
+            logger.info(f"[{self.name}] Refund eligibility check {eligibility_status}.")
+            final_message = "I couldn't check your refund eligibility right now. Please try again in a few minutes."
+            state_delta["final_response"] = final_message
+
+        elif is_eligible and purchase_history:
             logger.info(f"[{self.name}] Customer eligible for full refund.")
             async for event in self.process_full_refund.run_async(ctx):
-                logger.info(
-                    f"[{self.name}] Event from ProcessFullRefund: {event.model_dump_json(indent=2, exclude_none=True)}"
-                )
+                flight_recorder.record(event, "ProcessFullRefund")
                 yield event
 
-            final_message = ctx.session.state.get("final_response", "")
+            # RefundProcessorAgent writes its answer to refund_confirmation_message
+            final_message = ctx.session.state.get("final_response") or ctx.session.state.get(
+                "refund_confirmation_message", ""
+            )
 
         elif purchase_history and not is_eligible:
             logger.info(
                 f"[{self.name}] Customer not eligible for refund. Offering store credit."
             )
             async for event in self.offer_store_credit.run_async(ctx):
-                logger.info(
-                    f"[{self.name}] Event from OfferStoreCredit: {event.model_dump_json(indent=2, exclude_none=True)}"
-                )
+                flight_recorder.record(event, "OfferStoreCredit")
                 yield event
 
             # Process user's response to store credit offer
             async for event in self.process_store_credit_response.run_async(ctx):
-                logger.info(
-                    f"[{self.name}] Event from ProcessStoreCreditResponse: {event.model_dump_json(indent=2, exclude_none=True)}"
-                )
+                flight_recorder.record(event, "ProcessStoreCreditResponse")
                 yield event
 
             final_message = ctx.session.state.get("final_response", "")
 
+        elif history_status != "ok":
+            # The purchase history lookup timed out or failed; don't claim there is none
+            logger.info(f"[{self.name}] Purchase history check {history_status}.")
+            final_message = "I couldn't check your purchase history right now. Please try again in a few minutes."
+            state_delta["final_response"] = final_message
+
         else:
             # No purchase history found
             logger.info(f"[{self.name}] No purchase history found.")
             final_message = "I couldn't find any purchase history associated with your account. Please verify your order number and try again."
-            ctx.session.state["final_response"] = final_message
-
-        # 3. Create a final summary agent to output the result
-        final_response_agent = LlmAgent(
-            name="FinalResponseAgent",
-            model=GEMINI_MODEL,
-            instruction=f"""Output the following message exactly as provided: {final_message}""",
-            input_schema=None,
-            output_key="refund_decision",
-        )
+            state_delta["final_response"] = final_message
 
-        # Yield events from the final response agent
-        async for event in final_response_agent.run_async(ctx):
-            logger.info(
-                f"[{self.name}] Final response event: {event.model_dump_json(indent=2, exclude_none=True)}"
-            )
+        # 3. Output the result directly; echoing it through a model call only added latency
+        async for event in self._emit_final_response(ctx, final_message, state_delta):
+            flight_recorder.record(event, "FinalResponse")
             yield event
 
         logger.info(f"[{self.name}] Refund workflow completed. Exiting.")
@@ -221,6 +290,8 @@ customer_refund_agent = CustomerRefundAgent(
     process_full_refund=process_full_refund,
     offer_store_credit=offer_store_credit,
     process_store_credit_response=process_store_credit_response,
+    branch_timeouts=BRANCH_TIMEOUTS,
+    fail_fast=True,
 )
 
 root_agent = customer_refund_agent
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the CustomerRefundAgent final response.
+
+Compares the old finalization, a FinalResponseAgent LlmAgent asked to
+"output the following message exactly", with the direct Event the agent emits
+now. Every model is simulated with a fixed latency, so the numbers show the
+round trip saved per refund, not Gemini's speed.
+
+Run with: python src/5-custom-agent-control-flow/benchmark_final_response.py [--model-latency-ms 400]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import AsyncGenerator, Dict, Any, Optional
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+import agent as refund
+
+# Canned answers per agent; FinalResponseAgent echoes its instruction
+ANSWERS = {
+    "IsRefundEligible": "true",
+    "GetPurchaseHistory": "Order 1042: Kaiak perfume, shipped INSURED",
+    "RefundProcessorAgent": "Your refund of R$ 129,90 has been processed.",
+}
+ECHO_MARKER = "exactly as provided: "
+
+
+class SimulatedLlm(BaseLlm):
+    """Answers after a fixed delay and counts its calls"""
+
+    latency_ms: float = 400.0
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        instruction = str(llm_request.config.system_instruction or "")
+        if ECHO_MARKER in instruction:
+            text = instruction.split(ECHO_MARKER, 1)[1].split("\n", 1)[0]
+        else:
+            text = next((answer for name, answer in ANSWERS.items() if f'"{name}"' in instruction), "ok")
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+class LegacyCustomerRefundAgent(refund.CustomerRefundAgent):
+    """The previous finalization: one extra LlmAgent call to echo the message"""
+
+    llm: Optional[SimulatedLlm] = None
+
+    async def _emit_final_response(
+        self, ctx: InvocationContext, final_message: str, state_delta: Dict[str, Any]
+    ) -> AsyncGenerator[Event, None]:
+        ctx.session.state.update(state_delta)
+        final_response_agent = LlmAgent(
+            name="FinalResponseAgent",
+            model=self.llm,
+            instruction=f"""Output the following message exactly as provided: {final_message}""",
+            input_schema=None,
+            output_key="refund_decision",
+        )
+        async for event in final_response_agent.run_async(ctx):
+            yield event
+
+
+def build(agent_class, llm: SimulatedLlm):
+    """A CustomerRefundAgent whose sub-agents all use the simulated model"""
+    def sub(agent):
+        return agent.clone(update={"model": llm})
+
+    return agent_class(
+        name="CustomerRefundAgent",
+        refund_eligibility_checker=sub(refund.refund_eligibility_checker),
+        get_purchase_history=sub(refund.get_purchase_history),
+        process_full_refund=sub(refund.process_full_refund),
+        offer_store_credit=sub(refund.offer_store_credit),
+        process_store_credit_response=sub(refund.process_store_credit_response),
+    )
+
+
+async def bench(root_agent, llm: SimulatedLlm, refunds: int) -> Dict[str, Any]:
+    """Run full refunds sequentially; return mean ms and model calls per refund"""
+    runner = InMemoryRunner(agent=root_agent, app_name="benchmark")
+    message = types.Content(role="user", parts=[types.Part(text="Hi, I'm Gabriel Silva. My perfume arrived damaged.")])
+    decisions = set()
+
+    async def run_refund():
+        session = await runner.session_service.create_session(app_name="benchmark", user_id="bench")
+        async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            pass
+        final = await runner.session_service.get_session(app_name="benchmark", user_id="bench", session_id=session.id)
+        decisions.add(final.state.get("refund_decision"))
+
+    await run_refund()  # warm up
+    llm.calls = 0
+    start = time.perf_counter()
+    for _ in range(refunds):
+        await run_refund()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {"ms": elapsed_ms / refunds, "calls": llm.calls / refunds, "decisions": decisions}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CustomerRefundAgent final response")
+    parser.add_argument("--model-latency-ms", type=float, default=400.0, help="Simulated latency of every model call")
+    parser.add_argument("--refunds", type=int, default=10, help="Refund conversations per variant")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # ADK warns about the simulated model's missing token usage
+
+    legacy_llm = SimulatedLlm(model="simulated", latency_ms=args.model_latency_ms)
+    direct_llm = SimulatedLlm(model="simulated", latency_ms=args.model_latency_ms)
+    legacy_agent = build(LegacyCustomerRefundAgent, legacy_llm)
+    legacy_agent.llm = legacy_llm
+    legacy = await bench(legacy_agent, legacy_llm, args.refunds)
+    direct = await bench(build(refund.CustomerRefundAgent, direct_llm), direct_llm, args.refunds)
+
+    print("=" * 70)
+    print(f"⏱️  FINAL RESPONSE BENCHMARK ({args.refunds} refunds, {args.model_latency_ms:.0f} ms per model call)")
+    print("=" * 70)
+    print(f"{'FinalResponseAgent (LLM echo)':<32}: {legacy['ms']:8.1f} ms/refund, {legacy['calls']:.1f} model calls")
+    print(f"{'Direct Event':<32}: {direct['ms']:8.1f} ms/refund, {direct['calls']:.1f} model calls")
+    print(f"{'Saved':<32}: {legacy['ms'] - direct['ms']:8.1f} ms/refund, {legacy['calls'] - direct['calls']:.1f} model calls")
+    print(f"Same final message: {legacy['decisions'] == direct['decisions']} ({direct['decisions']})")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
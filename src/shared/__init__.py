@@ -2,6 +2,71 @@
 Shared utilities for ADK callback examples
 """
 
-from .auditor import LLMAuditor, AuditConfig, create_simple_audit_callback
+from .auditor import LLMAuditor, AuditConfig, AuditMetrics, create_simple_audit_callback
+from .guardrails import GuardrailAutomaton, StreamingOutputGuardrail, DEFAULT_BLOCKED_TERMS, load_terms
+from .profiling import CallbackProfiler, callback_profiler
+from .rate_limiter import RateLimit, RateLimiter
+from .policy import ToolPolicy, PolicyDecision
+from .tool_cache import ToolCache
+from .prefetch import SpeculativePrefetcher
+from .batching import run_batch_lookup
+from .expressions import ExpressionError, compile_expression
+from .scientific import apply_operation
+from .units import UnitError, convert, convert_many
+from .enrichment import EnrichmentPipeline
+from .patching import PatchError, apply_unified_diff, extract_code_block
+from .static_analysis import analyze_code
+from .sandbox import SandboxLimits, SandboxPool, run_in_sandbox
+from .langid import LanguageIdentifier, default_identifier
+from .translation_memory import TranslationMemory
+from .batch_translation import BatchTranslator
+from .llm_cache import LlmResponseCache
+from .batch_runner import BatchRunner, PipelineMetricsPlugin
+from .parallel import BranchMetrics, DeadlineParallelAgent, branch_metrics
+from .flight_recorder import FlightRecorder, flight_recorder
 
-__all__ = ["LLMAuditor", "AuditConfig", "create_simple_audit_callback"]
+__all__ = [
+    "LLMAuditor",
+    "AuditConfig",
+    "AuditMetrics",
+    "create_simple_audit_callback",
+    "GuardrailAutomaton",
+    "StreamingOutputGuardrail",
+    "DEFAULT_BLOCKED_TERMS",
+    "load_terms",
+    "CallbackProfiler",
+    "callback_profiler",
+    "RateLimit",
+    "RateLimiter",
+    "ToolPolicy",
+    "PolicyDecision",
+    "ToolCache",
+    "SpeculativePrefetcher",
+    "run_batch_lookup",
+    "ExpressionError",
+    "compile_expression",
+    "apply_operation",
+    "UnitError",
+    "convert",
+    "convert_many",
+    "EnrichmentPipeline",
+    "PatchError",
+    "apply_unified_diff",
+    "extract_code_block",
+    "analyze_code",
+    "SandboxLimits",
+    "SandboxPool",
+    "run_in_sandbox",
+    "LanguageIdentifier",
+    "default_identifier",
+    "TranslationMemory",
+    "BatchTranslator",
+    "LlmResponseCache",
+    "BatchRunner",
+    "PipelineMetricsPlugin",
+    "BranchMetrics",
+    "DeadlineParallelAgent",
+    "branch_metrics",
+    "FlightRecorder",
+    "flight_recorder",
+]
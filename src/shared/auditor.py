@@ -5,8 +5,13 @@ This module provides a reusable auditor system that can review and improve
 agent responses using LLM-powered quality control.
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, Optional, Any
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Any, Sequence
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.runners import InMemoryRunner
@@ -14,19 +19,75 @@ from google.genai import types
 
 logger = logging.getLogger(__name__)
 
+# Default time budget (in seconds) for a single audit before falling back
+# to the original response
+DEFAULT_AUDIT_TIMEOUT_SECONDS = 10.0
+
+
+class AuditMetrics:
+    """
+    Per-audit latency and outcome metrics collected by an LLMAuditor
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.total = 0
+        self.improved = 0
+        self.timed_out = 0
+        self.failed = 0
+        self.latencies_ms = deque(maxlen=max_samples)
+
+    def record(self, latency_ms: float, outcome: str) -> None:
+        """Record a finished audit. outcome is one of: approved, improved, timeout, error"""
+        self.total += 1
+        self.latencies_ms.append(latency_ms)
+        if outcome == "improved":
+            self.improved += 1
+        elif outcome == "timeout":
+            self.timed_out += 1
+        elif outcome == "error":
+            self.failed += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Return counters plus p50/p95/max latency over the retained samples"""
+        samples = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[index], 2)
+
+        return {
+            "total": self.total,
+            "improved": self.improved,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(samples[-1], 2) if samples else None,
+        }
+
+
 class LLMAuditor:
     """
     LLM-powered auditor that can review and improve agent responses
     """
     
-    def __init__(self, model: str = "gemini-2.0-flash", name: str = "ResponseAuditor"):
+    def __init__(
+        self,
+        model: str = "gemini-2.0-flash",
+        name: str = "ResponseAuditor",
+        timeout_seconds: float = DEFAULT_AUDIT_TIMEOUT_SECONDS,
+    ):
         self.model = model
         self.name = name
-        self._auditor_agent = None
+        self.timeout_seconds = timeout_seconds
+        self.metrics = AuditMetrics()
+        self._auditor_agents: Dict[str, LlmAgent] = {}
     
     def _get_auditor_agent(self, audit_criteria: str) -> LlmAgent:
         """Create or get the auditor agent with specific criteria"""
-        if self._auditor_agent is None:
+        if audit_criteria not in self._auditor_agents:
             audit_prompt = f"""
 You are a professional response auditor and editor. Your job is to review responses and improve them when necessary.
 
@@ -49,14 +110,14 @@ Respond in this exact JSON format:
 Be concise but thorough in your analysis.
 """
             
-            self._auditor_agent = LlmAgent(
+            self._auditor_agents[audit_criteria] = LlmAgent(
                 name=self.name,
                 model=self.model,
                 instruction=audit_prompt,
                 description="LLM auditor for response quality control"
             )
         
-        return self._auditor_agent
+        return self._auditor_agents[audit_criteria]
     
     async def audit_response(self, original_response: str, audit_criteria: str) -> Dict[str, Any]:
         """
@@ -67,7 +128,8 @@ Be concise but thorough in your analysis.
             audit_criteria: Specific criteria for this audit
             
         Returns:
-            Dict with keys: needs_improvement, improved_response, audit_notes
+            Dict with keys: needs_improvement, improved_response, audit_notes,
+            and audit_error=True when the audit itself failed
         """
         try:
             auditor = self._get_auditor_agent(audit_criteria)
@@ -76,12 +138,15 @@ Be concise but thorough in your analysis.
             runner = InMemoryRunner(agent=auditor, app_name="auditor_app")
             session_service = runner.session_service
             
-            # Create session for audit
-            session_service.create_session(
+            # Create a fresh session for each audit so concurrent audits don't share history
+            session_id = f"audit_session_{uuid.uuid4().hex}"
+            session = session_service.create_session(
                 app_name="auditor_app",
                 user_id="auditor_user",
-                session_id="audit_session"
+                session_id=session_id
             )
+            if asyncio.iscoroutine(session):
+                await session
             
             # Send the response for audit
             audit_request = f"Please audit this response:\n\n{original_response}"
@@ -89,7 +154,7 @@ Be concise but thorough in your analysis.
             audit_result = None
             async for event in runner.run_async(
                 user_id="auditor_user",
-                session_id="audit_session",
+                session_id=session_id,
                 new_message=types.Content(
                     role="user",
                     parts=[types.Part(text=audit_request)]
@@ -100,39 +165,257 @@ Be concise but thorough in your analysis.
                     break
             
             if audit_result:
-                # Try to parse JSON response
-                import json
+                # Try to parse JSON response (models often wrap it in a ```json fence)
                 try:
-                    return json.loads(audit_result)
+                    return json.loads(_strip_code_fence(audit_result))
                 except json.JSONDecodeError:
                     # Fallback if JSON parsing fails
                     logger.warning(f"Failed to parse audit result as JSON: {audit_result}")
                     return {
                         "needs_improvement": False,
                         "improved_response": "",
-                        "audit_notes": f"Audit completed but response format was invalid: {audit_result[:100]}..."
+                        "audit_notes": f"Audit completed but response format was invalid: {audit_result[:100]}...",
+                        "audit_error": True,
                     }
             else:
                 return {
                     "needs_improvement": False,
                     "improved_response": "",
-                    "audit_notes": "Audit failed - no response from auditor"
+                    "audit_notes": "Audit failed - no response from auditor",
+                    "audit_error": True,
                 }
                 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Audit failed with error: {e}")
             return {
                 "needs_improvement": False,
                 "improved_response": "",
-                "audit_notes": f"Audit failed due to error: {str(e)}"
+                "audit_notes": f"Audit failed due to error: {str(e)}",
+                "audit_error": True,
             }
     
-    def create_audit_callback(self, audit_criteria: str):
+    async def audit_with_budget(
+        self,
+        original_response: str,
+        audit_criteria: str,
+        timeout_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Audit a response under a time budget and record its latency
+        
+        Args:
+            original_response: The response to audit
+            audit_criteria: Specific criteria for this audit
+            timeout_seconds: Budget for this audit (defaults to self.timeout_seconds)
+            
+        Returns:
+            The audit result dict, plus "timed_out", "audit_error" and "latency_ms" keys.
+            On timeout or error needs_improvement is False so callers keep the original.
+        """
+        budget = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                self.audit_response(original_response, audit_criteria),
+                timeout=budget,
+            )
+            timed_out = False
+        except asyncio.TimeoutError:
+            result = {
+                "needs_improvement": False,
+                "improved_response": "",
+                "audit_notes": f"Audit exceeded its {budget:.2f}s budget - original response kept",
+            }
+            timed_out = True
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        if timed_out:
+            outcome = "timeout"
+        elif result.get("audit_error"):
+            outcome = "error"
+        elif result.get("needs_improvement") and result.get("improved_response"):
+            outcome = "improved"
+        else:
+            outcome = "approved"
+
+        self.metrics.record(latency_ms, outcome)
+        logger.info(
+            f"[{self.name}] audit outcome={outcome} latency_ms={latency_ms:.1f} budget_s={budget}"
+        )
+
+        result["timed_out"] = timed_out
+        result["audit_error"] = outcome == "error"
+        result["latency_ms"] = round(latency_ms, 2)
+        return result
+
+    async def audit_response_multi(
+        self,
+        response: str,
+        criteria_list: List[str],
+        blocking_criteria: Optional[Sequence[str]] = None,
+        timeout_seconds: Optional[float] = None,
+        fail_closed: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Audit one response against several criteria concurrently
+        
+        All audits start at once, each under the time budget. As soon as a
+        blocking criterion (AuditConfig.BLOCKING_CRITERIA by default) asks for
+        an improvement, the remaining audits are cancelled and the response is
+        reported as blocked. With fail_closed, a blocking criterion whose audit
+        timed out or failed blocks the response too: a content filter that
+        didn't run hasn't approved anything.
+        
+        Improvements are chained in criteria_list order, regardless of which
+        audit finished first. The first criterion that proposes an improvement
+        supplies the first revision. Each later criterion that also asked for
+        changes then re-audits the latest revision, so its fixes build on the
+        earlier ones instead of being dropped. The re-audits run one after
+        another within a single shared budget, so the worst case is two
+        budgets in total. Re-audits that don't fit are skipped and their
+        changes are lost. With at most one improvement, no extra audits run.
+        Criteria that approved the original aren't re-run on the revision.
+        
+        Args:
+            response: The response to audit
+            criteria_list: Audit criteria, e.g. [AuditConfig.CONTENT_FILTER, AuditConfig.TRANSLATION_QUALITY]
+            blocking_criteria: Criteria whose failure blocks the response
+            timeout_seconds: Budget per concurrent audit, and for the whole chain of
+                re-audits (defaults to self.timeout_seconds)
+            fail_closed: Block the response when a blocking criterion times out or fails
+            
+        Returns:
+            Dict with keys: needs_improvement, improved_response, audit_notes,
+            blocked, blocking_criterion, blocked_reason ("flagged", "timeout",
+            "error" or None), cancelled, timed_out and errors (indexes into
+            criteria_list), chained_audits, chain_skipped and results (per
+            criterion in criteria_list order: its last audit, None if cancelled)
+        """
+        if blocking_criteria is None:
+            blocking_criteria = AuditConfig.BLOCKING_CRITERIA
+        blocking = set(blocking_criteria)
+        budget = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+
+        def block_reason(index: int, result: Dict[str, Any]) -> Optional[str]:
+            if criteria_list[index] not in blocking:
+                return None
+            if result.get("needs_improvement"):
+                return "flagged"
+            if fail_closed and result.get("timed_out"):
+                return "timeout"
+            if fail_closed and result.get("audit_error"):
+                return "error"
+            return None
+
+        tasks = {
+            asyncio.create_task(
+                self.audit_with_budget(response, criteria, timeout_seconds)
+            ): index
+            for index, criteria in enumerate(criteria_list)
+        }
+        results: List[Optional[Dict[str, Any]]] = [None] * len(criteria_list)
+        blocked_index = None
+        blocked_reason = None
+
+        pending = set(tasks)
+        try:
+            while pending and blocked_index is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Visit finished audits in criteria order so ties resolve deterministically
+                for task in sorted(done, key=tasks.get):
+                    index = tasks[task]
+                    result = task.result()
+                    results[index] = result
+                    if blocked_index is None:
+                        blocked_reason = block_reason(index, result)
+                        if blocked_reason is not None:
+                            blocked_index = index
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        notes = [
+            result.get("audit_notes", "")
+            for result in results
+            if result is not None and result.get("audit_notes")
+        ]
+
+        def indexes(flag: str) -> List[int]:
+            return [index for index, result in enumerate(results) if result is not None and result.get(flag)]
+
+        if blocked_index is not None:
+            blocker = results[blocked_index]
+            logger.warning(
+                f"[{self.name}] response blocked by criterion #{blocked_index} ({blocked_reason}); "
+                f"cancelled {len(pending)} remaining audit(s)"
+            )
+            return {
+                "needs_improvement": True,
+                "improved_response": blocker.get("improved_response", ""),
+                "audit_notes": " | ".join(notes),
+                "blocked": True,
+                "blocking_criterion": criteria_list[blocked_index],
+                "blocked_reason": blocked_reason,
+                "cancelled": len(pending),
+                "timed_out": indexes("timed_out"),
+                "errors": indexes("audit_error"),
+                "chained_audits": 0,
+                "chain_skipped": 0,
+                "results": results,
+            }
+
+        improving = [
+            index for index, result in enumerate(results)
+            if result and result.get("needs_improvement") and result.get("improved_response")
+        ]
+        improved_response = results[improving[0]]["improved_response"] if improving else ""
+        # The other improvements were written against the original; redo them on
+        # the revision, all within one budget
+        chain_deadline = time.perf_counter() + budget
+        chained = 0
+        for index in improving[1:]:
+            remaining = chain_deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            result = await self.audit_with_budget(improved_response, criteria_list[index], remaining)
+            chained += 1
+            results[index] = result
+            if result.get("needs_improvement") and result.get("improved_response"):
+                improved_response = result["improved_response"]
+            if result.get("audit_notes"):
+                notes.append(result["audit_notes"])
+
+        return {
+            "needs_improvement": bool(improved_response),
+            "improved_response": improved_response,
+            "audit_notes": " | ".join(notes),
+            "blocked": False,
+            "blocking_criterion": None,
+            "blocked_reason": None,
+            "cancelled": 0,
+            "timed_out": indexes("timed_out"),
+            "errors": indexes("audit_error"),
+            "chained_audits": chained,
+            "chain_skipped": max(len(improving) - 1, 0) - chained,
+            "results": results,
+        }
+
+    def create_audit_callback(self, audit_criteria: str, timeout_seconds: Optional[float] = None):
         """
         Create an after_agent_callback function that uses this auditor
         
+        The callback captures the agent's final text response for the current
+        invocation, audits it under a time budget and substitutes the improved
+        text only when the audit finishes in time and asks for an improvement.
+        
         Args:
             audit_criteria: The criteria to use for auditing
+            timeout_seconds: Time budget per audit (defaults to self.timeout_seconds).
+                Can be overridden per session with the "audit_timeout_seconds" state key.
             
         Returns:
             A callback function suitable for after_agent_callback
@@ -143,28 +426,72 @@ Be concise but thorough in your analysis.
             """
             agent_name = callback_context.agent_name
             invocation_id = callback_context.invocation_id
-            current_state = callback_context.state.to_dict()
+            state = callback_context.state
             
             print(f"\n[🔍 Auditor] Reviewing response from agent: {agent_name} (Inv: {invocation_id})")
             
             # Check if auditing is enabled in session state
-            audit_enabled = current_state.get("audit_enabled", True)
+            audit_enabled = state.get("audit_enabled", True)
             if not audit_enabled:
                 print("[🔍 Auditor] Auditing disabled in session state. Skipping audit.")
                 return None
             
-            # Get the original response from the agent
-            # Note: In a real implementation, you'd need to capture the agent's response
-            # For now, we'll simulate this or use a different approach
-            print("[🔍 Auditor] Auditing is enabled but response capture not implemented in this callback.")
-            print("[🔍 Auditor] This callback demonstrates the framework structure.")
+            original_response = _extract_final_response(callback_context)
+            if not original_response:
+                print("[🔍 Auditor] No text response captured for this invocation. Skipping audit.")
+                return None
+            
+            budget = state.get("audit_timeout_seconds", timeout_seconds)
+            audit = await self.audit_with_budget(original_response, audit_criteria, budget)
+            state["audit_last_latency_ms"] = audit["latency_ms"]
+            
+            if audit["timed_out"]:
+                print(f"[🔍 Auditor] Audit timed out after {audit['latency_ms']}ms. Using original response.")
+                return None
             
-            # Return None to use original response
+            improved_response = audit.get("improved_response")
+            if audit.get("needs_improvement") and improved_response:
+                print(f"[🔍 Auditor] Response improved in {audit['latency_ms']}ms: {audit.get('audit_notes', '')}")
+                return types.Content(
+                    parts=[types.Part(text=improved_response)],
+                    role="model"
+                )
+            
+            print(f"[🔍 Auditor] Response approved in {audit['latency_ms']}ms. Using original response.")
             return None
         
         return audit_callback
 
 
+def _strip_code_fence(text: str) -> str:
+    """Remove a surrounding ```json ... ``` fence from a model response"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _extract_final_response(callback_context: CallbackContext) -> str:
+    """
+    Find the text of the last response the current agent produced in this invocation
+    """
+    session = callback_context._invocation_context.session
+    agent_name = callback_context.agent_name
+    invocation_id = callback_context.invocation_id
+
+    for event in reversed(session.events):
+        if event.invocation_id != invocation_id:
+            break
+        if event.author != agent_name or not event.content or not event.content.parts:
+            continue
+        text = "".join(part.text for part in event.content.parts if part.text)
+        if text:
+            return text
+    return ""
+
+
 class AuditConfig:
     """Configuration class for different audit criteria"""
     
@@ -212,20 +539,22 @@ class AuditConfig:
     - Easy to verify calculations
     - Professional presentation
     """
+    
+    # Criteria whose failure blocks a response in audit_response_multi
+    BLOCKING_CRITERIA = (CONTENT_FILTER,)
 
 
 # Utility functions for common callback patterns
-def create_simple_audit_callback(auditor: LLMAuditor, criteria: str):
+def create_simple_audit_callback(
+    auditor: LLMAuditor, criteria: str, timeout_seconds: Optional[float] = None
+):
     """
     Create a simple audit callback that can be used with after_agent_callback
-    """
-    def callback(callback_context: CallbackContext) -> Optional[types.Content]:
-        print(f"[🔍 Auditor] Simple audit callback triggered for {callback_context.agent_name}")
-        # This is a placeholder - actual implementation would need to capture
-        # the agent's response and audit it
-        return None
     
-    return callback
+    The returned callback audits the agent's final response under the given
+    time budget and falls back to the original response on timeout.
+    """
+    return auditor.create_audit_callback(criteria, timeout_seconds=timeout_seconds)
 
 
 logger.info("LLM Auditor framework initialized")
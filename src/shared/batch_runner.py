@@ -0,0 +1,366 @@
+"""
+Shared Batch Runner for Agent Pipelines
+
+This module runs an agent (e.g. the code-generation pipeline) over many
+specs read from a JSONL file:
+
+- bounded concurrency: a fixed number of workers pull specs, each spec in its
+  own session
+- per-model rate limits: every model call first takes a request from its
+  model's quota (e.g. fewer for gemini-2.5-pro than for flash), waiting when
+  it's exhausted, so the batch stays under each model's quota
+- checkpoint/resume: each finished spec is appended to the results JSONL
+  immediately (flushed), and a rerun skips specs already recorded as "ok"
+- a per-stage report: latency, model calls, rate-limit waits and tokens per
+  sub-agent, for each spec and aggregated over the batch
+
+Stage metrics and quotas are applied by a runner plugin, so the pipeline's
+agents don't have to change.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from .profiling import STAGE_BUCKETS, LatencyHistogram
+from .rate_limiter import RateLimit, rate_limiter_from_env
+
+logger = logging.getLogger(__name__)
+
+
+def load_specs(path: str) -> List[Dict[str, Any]]:
+    """
+    Read specs from a JSONL file
+
+    Each line is an object with the spec text in "spec" (or "prompt") and an
+    optional unique "id" (the line number by default). Blank lines are skipped.
+
+    Raises:
+        ValueError: On invalid JSON, a missing spec or a duplicate id
+    """
+    specs: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON ({e})") from None
+            text = item.get("spec") or item.get("prompt") if isinstance(item, dict) else None
+            if not text:
+                raise ValueError(f"{path}:{number}: missing 'spec'")
+            spec_id = str(item.get("id", f"line-{number}"))
+            if spec_id in seen:
+                raise ValueError(f"{path}:{number}: duplicate id {spec_id!r}")
+            seen.add(spec_id)
+            specs.append({"id": spec_id, "spec": text})
+    return specs
+
+
+def load_completed(path: str) -> Set[str]:
+    """Ids recorded with status "ok" in a results JSONL file (the checkpoint)"""
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interrupted run
+            if isinstance(record, dict) and record.get("status") == "ok":
+                completed.add(str(record.get("id")))
+    return completed
+
+
+def _new_stage() -> Dict[str, Any]:
+    return {
+        "ms": 0.0,
+        "runs": 0,
+        "model_calls": 0,
+        "rate_limit_wait_ms": 0.0,
+        "prompt_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+    }
+
+
+class PipelineMetricsPlugin(BasePlugin):
+    """
+    Runner plugin recording per-stage metrics and enforcing per-model quotas
+
+    Stages are the sub-agents of the root agent (nested agents such as a fixer
+    inside a custom agent are stages too). Metrics are kept per session until
+    pop_session() collects them, so a failed run still reports its stages.
+
+    The quota is taken before agent-level before_model_callbacks run, so a
+    call they short-circuit still counts against it (conservative).
+    """
+
+    def __init__(self, model_limits: Optional[Dict[str, RateLimit]] = None, default_limit: Optional[RateLimit] = None):
+        """
+        Args:
+            model_limits: Requests allowed per model name
+            default_limit: Limit for models without their own entry (effectively unlimited if omitted)
+        """
+        super().__init__(name="pipeline_metrics")
+        self.model_limits = dict(model_limits or {})
+        self._limiter = rate_limiter_from_env(default_limit or RateLimit(1_000_000, 1), self.model_limits)
+        # session_id -> {agent_name: stage metrics}
+        self._sessions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # (session_id, agent_name) -> start time
+        self._started: Dict[tuple, float] = {}
+        self.rate_limit_waits = 0
+
+    def _stage(self, callback_context: CallbackContext) -> Dict[str, Any]:
+        stages = self._sessions.setdefault(callback_context.session.id, {})
+        return stages.setdefault(callback_context.agent_name, _new_stage())
+
+    def pop_session(self, session_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return and forget the stage metrics of a session"""
+        stages = self._sessions.pop(session_id, {})
+        now = time.perf_counter()
+        for key in [key for key in self._started if key[0] == session_id]:
+            # A stage cut short by an error or timeout; count the time it took
+            stage = stages.setdefault(key[1], _new_stage())
+            stage["ms"] += (now - self._started.pop(key)) * 1000
+            stage["runs"] += 1
+        for stage in stages.values():
+            stage["ms"] = round(stage["ms"], 1)
+            stage["rate_limit_wait_ms"] = round(stage["rate_limit_wait_ms"], 1)
+        return stages
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> Optional[types.Content]:
+        if agent.parent_agent is not None:
+            self._started[(callback_context.session.id, agent.name)] = time.perf_counter()
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> Optional[types.Content]:
+        started = self._started.pop((callback_context.session.id, agent.name), None)
+        if started is not None:
+            stage = self._stage(callback_context)
+            stage["ms"] += (time.perf_counter() - started) * 1000
+            stage["runs"] += 1
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        model = llm_request.model or "default"
+        started = None
+        while True:
+            allowed, retry_after = self._limiter.acquire("batch", model)
+            if allowed:
+                break
+            if started is None:
+                started = time.perf_counter()
+                self.rate_limit_waits += 1
+            await asyncio.sleep(retry_after)
+        if started is not None:
+            self._stage(callback_context)["rate_limit_wait_ms"] += (time.perf_counter() - started) * 1000
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        stage = self._stage(callback_context)
+        stage["model_calls"] += 1
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            stage["prompt_tokens"] += usage.prompt_token_count or 0
+            stage["output_tokens"] += usage.candidates_token_count or 0
+            stage["total_tokens"] += usage.total_token_count or 0
+        return None
+
+
+class BatchRunner:
+    """
+    Run an agent over a JSONL file of specs with bounded concurrency
+
+    Usage:
+        runner = BatchRunner(
+            code_pipeline_agent,
+            model_limits={"gemini-2.5-flash": RateLimit(60, 60), "gemini-2.5-pro": RateLimit(10, 60)},
+            max_concurrency=8,
+            state_keys=("refactored_code", "refactor_mode"),
+        )
+        report = await runner.run("specs.jsonl", "results.jsonl")
+
+    Each result line holds the spec id, status ("ok"/"error"), the selected
+    state keys, the latency and the per-stage metrics.
+    """
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        model_limits: Optional[Dict[str, RateLimit]] = None,
+        max_concurrency: int = 4,
+        state_keys: Iterable[str] = (),
+        item_timeout: Optional[float] = None,
+        app_name: str = "batch_runner",
+    ):
+        """
+        Args:
+            agent: Root agent run once per spec
+            model_limits: Requests allowed per model name
+            max_concurrency: Maximum specs in flight
+            state_keys: Session state keys copied into each result
+            item_timeout: Seconds after which a spec is abandoned (recorded as an error)
+            app_name: App name of the sessions
+        """
+        self.agent = agent
+        self.max_concurrency = max(1, max_concurrency)
+        self.state_keys = tuple(state_keys)
+        self.item_timeout = item_timeout
+        self.app_name = app_name
+        self.metrics = PipelineMetricsPlugin(model_limits)
+        self.runner = InMemoryRunner(agent=agent, app_name=app_name, plugins=[self.metrics])
+
+    async def run_one(self, spec_id: str, text: str) -> Dict[str, Any]:
+        """Run the agent on one spec in a fresh session and return its result record"""
+        user_id = "batch"
+        session = await self.runner.session_service.create_session(app_name=self.app_name, user_id=user_id)
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        started = time.perf_counter()
+        record: Dict[str, Any] = {"id": spec_id}
+
+        async def consume():
+            async for _ in self.runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                pass
+
+        try:
+            await asyncio.wait_for(consume(), timeout=self.item_timeout)
+            final = await self.runner.session_service.get_session(
+                app_name=self.app_name, user_id=user_id, session_id=session.id
+            )
+            record["status"] = "ok"
+            record["state"] = {key: final.state.get(key) for key in self.state_keys if key in final.state}
+        except asyncio.TimeoutError:
+            record.update(status="error", error=f"timed out after {self.item_timeout} s")
+        except Exception as e:
+            logger.warning(f"Batch item {spec_id} failed: {e}")
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        finally:
+            await self.runner.session_service.delete_session(
+                app_name=self.app_name, user_id=user_id, session_id=session.id
+            )
+
+        stages = self.metrics.pop_session(session.id)
+        record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        record["stages"] = stages
+        record["tokens"] = {
+            key: sum(stage[key] for stage in stages.values())
+            for key in ("prompt_tokens", "output_tokens", "total_tokens")
+        }
+        return record
+
+    async def run(self, specs_path: str, output_path: str, resume: bool = True) -> Dict[str, Any]:
+        """
+        Run every spec of specs_path, appending results to output_path
+
+        Args:
+            specs_path: JSONL file of specs (see load_specs)
+            output_path: Results JSONL, also the checkpoint
+            resume: Skip specs already recorded as "ok" in output_path
+
+        Returns:
+            The batch report (see report())
+        """
+        specs = load_specs(specs_path)
+        completed = load_completed(output_path) if resume else set()
+        pending = [spec for spec in specs if spec["id"] not in completed]
+        logger.info(f"Batch: {len(specs)} specs, {len(specs) - len(pending)} already done, {len(pending)} to run")
+
+        # Start on a fresh line if an interrupted run left a partial one
+        if resume and os.path.exists(output_path) and os.path.getsize(output_path):
+            with open(output_path, "rb") as handle:
+                handle.seek(-1, os.SEEK_END)
+                needs_newline = handle.read(1) != b"\n"
+        else:
+            needs_newline = False
+
+        records: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            if needs_newline:
+                output.write("\n")
+            queue: Iterator[Dict[str, Any]] = iter(pending)
+
+            async def worker():
+                # Workers share one iterator, so at most max_concurrency specs are in flight
+                for spec in queue:
+                    record = await self.run_one(spec["id"], spec["spec"])
+                    output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    output.flush()
+                    records.append(record)
+                    print(f"[📦 Batch] {len(records)}/{len(pending)} {spec['id']}: {record['status']} ({record['latency_ms']:.0f} ms)")
+
+            await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, len(pending)) or 1)))
+
+        report = self.report(records)
+        report.update(total=len(specs), skipped=len(specs) - len(pending), wall_ms=round((time.perf_counter() - started) * 1000, 1))
+        return report
+
+    def report(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Aggregate result records into a per-stage latency and token report
+
+        Returns:
+            {"ok", "errors", "latency_ms": {p50, p95, max}, "tokens": {...},
+             "rate_limit_waits", "stages": {name: {runs, p50_ms, p95_ms, max_ms,
+             mean_ms, model_calls, rate_limit_wait_ms, *_tokens}}}
+        """
+        def summarize(histogram: LatencyHistogram) -> Dict[str, Optional[float]]:
+            def ms(value):
+                return round(value * 1000, 1) if value is not None else None
+            return {
+                "p50_ms": ms(histogram.quantile(0.5)),
+                "p95_ms": ms(histogram.quantile(0.95)),
+                "max_ms": ms(histogram.max_seconds),
+                "mean_ms": ms(histogram.total_seconds / histogram.count) if histogram.count else None,
+            }
+
+        overall = LatencyHistogram(STAGE_BUCKETS)
+        stage_histograms: Dict[str, LatencyHistogram] = {}
+        stage_totals: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            overall.observe(record["latency_ms"] / 1000)
+            for name, stage in record["stages"].items():
+                stage_histograms.setdefault(name, LatencyHistogram(STAGE_BUCKETS)).observe(stage["ms"] / 1000)
+                totals = stage_totals.setdefault(name, _new_stage())
+                for key, value in stage.items():
+                    totals[key] += value
+
+        stages = {}
+        for name, totals in stage_totals.items():
+            stages[name] = {
+                "runs": totals["runs"],
+                **summarize(stage_histograms[name]),
+                "model_calls": totals["model_calls"],
+                "rate_limit_wait_ms": round(totals["rate_limit_wait_ms"], 1),
+                "prompt_tokens": totals["prompt_tokens"],
+                "output_tokens": totals["output_tokens"],
+                "total_tokens": totals["total_tokens"],
+            }
+        return {
+            "ok": sum(1 for record in records if record["status"] == "ok"),
+            "errors": sum(1 for record in records if record["status"] != "ok"),
+            "latency_ms": summarize(overall),
+            "tokens": {
+                key: sum(record["tokens"][key] for record in records)
+                for key in ("prompt_tokens", "output_tokens", "total_tokens")
+            },
+            "rate_limit_waits": self.metrics.rate_limit_waits,
+            "stages": stages,
+        }
@@ -0,0 +1,240 @@
+"""
+Shared Bulk Translator for the Translation Service
+
+This module translates many short strings (e.g. UI strings) with as few
+model calls as possible:
+
+1. Each string is looked up in the translation memory first
+2. The remaining distinct strings are packed into chunks sized to a token budget
+3. Each chunk is one schema-constrained model call returning a JSON array of
+   translations, and chunks run concurrently
+4. A chunk whose answer is invalid (wrong length, truncated JSON) is split
+   in half and retried, down to single strings
+
+max_concurrency bounds the model calls in flight per translate() call,
+including the retries of split chunks.
+
+Results come back in the original order, and new translations are written
+to the translation memory.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from google.genai import types
+
+from .langid import default_identifier
+from .translation_memory import TranslationMemory
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate: ~4 characters per token plus JSON/array overhead per string
+CHARS_PER_TOKEN = 4
+TOKENS_PER_ITEM_OVERHEAD = 4
+
+# (prompt, chunk size) -> raw JSON text
+GenerateFunction = Callable[[str, int], Awaitable[str]]
+
+BATCH_PROMPT = """Translate each string in the JSON array below into {target_lang}.
+Return a JSON array of strings with exactly {count} items, in the same order.
+Translate only; keep placeholders like {{name}} and %s unchanged; do not add notes.
+
+{payload}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for chunking"""
+    return len(text) // CHARS_PER_TOKEN + TOKENS_PER_ITEM_OVERHEAD
+
+
+class _Batch:
+    """State of one translate() call: its concurrency limit, source languages and counters"""
+
+    __slots__ = ("target_lang", "languages", "semaphore", "model_calls", "splits")
+
+    def __init__(self, target_lang: str, languages: Dict[str, str], max_concurrency: int):
+        self.target_lang = target_lang
+        self.languages = languages
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.model_calls = 0
+        self.splits = 0
+
+
+class BatchTranslator:
+    """
+    Translate lists of strings in token-budgeted, schema-constrained model calls
+
+    Usage:
+        translator = BatchTranslator(memory=TranslationMemory())  # not shared with a chat agent's memory
+        result = await translator.translate(["Save", "Cancel", "Sign in"], "spanish")
+    """
+
+    def __init__(
+        self,
+        model: str = "gemini-2.5-flash",
+        memory: Optional[TranslationMemory] = None,
+        token_budget: int = 2000,
+        max_items_per_chunk: int = 100,
+        max_concurrency: int = 4,
+        generate: Optional[GenerateFunction] = None,
+    ):
+        """
+        Args:
+            model: Model used for the batch calls
+            memory: Translation memory consulted first and updated afterwards
+            token_budget: Estimated input tokens per model call
+            max_items_per_chunk: Maximum strings per model call
+            max_concurrency: Maximum model calls in flight per translate() call
+            generate: Override for the model call (prompt, count) -> JSON text
+        """
+        self.model = model
+        self.memory = memory
+        self.token_budget = token_budget
+        self.max_items_per_chunk = max_items_per_chunk
+        self.max_concurrency = max_concurrency
+        self._generate = generate or self._generate_with_gemini
+        self._client = None
+        self.model_calls = 0
+        self.splits = 0
+
+    async def _generate_with_gemini(self, prompt: str, count: int) -> str:
+        if self._client is None:
+            from google import genai  # created lazily so importing needs no API key
+
+            self._client = genai.Client()
+        response = await self._client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema={"type": "ARRAY", "items": {"type": "STRING"}},
+                temperature=0.0,
+            ),
+        )
+        return response.text or ""
+
+    def chunk(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into chunks that fit the token budget (an oversized string gets its own chunk)"""
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if current and (current_tokens + tokens > self.token_budget or len(current) >= self.max_items_per_chunk):
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _translate_chunk(self, chunk: List[str], batch: _Batch) -> Dict[str, Optional[str]]:
+        """Translate one chunk, splitting it in half whenever the model's answer is unusable"""
+        prompt = BATCH_PROMPT.format(
+            target_lang=batch.target_lang, count=len(chunk), payload=json.dumps(chunk, ensure_ascii=False)
+        )
+        try:
+            # Only the model call holds a permit, so split halves queue like any other call
+            async with batch.semaphore:
+                batch.model_calls += 1
+                self.model_calls += 1
+                call_started = time.perf_counter()
+                raw = await self._generate(prompt, len(chunk))
+                call_ms = (time.perf_counter() - call_started) * 1000
+            translations = json.loads(raw)
+            if (
+                isinstance(translations, list)
+                and len(translations) == len(chunk)
+                and all(isinstance(item, str) for item in translations)
+            ):
+                result = dict(zip(chunk, translations))
+                self._remember(result, batch, call_ms / len(chunk))
+                return result
+            problem = f"expected {len(chunk)} strings"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            problem = str(e)
+
+        if len(chunk) == 1:
+            logger.warning(f"Batch translation failed for one string: {problem}")
+            return {chunk[0]: None}
+        batch.splits += 1
+        self.splits += 1
+        logger.info(f"Batch translation of {len(chunk)} strings unusable ({problem}); splitting")
+        middle = len(chunk) // 2
+        left, right = await asyncio.gather(
+            self._translate_chunk(chunk[:middle], batch),
+            self._translate_chunk(chunk[middle:], batch),
+        )
+        return {**left, **right}
+
+    def _remember(self, translations: Dict[str, str], batch: _Batch, per_item_ms: float) -> None:
+        """Write a chunk's translations to the translation memory"""
+        if self.memory is None:
+            return
+        for text, translation in translations.items():
+            self.memory.store(text, batch.languages[text], batch.target_lang, translation, per_item_ms)
+
+    async def translate(self, texts: List[str], target_lang: str) -> Dict[str, Any]:
+        """
+        Translate a list of strings
+
+        Args:
+            texts: Strings to translate
+            target_lang: Target language
+
+        Returns:
+            {"status", "target_lang", "count", "translations": [{"text", "translation", "source"}], "stats"}
+            where source is "memory", "model" or "error", in the original order
+        """
+        started = time.perf_counter()
+        target_lang = target_lang.lower().strip()
+        distinct = list(dict.fromkeys(texts))
+        languages = {
+            text: language or "unknown"
+            for text, (language, _, _) in zip(distinct, default_identifier().detect_batch(distinct))
+        }
+
+        # 1. Translation memory
+        resolved: Dict[str, Dict[str, Any]] = {}
+        if self.memory is not None:
+            for text in distinct:
+                hit = self.memory.lookup(text, languages[text], target_lang)
+                if hit is not None:
+                    resolved[text] = {"translation": hit["translation"], "source": "memory"}
+        pending = [text for text in distinct if text not in resolved]
+
+        # 2-4. Token-budgeted, concurrent model calls
+        batch = _Batch(target_lang, languages, self.max_concurrency)
+        if pending:
+            chunks = self.chunk(pending)
+            for translations in await asyncio.gather(*(self._translate_chunk(chunk, batch) for chunk in chunks)):
+                for text, translation in translations.items():
+                    resolved[text] = {
+                        "translation": translation,
+                        "source": "model" if translation is not None else "error",
+                    }
+
+        elapsed = time.perf_counter() - started
+        results = [{"text": text, **resolved[text]} for text in texts]
+        failed = sum(1 for result in results if result["source"] == "error")
+        logger.info(f"Batch translated {len(texts)} strings to {target_lang} in {elapsed * 1000:.0f} ms")
+        return {
+            "status": "success" if not failed else ("partial" if failed < len(results) else "error"),
+            "target_lang": target_lang,
+            "count": len(results),
+            "translations": results,
+            "stats": {
+                "distinct": len(distinct),
+                "memory_hits": len(distinct) - len(pending),
+                "model_calls": batch.model_calls,
+                "splits": batch.splits,
+                "failed": failed,
+                "strings_per_second": round(len(texts) / elapsed, 1) if elapsed > 0 else None,
+            },
+        }
@@ -0,0 +1,86 @@
+"""
+Shared Batch Lookup Helper for Batch Tools
+
+This module lets an example expose a batch variant of a lookup tool (for
+example get_current_weather_batch(locations)). The model answers a
+multi-entity question with one tool call instead of one call per entity,
+often spread over several model turns.
+
+The per-item lookups run concurrently, duplicates are looked up once, and
+the results come back as one structured dict in the caller's order.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on items per batch call, so one call can't fan out unboundedly
+MAX_BATCH_SIZE = 20
+
+
+def _normalize_item(item: Any) -> Any:
+    return item.strip().lower() if isinstance(item, str) else item
+
+
+async def run_batch_lookup(
+    lookup: Callable[[Any], Any],
+    items: List[Any],
+    item_field: str,
+    max_concurrency: int = 8,
+    max_items: int = MAX_BATCH_SIZE,
+    key_fn: Optional[Callable[[Any], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run a single-item lookup for every item concurrently
+
+    Sync lookups run in worker threads, async lookups on the event loop.
+    A failing item is reported in its own entry and doesn't fail the batch.
+
+    Args:
+        lookup: Function taking one item and returning its result
+        items: Items to look up
+        item_field: Name of the item in each result entry, e.g. "location"
+        max_concurrency: Maximum number of lookups in flight
+        max_items: Maximum number of items accepted in one call
+        key_fn: Maps an item to its dedup key (case/whitespace-insensitive by default)
+
+    Returns:
+        {"status": "success", "count": n, "results": [{item_field: item, "result": ...}, ...]}
+        or {"status": "error", "error": message} for an invalid batch
+    """
+    if not items:
+        return {"status": "error", "error": f"No {item_field} values provided."}
+    if len(items) > max_items:
+        return {
+            "status": "error",
+            "error": f"Too many {item_field} values ({len(items)}); the limit is {max_items} per call.",
+        }
+
+    key_fn = key_fn or _normalize_item
+    semaphore = asyncio.Semaphore(max_concurrency)
+    is_async = inspect.iscoroutinefunction(lookup)
+
+    async def run_one(item: Any) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                if is_async:
+                    return {"result": await lookup(item)}
+                return {"result": await asyncio.to_thread(lookup, item)}
+            except Exception as e:
+                logger.warning(f"Batch lookup failed for {item_field}={item!r}: {e}")
+                return {"error": str(e)}
+
+    # Look up each distinct item once, then fan the results back out
+    tasks: Dict[Any, asyncio.Task] = {}
+    for item in items:
+        key = key_fn(item)
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(run_one(item))
+    await asyncio.gather(*tasks.values())
+
+    results = [{item_field: item, **tasks[key_fn(item)].result()} for item in items]
+    logger.info(f"Batch lookup: {len(items)} {item_field} values, {len(tasks)} distinct")
+    return {"status": "success", "count": len(results), "results": results}
@@ -0,0 +1,110 @@
+"""
+Shared Enrichment Pipeline for After Tool Callbacks
+
+This module lets an after_tool_callback enhance tool results without deep
+copying them. Enrichers are registered per tool (or for every tool with "*")
+and each returns a small overlay dict of fields to add. An enricher can be
+gated on a session state flag (such as add_explanations), so expensive
+enrichments only run when someone asked for them.
+
+The enriched result is the original response plus the overlays, merged into
+one new shallow dict; nested values are shared, not copied, and the
+original response is never mutated.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+EnricherFunction = Callable[[Dict[str, Any], Dict[str, Any]], Optional[Dict[str, Any]]]
+
+ALL_TOOLS = "*"
+
+
+class _Enricher:
+    __slots__ = ("function", "flag", "default", "status")
+
+    def __init__(self, function: EnricherFunction, flag: Optional[str], default: bool, status: str):
+        self.function = function
+        self.flag = flag
+        self.default = default
+        self.status = status
+
+
+class EnrichmentPipeline:
+    """
+    Per-tool registry of enrichers producing shallow overlays
+
+    Usage:
+        enrichers = EnrichmentPipeline()
+
+        @enrichers.register("basic_calculator", flag="add_explanations")
+        def explain(response, args):
+            return {"detailed_explanation": f"Result: {response['result']}"}
+
+        enhanced = enrichers.enrich("basic_calculator", args, tool_response, tool_context.state)
+    """
+
+    def __init__(self):
+        self._enrichers: Dict[str, List[_Enricher]] = {}
+
+    def register(
+        self,
+        tools: Union[str, Iterable[str]],
+        flag: Optional[str] = None,
+        default: bool = False,
+        status: str = "success",
+    ) -> Callable[[EnricherFunction], EnricherFunction]:
+        """
+        Decorator registering an enricher
+
+        Args:
+            tools: Tool name(s) the enricher applies to, or "*" for every tool
+            flag: Session state key that must be truthy for the enricher to run
+            default: Value assumed for the flag when it isn't in the state
+            status: Only run for responses with this "status" ("success" or "error")
+
+        Returns:
+            Decorator returning the function unchanged
+        """
+        tool_names = [tools] if isinstance(tools, str) else list(tools)
+
+        def decorator(function: EnricherFunction) -> EnricherFunction:
+            enricher = _Enricher(function, flag, default, status)
+            for tool_name in tool_names:
+                self._enrichers.setdefault(tool_name, []).append(enricher)
+            return function
+
+        return decorator
+
+    def enrich(
+        self, tool_name: str, args: Dict[str, Any], response: Dict[str, Any], state: Mapping[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run the enrichers that apply to this tool, status and state
+
+        Args:
+            tool_name: Name of the tool that produced the response
+            args: Tool arguments
+            response: Tool response (not modified)
+            state: Session state, read for the enricher flags
+
+        Returns:
+            A new shallow dict with the overlays applied, or None if no enricher
+            added anything
+        """
+        status = response.get("status")
+        overlay: Dict[str, Any] = {}
+        for enricher in self._enrichers.get(tool_name, []) + self._enrichers.get(ALL_TOOLS, []):
+            if enricher.status != status:
+                continue
+            if enricher.flag is not None and not state.get(enricher.flag, enricher.default):
+                continue
+            fields = enricher.function(response, args)
+            if fields:
+                overlay.update(fields)
+
+        if not overlay:
+            return None
+        return {**response, **overlay}
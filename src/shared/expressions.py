@@ -0,0 +1,251 @@
+"""
+Shared Safe Expression Engine for Calculator Tools
+
+This module compiles arithmetic expressions into Python closures instead of
+calling eval(). Expressions are parsed with the ast module and only a
+whitelisted set of nodes is accepted:
+
+- numbers (int/float literals) and variables
+- + - * / // % ** and unary + -
+
+Guards stop inputs such as 9**9**9 from pinning a CPU: expression length
+and node count are capped, exponents are bounded, and integer results may
+not exceed MAX_INT_BITS. Compiled expressions are kept in an LRU, and an
+expression can be evaluated over NumPy arrays of variable bindings
+(vectorized mode) when NumPy is installed, with a pure-Python fallback.
+"""
+
+import ast
+import logging
+import math
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; vectorized mode falls back to Python
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_AST_NODES = 200
+MAX_EXPONENT = 1000
+MAX_INT_BITS = 4096
+MAX_BATCH_ROWS = 100_000
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are invalid, unsafe or fail to evaluate"""
+
+
+def _check_int(value: Any) -> Any:
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ExpressionError(f"Result too large (more than {MAX_INT_BITS} bits)")
+    return value
+
+
+def _guarded_pow(base: Any, exponent: Any) -> Any:
+    """Scalar power with exponent and result-size guards"""
+    if abs(exponent) > MAX_EXPONENT:
+        raise ExpressionError(f"Exponent {exponent} exceeds the limit of {MAX_EXPONENT}")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        # Estimate the result size before computing it
+        if max(base.bit_length() - 1, 0) * exponent > MAX_INT_BITS:
+            raise ExpressionError(f"Result too large (more than {MAX_INT_BITS} bits)")
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ExpressionError("Fractional power of a negative number")
+    return result
+
+
+def _guarded_pow_array(base: Any, exponent: Any) -> Any:
+    """Vectorized power; only the exponent needs a guard since floats overflow to inf"""
+    if np.any(np.abs(exponent) > MAX_EXPONENT):
+        raise ExpressionError(f"Exponent exceeds the limit of {MAX_EXPONENT}")
+    return np.power(base, exponent)
+
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+
+class CompiledExpression:
+    """
+    A validated expression compiled into a tree of closures
+
+    Attributes:
+        source: The original expression text
+        variables: Names of the variables the expression uses, sorted
+    """
+
+    def __init__(self, source: str, scalar: Evaluator, vector: Evaluator, variables: Tuple[str, ...]):
+        self.source = source
+        self.variables = variables
+        self._scalar = scalar
+        self._vector = vector
+
+    def evaluate(self, bindings: Optional[Dict[str, float]] = None) -> Any:
+        """
+        Evaluate the expression for one set of variable values
+
+        Raises:
+            ExpressionError: For missing variables, guard violations or math errors
+        """
+        bindings = bindings or {}
+        self._check_bindings(bindings)
+        try:
+            return _check_int(self._scalar(bindings))
+        except ExpressionError:
+            raise
+        except ZeroDivisionError:
+            raise ExpressionError("Division by zero")
+        except (OverflowError, ValueError, TypeError) as e:
+            raise ExpressionError(str(e))
+
+    def evaluate_vectorized(self, bindings: Dict[str, Sequence[float]]) -> Tuple[List[Optional[float]], List[bool]]:
+        """
+        Evaluate the expression over arrays of variable values
+
+        All binding arrays must have the same length. Elements that divide by
+        zero or overflow don't fail the batch; they come back as None with
+        their error flag set.
+
+        Args:
+            bindings: Variable name -> sequence of values
+
+        Returns:
+            (results, errors): results per row (None where invalid) and the error mask
+        """
+        self._check_bindings(bindings)
+        lengths = {len(values) for values in bindings.values()}
+        if len(lengths) > 1:
+            raise ExpressionError("All variable arrays must have the same length")
+        rows = lengths.pop() if lengths else 1
+        if rows > MAX_BATCH_ROWS:
+            raise ExpressionError(f"Too many rows ({rows}); the limit is {MAX_BATCH_ROWS}")
+
+        if np is None:
+            return self._evaluate_rows(bindings, rows)
+
+        arrays = {name: np.asarray(values, dtype=np.float64) for name, values in bindings.items()}
+        try:
+            with np.errstate(all="ignore"):
+                values = np.broadcast_to(np.asarray(self._vector(arrays), dtype=np.float64), (rows,))
+        except (OverflowError, ValueError, TypeError, ZeroDivisionError) as e:
+            raise ExpressionError(str(e))
+        errors = ~np.isfinite(values)
+        results = np.where(errors, np.nan, values).tolist()
+        return [None if error else value for value, error in zip(results, errors.tolist())], errors.tolist()
+
+    def _evaluate_rows(self, bindings: Dict[str, Sequence[float]], rows: int) -> Tuple[List[Optional[float]], List[bool]]:
+        """Pure-Python fallback for evaluate_vectorized"""
+        results, errors = [], []
+        for row in range(rows):
+            try:
+                value = float(self.evaluate({name: values[row] for name, values in bindings.items()}))
+                ok = math.isfinite(value)
+            except (ExpressionError, OverflowError):
+                value, ok = None, False
+            results.append(value if ok else None)
+            errors.append(not ok)
+        return results, errors
+
+    def _check_bindings(self, bindings: Dict[str, Any]) -> None:
+        missing = [name for name in self.variables if name not in bindings]
+        if missing:
+            raise ExpressionError(f"Missing values for variables: {', '.join(missing)}")
+
+
+def _compile_node(node: ast.AST, variables: set) -> Tuple[Evaluator, Evaluator]:
+    """Compile one AST node into (scalar, vector) evaluators"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ExpressionError(f"Unsupported literal: {value!r}")
+        # The vector path works in float64: a Python int constant would make NumPy
+        # pick int64, which wraps silently (2**64) or rejects negative powers (2**-1)
+        try:
+            vector_value = float(value)
+        except OverflowError:
+            vector_value = math.inf
+        if np is not None:
+            vector_value = np.float64(vector_value)
+        return (lambda env: value), (lambda env: vector_value)
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        variables.add(name)
+        return (lambda env: env[name]), (lambda env: env[name])
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        op = _UNARY_OPERATORS[type(node.op)]
+        scalar, vector = _compile_node(node.operand, variables)
+        return (lambda env: op(scalar(env))), (lambda env: op(vector(env)))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left_scalar, left_vector = _compile_node(node.left, variables)
+        right_scalar, right_vector = _compile_node(node.right, variables)
+        if isinstance(node.op, ast.Pow):
+            return (
+                lambda env: _guarded_pow(left_scalar(env), right_scalar(env)),
+                lambda env: _guarded_pow_array(left_vector(env), right_vector(env)),
+            )
+        op = _BINARY_OPERATORS[type(node.op)]
+        return (
+            lambda env: _check_int(op(left_scalar(env), right_scalar(env))),
+            lambda env: op(left_vector(env), right_vector(env)),
+        )
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Parse, validate and compile an expression (results are cached)
+
+    Args:
+        expression: Arithmetic expression, e.g. "(2 + 3) * x ** 2"
+
+    Returns:
+        The compiled expression
+
+    Raises:
+        ExpressionError: If the expression is too long, malformed or uses unsupported syntax
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        raise ExpressionError("Invalid expression syntax")
+
+    node_count = sum(1 for _ in ast.walk(tree))
+    if node_count > MAX_AST_NODES:
+        raise ExpressionError(f"Expression too complex ({node_count} nodes, limit {MAX_AST_NODES})")
+
+    variables: set = set()
+    scalar, vector = _compile_node(tree.body, variables)
+    logger.debug(f"Compiled expression: {expression}")
+    return CompiledExpression(expression, scalar, vector, tuple(sorted(variables)))
+
+
+def evaluate_expression(expression: str, bindings: Optional[Dict[str, float]] = None) -> Any:
+    """Compile (cached) and evaluate an expression for one set of variable values"""
+    return compile_expression(expression).evaluate(bindings)
@@ -0,0 +1,144 @@
+"""
+Shared Event Flight Recorder
+
+This module keeps the most recent ADK events in a bounded in-memory ring
+buffer, instead of serializing every event into the log as it happens.
+Recording an event only appends a reference (plus a sequence number, a
+timestamp and the invocation id) to a deque; nothing is serialized.
+
+Events are serialized only when a trace is dumped, e.g. when an invocation
+fails or a developer asks for it. The dump holds one compact JSON object per
+line, optionally only one invocation's events. Each event is encoded by
+pydantic-core's Rust serializer and embedded as is, never parsed and
+re-encoded.
+
+Events are kept by reference, so a dump shows them as they are at dump time.
+The ring buffer bounds the number of events, not their size.
+"""
+
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+
+logger = logging.getLogger(__name__)
+
+# (sequence, wall time, invocation_id, tag, event)
+_Record = Tuple[int, float, str, Optional[str], Event]
+
+
+class FlightRecorder:
+    """
+    Bounded ring buffer of recent events, serialized lazily
+
+    Usage:
+        flight_recorder = FlightRecorder(capacity=2048)
+        async for event in sub_agent.run_async(ctx):
+            flight_recorder.record(event, tag="RefundChecks")
+            yield event
+        ...
+        except Exception:
+            logger.error(flight_recorder.dump(ctx.invocation_id))
+            raise
+    """
+
+    def __init__(self, capacity: int = 2048):
+        """
+        Args:
+            capacity: Number of most recent events kept (older ones are dropped)
+        """
+        if capacity <= 0:
+            raise ValueError("FlightRecorder capacity must be positive")
+        self.capacity = capacity
+        self._buffer: Deque[_Record] = deque(maxlen=capacity)
+        self._sequence = itertools.count()
+        self.recorded = 0
+        self.dropped = 0
+        self.dumps = 0
+        self.serialized_events = 0
+
+    def record(self, event: Event, tag: Optional[str] = None) -> None:
+        """
+        Keep a reference to an event; O(1), no serialization
+
+        Args:
+            event: The event
+            tag: Optional label, e.g. the workflow step that produced it
+        """
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append((next(self._sequence), time.time(), event.invocation_id, tag, event))
+        self.recorded += 1
+
+    def _records(self, invocation_id: Optional[str]) -> List[_Record]:
+        # list(deque) runs without releasing the GIL, so it's a consistent snapshot
+        records = list(self._buffer)
+        if invocation_id is None:
+            return records
+        return [record for record in records if record[2] == invocation_id]
+
+    def events(self, invocation_id: Optional[str] = None) -> List[Event]:
+        """Return the retained events, oldest first, optionally of one invocation"""
+        return [record[4] for record in self._records(invocation_id)]
+
+    def dump(self, invocation_id: Optional[str] = None, limit: Optional[int] = None) -> str:
+        """
+        Serialize retained events as JSONL
+
+        Args:
+            invocation_id: Only this invocation's events (all events if None)
+            limit: Only the most recent `limit` events
+
+        Returns:
+            One {"seq", "time", "invocation_id", "tag", "event"} object per line
+        """
+        records = self._records(invocation_id)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        lines = []
+        for sequence, timestamp, record_invocation_id, tag, event in records:
+            # The event's JSON comes from pydantic-core and is spliced in without re-parsing
+            event_json = event.model_dump_json(exclude_none=True)
+            header = json.dumps(
+                {"seq": sequence, "time": round(timestamp, 6), "invocation_id": record_invocation_id, "tag": tag},
+                separators=(",", ":"),
+            )
+            lines.append(f'{header[:-1]},"event":{event_json}}}')
+        self.dumps += 1
+        self.serialized_events += len(lines)
+        return "\n".join(lines)
+
+    def dump_to(self, path: str, invocation_id: Optional[str] = None) -> int:
+        """
+        Write a dump to a file
+
+        Returns:
+            Number of events written
+        """
+        text = self.dump(invocation_id)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n" if text else "")
+        return text.count("\n") + 1 if text else 0
+
+    def clear(self) -> None:
+        """Drop all retained events"""
+        self._buffer.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return buffer usage and how many events have been serialized"""
+        return {
+            "capacity": self.capacity,
+            "retained": len(self._buffer),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "dumps": self.dumps,
+            "serialized_events": self.serialized_events,
+        }
+
+
+# Default recorder shared by the examples
+flight_recorder = FlightRecorder()
@@ -0,0 +1,423 @@
+"""
+Shared Guardrail Engine for Callback Examples
+
+This module provides a compiled multi-pattern matcher (Aho-Corasick automaton)
+used by the content filter guardrails. The automaton is built once from a term
+list and scans text in a single linear pass, so filtering cost stays flat as
+the term list grows to thousands of entries.
+
+It also provides an incremental output guardrail for after_model_callback that
+keeps automaton state across streamed chunks.
+
+Matching is substring matching by default. With whole_words, a match only
+counts when the term isn't part of a longer word, so "hate" no longer
+matches "chateau".
+"""
+
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Terms flagged by the content safety tool and blocked by the content filter
+DEFAULT_BLOCKED_TERMS = [
+    "violence", "hate", "harassment", "illegal", "dangerous",
+    "inappropriate", "offensive", "harmful", "toxic"
+]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def is_whole_word(term: str, before: str, after: str) -> bool:
+    """
+    Whether a match of term stands alone (not preceded or followed by a word character)
+
+    Args:
+        term: The matched term
+        before: Character before the match ("" at the start of the text)
+        after: Character after the match ("" at the end of the text)
+    """
+    if before and _is_word_char(term[0]) and _is_word_char(before):
+        return False
+    if after and _is_word_char(term[-1]) and _is_word_char(after):
+        return False
+    return True
+
+
+def load_terms(path: str) -> List[str]:
+    """
+    Load a term list from a text file (one term per line, '#' starts a comment)
+
+    Args:
+        path: Path to the term list file
+
+    Returns:
+        List of non-empty terms
+    """
+    terms = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            term = line.split("#", 1)[0].strip()
+            if term:
+                terms.append(term)
+    logger.info(f"Loaded {len(terms)} guardrail terms from {path}")
+    return terms
+
+
+class GuardrailAutomaton:
+    """
+    Aho-Corasick automaton compiled once from a list of terms
+
+    Matching is case-insensitive substring matching, the same semantics as
+    `term in text.lower()`, but every term is found in one pass over the text.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms: List[str] = []
+        # State 0 is the root. _goto[state] maps a character to the next state,
+        # _fail[state] is the failure link and _output[state] holds the indexes
+        # of every term ending at this state (including via failure links).
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        seen = set()
+        for term in terms:
+            normalized = term.strip().lower()
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                self._add_term(normalized)
+        self._build_failure_links()
+        self.max_term_length = max((len(term) for term in self.terms), default=0)
+        logger.info(f"Guardrail automaton compiled: {len(self.terms)} terms, {len(self._goto)} states")
+
+    def _add_term(self, term: str) -> None:
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = self._output[state] + (len(self.terms),)
+        self.terms.append(term)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def scan_from(
+        self, state: int, text: str, offset: int = 0
+    ) -> Tuple[int, List[Tuple[int, int, str]]]:
+        """
+        Continue a scan from a saved automaton state
+
+        This is the primitive behind both whole-text and streaming scans: the
+        returned state can be passed back in with the next chunk, so a term
+        split across chunks is still found.
+
+        Args:
+            state: Automaton state returned by the previous call (0 to start)
+            text: Next piece of text
+            offset: Absolute position of text[0] in the overall stream
+
+        Returns:
+            (new_state, matches) where matches are (start, end, term) tuples
+            with absolute offsets into the lowercased stream
+        """
+        matches = []
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        for index, char in enumerate(text.lower(), offset):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for term_index in output[state]:
+                    term = self.terms[term_index]
+                    matches.append((index - len(term) + 1, index + 1, term))
+        return state, matches
+
+    def find_all(self, text: str, whole_words: bool = False) -> List[Tuple[int, int, str]]:
+        """
+        Find every term occurrence in the text
+
+        Args:
+            text: Text to scan
+            whole_words: Skip matches that are part of a longer word
+
+        Returns:
+            List of (start, end, term) tuples in the order the matches end.
+            Offsets refer to the lowercased text.
+        """
+        matches = self.scan_from(0, text)[1]
+        if whole_words:
+            lowered = text.lower()
+            matches = [
+                (start, end, term) for start, end, term in matches
+                if is_whole_word(term, lowered[start - 1:start], lowered[end:end + 1])
+            ]
+        return matches
+
+    def matched_terms(self, text: str, whole_words: bool = False) -> List[str]:
+        """Return the distinct terms found in the text, in order of first match"""
+        return list(dict.fromkeys(term for _, _, term in self.find_all(text, whole_words)))
+
+    def scan_parts(self, texts: Iterable[Optional[str]]) -> List[str]:
+        """
+        Scan several text parts (e.g. every text part of a Content) in one pass
+
+        The automaton restarts at each part boundary, so a match never spans
+        two parts.
+        """
+        found: Dict[str, None] = {}
+        for text in texts:
+            if text:
+                for _, _, term in self.find_all(text):
+                    found.setdefault(term)
+        return list(found)
+
+    def score_batch(self, texts: Iterable[str]) -> List[Dict]:
+        """
+        Score many messages with the same compiled automaton
+
+        Args:
+            texts: Messages to score
+
+        Returns:
+            One dict per message with keys: flagged, matched_terms, match_count
+        """
+        results = []
+        for text in texts:
+            matches = self.find_all(text or "")
+            results.append({
+                "flagged": bool(matches),
+                "matched_terms": list(dict.fromkeys(term for _, _, term in matches)),
+                "match_count": len(matches),
+            })
+        return results
+
+
+def content_text_parts(content) -> List[str]:
+    """Return the text of every part of a google.genai types.Content"""
+    if content is None or not content.parts:
+        return []
+    return [part.text for part in content.parts if part.text]
+
+
+def redact_spans(text: str, spans: Iterable[Tuple[int, int, str]], offset: int = 0, mask: str = "*") -> str:
+    """
+    Mask the parts of text covered by match spans
+
+    Args:
+        text: Text to redact
+        spans: (start, end, term) matches with absolute offsets
+        offset: Absolute position of text[0]
+        mask: Character used to mask matched characters
+
+    Returns:
+        The redacted text (spans outside this text are ignored)
+    """
+    chars = None
+    for start, end, _ in spans:
+        start = max(start - offset, 0)
+        end = min(end - offset, len(text))
+        if start >= end:
+            continue
+        if chars is None:
+            chars = list(text)
+        chars[start:end] = mask * (end - start)
+    return text if chars is None else "".join(chars)
+
+
+class StreamScan:
+    """Automaton state for one streamed model response"""
+
+    def __init__(self):
+        self.state = 0
+        self.offset = 0
+        self.matches: List[Tuple[int, int, str]] = []
+        # Absolute offset where the stream was cut in "stop" mode
+        self.stopped_at: Optional[int] = None
+        # whole_words: the last characters scanned, and matches that ended the
+        # previous chunk (the next chunk's first character decides them)
+        self.tail = ""
+        self.provisional: List[Tuple[int, int, str]] = []
+
+
+class StreamingOutputGuardrail:
+    """
+    Output guardrail for after_model_callback that scans streamed chunks incrementally
+
+    Automaton state is kept per invocation across partial responses, so each
+    chunk costs O(len(chunk)) and a term split across chunks is still caught
+    as soon as its last character arrives. Two modes are supported:
+
+    - "redact": mask matched characters in the chunk being emitted
+    - "stop": cut the stream at the match and replace the rest with a notice
+
+    Characters of a term already emitted in earlier chunks cannot be recalled,
+    but the aggregated final response (the one saved to the session) is always
+    fully redacted or cut.
+
+    With whole_words, a term inside a longer word ("hate" in "chateau") is not
+    a match. A term that ends exactly at the end of a chunk is treated as a
+    whole word for that chunk. The next chunk's first character then decides
+    it for the final response, but a "stop" already made stands.
+
+    Session state flags: "output_filter_enabled" (default True) and
+    "output_filter_mode" (overrides the default mode).
+    """
+
+    def __init__(
+        self,
+        automaton: GuardrailAutomaton,
+        mode: str = "redact",
+        stop_message: str = "\n\n🛡️ [Response stopped by the output safety filter]",
+        max_streams: int = 1024,
+        whole_words: bool = False,
+    ):
+        if mode not in ("redact", "stop"):
+            raise ValueError(f"Unsupported output guardrail mode: {mode}")
+        self.automaton = automaton
+        self.mode = mode
+        self.whole_words = whole_words
+        self.stop_message = stop_message
+        self.max_streams = max_streams
+        self._streams: "OrderedDict[str, StreamScan]" = OrderedDict()
+
+    def _get_stream(self, invocation_id: str) -> StreamScan:
+        stream = self._streams.get(invocation_id)
+        if stream is None:
+            stream = StreamScan()
+            self._streams[invocation_id] = stream
+            # Drop the oldest streams if invocations ended without a final response
+            while len(self._streams) > self.max_streams:
+                self._streams.popitem(last=False)
+        return stream
+
+    def _filter_chunk(self, stream: StreamScan, text: str, mode: str) -> str:
+        """Scan one streamed chunk and return the text that may be emitted"""
+        if stream.stopped_at is not None:
+            stream.offset += len(text)
+            return ""
+
+        chunk_offset = stream.offset
+        stream.state, matches = self.automaton.scan_from(stream.state, text, chunk_offset)
+        stream.offset += len(text)
+        if self.whole_words and text:
+            matches = self._whole_word_matches(stream, text, chunk_offset, matches)
+        if not matches:
+            return text
+
+        stream.matches.extend(matches)
+        logger.warning(f"Output guardrail matched: {[term for _, _, term in matches]}")
+        if mode == "stop":
+            stream.stopped_at = max(min(start for start, _, _ in matches), chunk_offset)
+            return text[:stream.stopped_at - chunk_offset] + self.stop_message
+        return redact_spans(text, matches, chunk_offset)
+
+    def _whole_word_matches(
+        self, stream: StreamScan, text: str, chunk_offset: int, matches: List[Tuple[int, int, str]]
+    ) -> List[Tuple[int, int, str]]:
+        """Keep the matches that aren't part of a longer word, and settle the previous chunk's"""
+        lowered = text.lower()
+        if stream.provisional and _is_word_char(lowered[0]):
+            dropped = set(stream.provisional)
+            stream.matches = [match for match in stream.matches if match not in dropped]
+        stream.provisional = []
+
+        # A match can start in an earlier chunk, so keep enough of the stream to look behind it
+        context = stream.tail + lowered
+        context_offset = chunk_offset - len(stream.tail)
+        kept = []
+        for start, end, term in matches:
+            before = context[start - context_offset - 1] if start > context_offset else ""
+            after = lowered[end - chunk_offset] if end - chunk_offset < len(lowered) else ""
+            if is_whole_word(term, before, after):
+                kept.append((start, end, term))
+                if not after and _is_word_char(term[-1]):
+                    stream.provisional.append((start, end, term))
+        stream.tail = context[-(self.automaton.max_term_length + 1):]
+        return kept
+
+    def _filter_final(self, stream: StreamScan, text: str, offset: int) -> str:
+        """
+        Filter one text part of the aggregated final response of a stream
+
+        The matches recorded chunk by chunk are reused, so the final text is
+        not scanned again.
+        """
+        if stream.stopped_at is not None:
+            if stream.stopped_at < offset:
+                return ""
+            if stream.stopped_at < offset + len(text):
+                return text[:stream.stopped_at - offset] + self.stop_message
+            return text
+        return redact_spans(text, stream.matches, offset)
+
+    def __call__(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        state = callback_context.state
+        if not state.get("output_filter_enabled", True):
+            return None
+
+        content = llm_response.content
+        if content is None or not content.parts:
+            if not llm_response.partial:
+                self._streams.pop(callback_context.invocation_id, None)
+            return None
+
+        mode = state.get("output_filter_mode", self.mode)
+        stream = self._get_stream(callback_context.invocation_id)
+        # A final response preceded by partial chunks carries the aggregated text
+        aggregated = not llm_response.partial and stream.offset > 0
+
+        changed = False
+        new_parts = []
+        final_offset = 0
+        for part in content.parts:
+            if part.text is None or part.thought:
+                new_parts.append(part)
+                continue
+            if aggregated:
+                filtered = self._filter_final(stream, part.text, final_offset)
+                final_offset += len(part.text)
+            else:
+                filtered = self._filter_chunk(stream, part.text, mode)
+            if filtered != part.text:
+                changed = True
+                part = part.model_copy(update={"text": filtered})
+            new_parts.append(part)
+
+        if not llm_response.partial:
+            # The model call is finished; the next call in this invocation starts fresh
+            self._streams.pop(callback_context.invocation_id, None)
+
+        if not changed:
+            return None
+        return llm_response.model_copy(
+            update={"content": types.Content(role=content.role, parts=new_parts)}
+        )
@@ -0,0 +1,307 @@
+"""
+Shared LLM Response Cache for Model Callbacks
+
+This module caches model responses through a before_model_callback /
+after_model_callback pair:
+
+- before_model_callback canonicalizes the LlmRequest (model, system
+  instruction, contents, tool declarations and generation config), hashes it
+  and returns the stored response on a hit, skipping the model call
+- after_model_callback stores the final response of a model call that missed
+
+Volatile fields (function call ids, thought signatures) are dropped before
+hashing, so the same conversation always produces the same key. An optional
+near-duplicate tier serves a response when everything but the user's
+message is identical and the message's normalized text shingles are
+similar enough ("Will I be lucky today?" vs "will i be lucky today").
+
+The cache is a bounded LRU (entries and bytes) with a TTL. Agents can be
+excluded when the cache is created, and a session opts out by setting
+llm_cache_enabled to False in its state.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+logger = logging.getLogger(__name__)
+
+# Request keys recorded by before_model for after_model (invocation-scoped state)
+PENDING_STATE_KEY = "temp:llm_response_cache_pending"
+# Session state flag; set to False to bypass the cache for a session
+ENABLED_STATE_KEY = "llm_cache_enabled"
+
+# Part fields that change between otherwise identical requests; removed only
+# at these paths, since tool arguments and payloads may have their own "id"
+_VOLATILE_PART_KEYS = ("thought_signature",)
+_VOLATILE_CALL_KEYS = ("function_call", "function_response")
+# Config fields that don't affect the model's answer
+_IGNORED_CONFIG_KEYS = {"http_options", "labels"}
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+
+
+def _strip_volatile(payload: Dict[str, Any]) -> None:
+    """Drop parts[].thought_signature and parts[].function_call/function_response.id, in place"""
+    for content in payload.get("contents") or []:
+        for part in content.get("parts") or []:
+            for key in _VOLATILE_PART_KEYS:
+                part.pop(key, None)
+            for key in _VOLATILE_CALL_KEYS:
+                if isinstance(part.get(key), dict):
+                    part[key].pop("id", None)
+
+
+def _digest(payload: Any) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def _shingles(text: str, size: int = 4) -> FrozenSet[int]:
+    padded = f" {text} "
+    if len(padded) <= size:
+        return frozenset([zlib.crc32(padded.encode("utf-8"))])
+    return frozenset(zlib.crc32(padded[i:i + size].encode("utf-8")) for i in range(len(padded) - size + 1))
+
+
+def canonicalize_request(llm_request: LlmRequest) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Build the cache keys of a request
+
+    Returns:
+        (exact_key, context_key, prompt) where context_key hashes everything
+        but the trailing user message and prompt is that message's normalized
+        text (both None when the request doesn't end with a user text message),
+        or None if the request can't be serialized
+    """
+    try:
+        payload = llm_request.model_dump(mode="json", include={"model", "contents", "config"}, exclude_none=True)
+    except Exception as e:  # e.g. a response_schema given as a Python type
+        logger.debug(f"LLM cache skipped an unserializable request: {e}")
+        return None
+    _strip_volatile(payload)
+    for key in _IGNORED_CONFIG_KEYS:
+        payload.get("config", {}).pop(key, None)
+    exact_key = _digest(payload)
+
+    contents = payload.get("contents") or []
+    last = contents[-1] if contents else None
+    parts = last.get("parts") if last else None
+    if not last or last.get("role") != "user" or not parts or len(parts) != 1 or set(parts[0]) != {"text"}:
+        return exact_key, None, None
+    context_key = _digest({**payload, "contents": contents[:-1]})
+    return exact_key, context_key, _normalize_text(parts[0]["text"])
+
+
+class _Entry:
+    __slots__ = ("key", "context_key", "shingles", "response", "size", "expires_at", "latency_ms")
+
+    def __init__(self, key, context_key, shingles, response, size, expires_at, latency_ms):
+        self.key = key
+        self.context_key = context_key
+        self.shingles = shingles
+        self.response = response
+        self.size = size
+        self.expires_at = expires_at
+        self.latency_ms = latency_ms
+
+
+class LlmResponseCache:
+    """
+    Bounded, TTL'd cache of model responses keyed on the canonicalized request
+
+    Usage:
+        llm_cache = LlmResponseCache(ttl_seconds=600, near_duplicate_threshold=0.85)
+        agent = LlmAgent(
+            ...,
+            before_model_callback=llm_cache.before_model_callback,
+            after_model_callback=llm_cache.after_model_callback,
+        )
+        print(llm_cache.stats())
+
+    Put llm_cache.before_model_callback last in a before_model_callback list,
+    so guardrails still see every request.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 512,
+        max_bytes: int = 4_000_000,
+        near_duplicate_threshold: Optional[float] = None,
+        exclude_agents: Iterable[str] = (),
+    ):
+        """
+        Args:
+            ttl_seconds: How long a stored response is served
+            max_entries: Maximum number of stored responses (least recently used evicted)
+            max_bytes: Maximum total size of the stored responses (serialized JSON)
+            near_duplicate_threshold: Minimum shingle Jaccard similarity of the user
+                message for a near-duplicate hit; None serves exact hits only
+            exclude_agents: Names of agents whose model calls are never cached
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.exclude_agents = frozenset(exclude_agents)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # context_key -> exact keys sharing that context (near-duplicate candidates)
+        self._contexts: Dict[str, set] = {}
+        self.total_bytes = 0
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.latency_saved_ms = 0.0
+
+    def _enabled(self, callback_context: CallbackContext) -> bool:
+        if callback_context.agent_name in self.exclude_agents:
+            return False
+        return bool(callback_context.state.get(ENABLED_STATE_KEY, True))
+
+    # --- Storage ---
+
+    def _store(
+        self, key: str, context_key: Optional[str], prompt: Optional[str], response: Dict[str, Any], latency_ms: float
+    ) -> None:
+        if key in self._entries:
+            self._remove(key)
+        size = len(json.dumps(response, ensure_ascii=False, default=str))
+        if size > self.max_bytes:
+            return
+        shingles = _shingles(prompt) if prompt is not None and self.near_duplicate_threshold is not None else None
+        entry = _Entry(key, context_key, shingles, response, size, time.monotonic() + self.ttl_seconds, latency_ms)
+        self._entries[key] = entry
+        self.total_bytes += size
+        if shingles is not None:
+            self._contexts.setdefault(context_key, set()).add(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+        if entry.shingles is not None:
+            keys = self._contexts.get(entry.context_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._contexts[entry.context_key]
+
+    def _live(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _lookup(self, key: str, context_key: Optional[str], prompt: Optional[str]) -> Optional[Tuple[_Entry, str, float]]:
+        now = time.monotonic()
+        entry = self._live(key, now)
+        if entry is not None:
+            return entry, "exact", 1.0
+        if self.near_duplicate_threshold is None or prompt is None or context_key not in self._contexts:
+            return None
+
+        shingles = _shingles(prompt)
+        best, best_similarity = None, 0.0
+        for candidate_key in list(self._contexts[context_key]):
+            candidate = self._live(candidate_key, now)
+            if candidate is None:
+                continue
+            similarity = len(shingles & candidate.shingles) / len(shingles | candidate.shingles)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= self.near_duplicate_threshold:
+            return best, "near", best_similarity
+        return None
+
+    def clear(self) -> None:
+        """Drop every stored response"""
+        self._entries.clear()
+        self._contexts.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lookup counters, hit rate, memory use and model latency saved"""
+        hits = self.exact_hits + self.near_hits
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "latency_saved_ms": round(self.latency_saved_ms, 1),
+        }
+
+    # --- Callbacks ---
+
+    def before_model_callback(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """Serve a stored response for an identical (or near-duplicate) request"""
+        state = callback_context.state
+        if state.get(PENDING_STATE_KEY):
+            state[PENDING_STATE_KEY] = None
+        if not self._enabled(callback_context):
+            return None
+        keys = canonicalize_request(llm_request)
+        if keys is None:
+            return None
+
+        key, context_key, prompt = keys
+        self.lookups += 1
+        hit = self._lookup(key, context_key, prompt)
+        if hit is None:
+            state[PENDING_STATE_KEY] = {
+                "key": key,
+                "context_key": context_key,
+                "prompt": prompt,
+                "started": time.perf_counter(),
+            }
+            return None
+
+        entry, match, similarity = hit
+        if match == "exact":
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+        self.latency_saved_ms += entry.latency_ms
+        self._entries.move_to_end(entry.key)
+        print(f"[💾 LLM Cache] {match} hit ({similarity:.2f}) for {callback_context.agent_name}, skipping the model call")
+        # A fresh object per hit, so later processing can't modify the stored copy
+        return LlmResponse.model_validate(entry.response)
+
+    def after_model_callback(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """Store the final response of a request that missed the cache"""
+        state = callback_context.state
+        pending = state.get(PENDING_STATE_KEY)
+        if not pending or llm_response.partial:
+            return None
+        state[PENDING_STATE_KEY] = None
+        if llm_response.error_code or not llm_response.content or not llm_response.content.parts:
+            return None
+
+        latency_ms = (time.perf_counter() - pending["started"]) * 1000
+        response = llm_response.model_dump(mode="json", exclude_none=True, exclude={"usage_metadata"})
+        self._store(pending["key"], pending["context_key"], pending["prompt"], response, latency_ms)
+        logger.info(f"LLM cache stored a response for {callback_context.agent_name} ({latency_ms:.0f} ms)")
+        return None
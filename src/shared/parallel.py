@@ -0,0 +1,207 @@
+"""
+Shared Deadline-Aware Parallel Agent
+
+DeadlineParallelAgent is a drop-in ParallelAgent that bounds how long one
+slow branch can hold up the workflow:
+
+- per-branch deadlines: a branch still running at its deadline is cancelled
+- fail-fast: optionally, the first branch that times out or fails cancels
+  its siblings
+- fallbacks: state values written for a branch that didn't finish, so later
+  prompts with {placeholders} still render (they should say the value is
+  unavailable, not stand in for a decision the branch never made)
+- metrics: per-branch latency histograms and outcome counters
+
+Branches run concurrently in isolated branches, like ParallelAgent, and each
+of their events is handled before the branch continues. At the end the agent
+emits one event recording every branch's status and latency in state.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+from google.adk.agents import ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.parallel_agent import _create_branch_ctx_for_sub_agent
+from google.adk.events import Event, EventActions
+from pydantic import Field
+from typing_extensions import override
+
+from .profiling import STAGE_BUCKETS, LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+BRANCH_OUTCOMES = ("ok", "timeout", "error", "cancelled")
+
+
+class BranchMetrics:
+    """
+    Latency histograms and outcome counters per (parallel agent, branch)
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._outcomes: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def observe(self, agent_name: str, branch: str, seconds: float, outcome: str) -> None:
+        key = (agent_name, branch)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram(STAGE_BUCKETS)
+            self._outcomes[key] = dict.fromkeys(BRANCH_OUTCOMES, 0)
+        histogram.observe(seconds)
+        self._outcomes[key][outcome] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return per-branch latency quantiles and outcome counts
+
+        Returns:
+            {"ParallelAgent.Branch": {"count", "p50_ms", "p95_ms", "p99_ms",
+             "max_ms", "mean_ms", "ok", "timeout", "error", "cancelled",
+             "buckets": [(le_seconds, cumulative_count), ...]}}
+        """
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        result = {}
+        for (agent_name, branch), histogram in sorted(self._histograms.items()):
+            result[f"{agent_name}.{branch}"] = {
+                "count": histogram.count,
+                "p50_ms": ms(histogram.quantile(0.5)),
+                "p95_ms": ms(histogram.quantile(0.95)),
+                "p99_ms": ms(histogram.quantile(0.99)),
+                "max_ms": ms(histogram.max_seconds),
+                "mean_ms": ms(histogram.total_seconds / histogram.count),
+                **self._outcomes[(agent_name, branch)],
+                "buckets": histogram.cumulative_buckets(),
+            }
+        return result
+
+    def reset(self) -> None:
+        """Drop all recorded histograms"""
+        self._histograms.clear()
+        self._outcomes.clear()
+
+
+# Default registry shared by every DeadlineParallelAgent
+branch_metrics = BranchMetrics()
+
+
+class DeadlineParallelAgent(ParallelAgent):
+    """
+    ParallelAgent with per-branch deadlines, fail-fast cancellation and latency metrics
+
+    Usage:
+        verifier_agent = DeadlineParallelAgent(
+            name="VerifierAgent",
+            sub_agents=[purchase_verifier_agent, refund_eligibility_agent],
+            branch_timeouts={"RefundEligibilityAgent": 8.0},
+            default_timeout=15.0,
+            fail_fast=True,
+            fallback_state={"PurchaseVerifierAgent": {"purchase_history": "unavailable"}},
+        )
+        print(branch_metrics.stats())
+
+    state[status_key] becomes {branch: {"status": "ok"|"timeout"|"error"|"cancelled",
+    "ms": latency, "error": message}}. Errors and timeouts are recorded, not
+    raised, so the rest of the workflow can decide what to do.
+    """
+
+    branch_timeouts: Dict[str, float] = Field(default_factory=dict)
+    default_timeout: Optional[float] = None
+    fail_fast: bool = False
+    fallback_state: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    status_key: str = "parallel_branches"
+    metrics: BranchMetrics = Field(default_factory=lambda: branch_metrics, exclude=True)
+
+    # model_config allows setting Pydantic configurations if needed
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _timeout(self, branch: str) -> Optional[float]:
+        return self.branch_timeouts.get(branch, self.default_timeout)
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+
+        # (branch, event, resume signal) for events; (branch, None, outcome) when a branch ends
+        queue: asyncio.Queue = asyncio.Queue()
+        outcomes: Dict[str, Dict[str, Any]] = {}
+
+        async def run_branch(sub_agent) -> None:
+            branch_ctx = _create_branch_ctx_for_sub_agent(self, sub_agent, ctx)
+            started = time.perf_counter()
+            outcome: Dict[str, Any] = {"status": "ok"}
+            events = sub_agent.run_async(branch_ctx)
+            try:
+                async with asyncio.timeout(self._timeout(sub_agent.name)):
+                    async for event in events:
+                        resume = asyncio.Event()
+                        await queue.put((sub_agent.name, event, resume))
+                        # Wait until the event is handled before the branch continues
+                        await resume.wait()
+            except TimeoutError:
+                outcome = {"status": "timeout"}
+            except asyncio.CancelledError:
+                outcome = {"status": "cancelled"}
+            except Exception as e:
+                logger.warning(f"[{self.name}] Branch {sub_agent.name} failed: {e}")
+                outcome = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            finally:
+                await events.aclose()
+                outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+                self.metrics.observe(self.name, sub_agent.name, outcome["ms"] / 1000, outcome["status"])
+                queue.put_nowait((sub_agent.name, None, outcome))
+
+        tasks = {
+            sub_agent.name: asyncio.get_running_loop().create_task(run_branch(sub_agent))
+            for sub_agent in self.sub_agents
+        }
+
+        def cancel_pending() -> None:
+            for name, task in tasks.items():
+                if name not in outcomes:
+                    task.cancel()
+
+        try:
+            while len(outcomes) < len(tasks):
+                branch, event, payload = await queue.get()
+                if event is None:
+                    outcomes[branch] = payload
+                    if payload["status"] != "ok" and payload["status"] != "cancelled":
+                        print(f"[⏱️ {self.name}] Branch {branch}: {payload['status']} after {payload['ms']:.0f} ms")
+                        if self.fail_fast:
+                            cancel_pending()
+                    continue
+                yield event
+                payload.set()
+                if event.actions and event.actions.escalate:
+                    cancel_pending()
+        finally:
+            # Also reached when our consumer stops early
+            cancel_pending()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            while not queue.empty():
+                branch, event, payload = queue.get_nowait()
+                if event is None:
+                    outcomes.setdefault(branch, payload)
+
+        state_delta: Dict[str, Any] = {self.status_key: outcomes}
+        for branch, outcome in outcomes.items():
+            if outcome["status"] == "ok":
+                continue
+            for key, value in self.fallback_state.get(branch, {}).items():
+                if key not in ctx.session.state:
+                    state_delta[key] = value
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
@@ -0,0 +1,180 @@
+"""
+Shared Code Patching Helpers
+
+Helpers for agents that edit code by emitting unified diffs instead of
+re-emitting whole files, so output tokens scale with the size of the change:
+
+- extract_code_block pulls the code out of a fenced ```python block
+- apply_unified_diff applies a model-written diff to the original code
+
+Model-written diffs often have wrong @@ line numbers, so each hunk is located
+by its context and removed lines (trailing whitespace ignored), searching
+outward from the position the header claims. A hunk that can't be found
+raises PatchError rather than being applied in the wrong place.
+"""
+
+import logging
+import re
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_FENCE = re.compile(r"```[ \t]*(?P<language>[\w+-]*)[ \t]*\n(?P<body>.*?)```", re.DOTALL)
+_HUNK_HEADER = re.compile(r"^@@ -(?P<old_start>\d+)(?:,(?P<old_count>\d+))? \+\d+(?:,(?P<new_count>\d+))? @@")
+_FILE_HEADERS = ("--- ", "+++ ", "diff ", "index ")
+# Lines that start the next file's headers once a hunk is complete
+_NEXT_FILE = ("--- ", "+++ ", "diff ")
+
+
+class PatchError(ValueError):
+    """Raised when a diff is malformed or doesn't match the original code"""
+
+
+def extract_fenced_block(text: str, languages: Tuple[str, ...]) -> Optional[str]:
+    """Return the body of the first fenced block tagged with one of the languages, or None"""
+    for match in _FENCE.finditer(text or ""):
+        if match.group("language").lower() in languages:
+            return match.group("body")
+    return None
+
+
+def extract_code_block(text: str, language: str = "python") -> str:
+    """
+    Return the code of a model response
+
+    Args:
+        text: Model output, usually a single fenced code block
+        language: Preferred fence language
+
+    Returns:
+        The body of the first ```language block, else of the first fenced
+        block, else the text itself (stripped)
+    """
+    body = extract_fenced_block(text, (language,))
+    if body is None:
+        match = _FENCE.search(text or "")
+        body = match.group("body") if match else (text or "")
+    return body.strip("\n") + "\n" if body.strip() else ""
+
+
+class _Hunk:
+    __slots__ = ("old_start", "old_lines", "new_lines")
+
+    def __init__(self, old_start: int):
+        self.old_start = old_start
+        self.old_lines: List[str] = []
+        self.new_lines: List[str] = []
+
+
+def parse_unified_diff(diff_text: str) -> List[_Hunk]:
+    """
+    Parse the hunks of a single-file unified diff
+
+    A hunk's body is as long as its header's line counts say, so a removed
+    "-- x" or an added "++ x" line isn't mistaken for a file header. File
+    headers are only recognized once those counts are used up. A new @@ header
+    always starts a new hunk, and body lines past the counts still belong to
+    the current hunk, since model-written counts are often wrong. Blank lines
+    past the counts are only kept if more body lines follow, so the blank line
+    a model leaves before the closing fence isn't read as context.
+
+    Raises:
+        PatchError: If the diff has no hunks or a line outside any hunk
+    """
+    hunks: List[_Hunk] = []
+    current: Optional[_Hunk] = None
+    old_remaining = new_remaining = 0
+    held_blanks = 0  # Blank lines past the counts, added once a body line follows
+    for line in diff_text.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            held_blanks = 0
+            current = _Hunk(int(header.group("old_start")))
+            hunks.append(current)
+            old_remaining = int(header.group("old_count") or 1)
+            new_remaining = int(header.group("new_count") or 1)
+            continue
+        if current is None:
+            if line.startswith(_FILE_HEADERS) or not line.strip():
+                continue
+            raise PatchError(f"Unexpected line before the first hunk: {line!r}")
+        if line.startswith("\\"):  # "\ No newline at end of file"
+            continue
+        if old_remaining <= 0 and new_remaining <= 0:
+            if line.startswith(_NEXT_FILE):
+                current = None  # A second file; only single-file diffs are applied
+                held_blanks = 0
+                continue
+            if not line.strip():
+                held_blanks += 1
+                continue
+            for _ in range(held_blanks):
+                current.old_lines.append("")
+                current.new_lines.append("")
+            held_blanks = 0
+        marker, content = (line[0], line[1:]) if line else (" ", "")
+        if marker == "-":
+            current.old_lines.append(content)
+            old_remaining -= 1
+            continue
+        if marker == "+":
+            current.new_lines.append(content)
+            new_remaining -= 1
+            continue
+        if marker != " ":
+            content = line  # Models sometimes drop the leading space of a context line
+        current.old_lines.append(content)
+        current.new_lines.append(content)
+        old_remaining -= 1
+        new_remaining -= 1
+    if not hunks:
+        raise PatchError("The diff has no hunks")
+    return hunks
+
+
+def _find(lines: List[str], needle: List[str], expected: int, start: int) -> int:
+    """Index of needle in lines at or after start, closest to expected, or -1"""
+    target = [line.rstrip() for line in needle]
+    size = len(target)
+    last = len(lines) - size
+    expected = min(max(expected, start), max(last, start))
+    for distance in range(0, max(last - start, 0) + 1):
+        for position in (expected - distance, expected + distance):
+            if start <= position <= last and [line.rstrip() for line in lines[position:position + size]] == target:
+                return position
+            if distance == 0:
+                break
+    return -1
+
+
+def apply_unified_diff(original: str, diff_text: str) -> str:
+    """
+    Apply a unified diff to the original text
+
+    Args:
+        original: Text the diff was written against
+        diff_text: Unified diff (file headers optional)
+
+    Returns:
+        The patched text
+
+    Raises:
+        PatchError: If the diff is malformed or a hunk doesn't match the original
+    """
+    lines = original.splitlines()
+    result: List[str] = []
+    cursor = 0
+    for number, hunk in enumerate(parse_unified_diff(diff_text), start=1):
+        if hunk.old_lines:
+            position = _find(lines, hunk.old_lines, hunk.old_start - 1, cursor)
+            if position < 0:
+                raise PatchError(f"Hunk {number} doesn't match the original code (near line {hunk.old_start})")
+        else:
+            # Pure insertion after line old_start
+            position = min(max(hunk.old_start, cursor), len(lines))
+        result.extend(lines[cursor:position])
+        result.extend(hunk.new_lines)
+        cursor = position + len(hunk.old_lines)
+    result.extend(lines[cursor:])
+    patched = "\n".join(result)
+    return patched + "\n" if patched else ""
@@ -0,0 +1,264 @@
+"""
+Shared Tool Policy Engine for Tool Callbacks
+
+This module compiles a declarative JSON policy into role/tool bitsets and
+argument rules once at startup, so before_tool_callback can decide whether a
+tool call is allowed without copying session state or walking nested dicts.
+Decisions are memoized per (role, tool, normalized args).
+
+Policy file format:
+{
+    "allow_unknown_tools": true,
+    "tools": {
+        "get_weather_forecast": {
+            "roles": ["premium", "admin"],
+            "rules": [
+                {"arg": "location", "roles": ["premium"], "deny_if_contains": ["secret"],
+                 "message": "Restricted location"},
+                {"arg": "days", "roles": ["basic"], "max": 3}
+            ]
+        }
+    },
+    "global_rules": [
+        {"arg": "location", "block_if_contains": ["block"], "message": "Blocked location"}
+    ]
+}
+
+Rule actions:
+- deny_if_contains: return {"error": message} when the argument contains a term
+- block_if_contains: return {"result": message, "blocked": True} when it contains a term
+- min / max: clamp a numeric argument (numeric strings are converted; other
+  values, including NaN and infinity, refuse the call)
+"""
+
+import json
+import logging
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .guardrails import GuardrailAutomaton
+
+logger = logging.getLogger(__name__)
+
+
+class PolicyDecision:
+    """
+    Outcome of a policy evaluation
+
+    Attributes:
+        allowed: True if the tool may run
+        response: Dict to return from before_tool_callback when not allowed
+        arg_updates: Argument values to overwrite before the tool runs
+    """
+
+    __slots__ = ("allowed", "response", "arg_updates")
+
+    def __init__(
+        self,
+        allowed: bool,
+        response: Optional[Dict[str, Any]] = None,
+        arg_updates: Optional[Dict[str, Any]] = None,
+    ):
+        self.allowed = allowed
+        self.response = response
+        self.arg_updates = arg_updates or {}
+
+    def __repr__(self) -> str:
+        return f"PolicyDecision(allowed={self.allowed}, response={self.response}, arg_updates={self.arg_updates})"
+
+
+class _ArgRule:
+    """A compiled argument rule"""
+
+    __slots__ = ("arg", "role_mask", "action", "automaton", "message", "minimum", "maximum")
+
+    def __init__(self, spec: Dict[str, Any], role_mask: int):
+        self.arg = spec["arg"]
+        self.role_mask = role_mask
+        self.message = spec.get("message", "")
+        self.automaton = None
+        self.minimum = spec.get("min")
+        self.maximum = spec.get("max")
+        if "deny_if_contains" in spec:
+            self.action = "deny"
+            self.automaton = GuardrailAutomaton(spec["deny_if_contains"])
+        elif "block_if_contains" in spec:
+            self.action = "block"
+            self.automaton = GuardrailAutomaton(spec["block_if_contains"])
+        elif self.minimum is not None or self.maximum is not None:
+            self.action = "clamp"
+        else:
+            raise ValueError(f"Policy rule for '{self.arg}' has no action")
+
+    def apply(self, value: Any) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """Return (response, new_value); response is set when the call is refused"""
+        if self.action == "clamp":
+            number = _number(value)
+            if number is None:
+                # A bound the model can sidestep by passing "10" or "ten" isn't a bound
+                return {"error": self.message or f"🚫 '{self.arg}' must be a number."}, value
+            clamped = number
+            if self.maximum is not None and clamped > self.maximum:
+                clamped = self.maximum
+            if self.minimum is not None and clamped < self.minimum:
+                clamped = self.minimum
+            return None, clamped
+        if value is None or not self.automaton.find_all(str(value)):
+            return None, value
+        if self.action == "deny":
+            return {"error": self.message}, value
+        return {"result": self.message, "blocked": True}, value
+
+
+class _CompiledTool:
+    __slots__ = ("role_mask", "role_names", "rules", "rule_args")
+
+    def __init__(self, role_mask: int, role_names: List[str], rules: List[_ArgRule]):
+        self.role_mask = role_mask
+        self.role_names = role_names
+        self.rules = rules
+        # Only these arguments can change a decision, so only they go in the cache key
+        self.rule_args = tuple(sorted({rule.arg for rule in rules}))
+
+
+class ToolPolicy:
+    """
+    Compiled role -> tool policy with a bounded decision cache
+
+    Usage:
+        policy = ToolPolicy.from_file("tool_policy.json")
+        decision = policy.evaluate("premium", "get_weather_forecast", {"location": "Tokyo"})
+    """
+
+    def __init__(self, spec: Dict[str, Any], cache_size: int = 4096):
+        self.allow_unknown_tools = spec.get("allow_unknown_tools", True)
+        self.cache_size = cache_size
+        self._role_bits: Dict[str, int] = {}
+        self._tools: Dict[str, _CompiledTool] = {}
+        self._cache: "OrderedDict[tuple, PolicyDecision]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Global rules apply to every tool, after the tool's own rules
+        global_rules = [
+            _ArgRule(rule, self._mask(rule.get("roles"))) for rule in spec.get("global_rules", [])
+        ]
+        self._global_rules = global_rules
+        self._global_rule_args = tuple(sorted({rule.arg for rule in global_rules}))
+
+        for tool_name, tool_spec in spec.get("tools", {}).items():
+            roles = tool_spec.get("roles")
+            rules = [_ArgRule(rule, self._mask(rule.get("roles"))) for rule in tool_spec.get("rules", [])]
+            self._tools[tool_name] = _CompiledTool(self._mask(roles), list(roles or ["any"]), rules + global_rules)
+
+        logger.info(f"Tool policy compiled: {len(self._role_bits)} roles, {len(self._tools)} tools")
+
+    @classmethod
+    def from_file(cls, path: str, cache_size: int = 4096) -> "ToolPolicy":
+        """Load and compile a JSON policy file"""
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle), cache_size=cache_size)
+
+    def _bit(self, role: str) -> int:
+        bit = self._role_bits.get(role)
+        if bit is None:
+            bit = self._role_bits[role] = len(self._role_bits)
+        return bit
+
+    def _mask(self, roles: Optional[List[str]]) -> int:
+        """Bitset of the given roles; None means every role (-1 has all bits set)"""
+        if roles is None:
+            return -1
+        mask = 0
+        for role in roles:
+            mask |= 1 << self._bit(role)
+        return mask
+
+    def _role_allowed(self, mask: int, role: str) -> bool:
+        bit = self._role_bits.get(role)
+        if bit is None:
+            return mask == -1
+        return bool((mask >> bit) & 1)
+
+    def evaluate(self, role: str, tool_name: str, args: Dict[str, Any]) -> PolicyDecision:
+        """
+        Decide whether a tool call is allowed
+
+        Args:
+            role: Caller's role
+            tool_name: Tool being called
+            args: Tool arguments (not modified)
+
+        Returns:
+            A PolicyDecision, memoized per (role, tool, normalized args)
+        """
+        tool = self._tools.get(tool_name)
+        rule_args = tool.rule_args if tool is not None else self._global_rule_args
+        key = (role, tool_name) + tuple(_normalize(args.get(name)) for name in rule_args)
+
+        decision = self._cache.get(key)
+        if decision is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return decision
+
+        self.cache_misses += 1
+        decision = self._decide(role, tool_name, tool, args)
+        self._cache[key] = decision
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return decision
+
+    def _decide(
+        self, role: str, tool_name: str, tool: Optional[_CompiledTool], args: Dict[str, Any]
+    ) -> PolicyDecision:
+        if tool is None:
+            if not self.allow_unknown_tools:
+                return PolicyDecision(False, {"error": f"🚫 Tool '{tool_name}' is not allowed by policy."})
+            rules = self._global_rules
+        else:
+            if not self._role_allowed(tool.role_mask, role):
+                return PolicyDecision(False, {
+                    "error": f"🚫 Access denied. Tool '{tool_name}' requires {'/'.join(tool.role_names)} access. Your role: {role}"
+                })
+            rules = tool.rules
+
+        arg_updates = {}
+        for rule in rules:
+            if not self._role_allowed(rule.role_mask, role) or rule.arg not in args:
+                continue
+            value = arg_updates.get(rule.arg, args[rule.arg])
+            response, new_value = rule.apply(value)
+            if response is not None:
+                return PolicyDecision(False, response)
+            if new_value != args[rule.arg]:
+                arg_updates[rule.arg] = new_value
+        return PolicyDecision(True, None, arg_updates)
+
+
+def _number(value: Any) -> Optional[float]:
+    """A finite int/float, or a string holding one (converted); None for anything else"""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            value = int(text)
+        except ValueError:
+            try:
+                value = float(text)
+            except ValueError:
+                return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize an argument value for the decision cache key"""
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, bool):
+        return repr(value)  # True == 1 as a key, but they get different decisions
+    if isinstance(value, (int, float)) or value is None:
+        return value
+    return repr(value)
@@ -0,0 +1,130 @@
+"""
+Shared Speculative Tool Prefetch
+
+This module starts likely tool calls before the model asks for them. A
+before_agent_callback reads the user's message, extracts tool arguments
+with cheap local parsing (one extractor per tool) and runs the tool in the
+background through ToolCache.prefetch, concurrently with the first model
+call. When the model later calls the tool with the same arguments, the
+result is already cached (or the call coalesces onto the running prefetch).
+
+Prefetch hit rate and wasted work (prefetched results that expired or were
+evicted unused) are tracked by the ToolCache; stats() adds the extractor
+counters.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .tool_cache import ToolCache
+
+logger = logging.getLogger(__name__)
+
+ArgumentExtractor = Callable[[str], Optional[Dict[str, Any]]]
+
+
+class SpeculativePrefetcher:
+    """
+    Warm a ToolCache with tool results predicted from the user's message
+
+    Usage:
+        prefetcher = SpeculativePrefetcher(tool_cache).register(get_purchase_history, extract_purchaser_args)
+        root_agent = Agent(
+            ...,
+            before_agent_callback=prefetcher.before_agent_callback,
+            after_agent_callback=prefetcher.after_agent_callback,
+        )
+
+    The tool must also be registered on the ToolCache, and the cache's tool
+    callbacks must be attached to the agent that really calls it.
+    """
+
+    def __init__(self, cache: ToolCache):
+        """
+        Args:
+            cache: Tool cache the prefetched results are stored in
+        """
+        self.cache = cache
+        self._tools: List[Tuple[str, Callable[..., Any], ArgumentExtractor]] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self.messages = 0
+        self.predictions = 0
+
+    def register(self, tool: Callable[..., Any], extract: ArgumentExtractor) -> "SpeculativePrefetcher":
+        """
+        Declare a tool to prefetch
+
+        Args:
+            tool: The tool function (sync or async); its name must be registered on the cache
+            extract: Maps the user's message to the expected tool arguments, or None
+
+        Returns:
+            The prefetcher, for chaining
+        """
+        self._tools.append((tool.__name__, tool, extract))
+        return self
+
+    async def _run(self, tool_name: str, tool: Callable[..., Any], args: Dict[str, Any]) -> None:
+        async def fetch():
+            if inspect.iscoroutinefunction(tool):
+                return await tool(**args)
+            return await asyncio.to_thread(tool, **args)
+
+        if await self.cache.prefetch(tool_name, args, fetch):
+            logger.info(f"[Prefetch] warmed {tool_name}({args})")
+
+    def prefetch(self, text: str) -> int:
+        """
+        Start background prefetches for every tool whose arguments can be extracted
+
+        Args:
+            text: The user's message
+
+        Returns:
+            Number of prefetches started
+        """
+        self.messages += 1
+        started = 0
+        for tool_name, tool, extract in self._tools:
+            try:
+                args = extract(text)
+            except Exception as e:
+                logger.warning(f"[Prefetch] argument extraction for {tool_name} failed: {e}")
+                continue
+            if not args:
+                continue
+            self.predictions += 1
+            task = asyncio.get_running_loop().create_task(self._run(tool_name, tool, args))
+            # Keep a reference until it finishes, so the task isn't garbage collected
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+        return started
+
+    async def before_agent_callback(self, callback_context: CallbackContext) -> Optional[types.Content]:
+        """Start prefetches from the user's message; never blocks or skips the agent"""
+        content = callback_context.user_content
+        text = " ".join(part.text for part in content.parts if part.text) if content and content.parts else ""
+        if text and self.prefetch(text):
+            print(f"[⚡ Prefetch] Started speculative tool calls for {callback_context.agent_name}")
+        return None
+
+    async def after_agent_callback(self, callback_context: CallbackContext) -> Optional[types.Content]:
+        """Log prefetch hit rate and waste at the end of the turn"""
+        logger.info(f"[Prefetch] stats: {self.stats()}")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return extractor counters plus the cache's prefetch hit rate and waste"""
+        cache_stats = self.cache.stats()
+        return {
+            "messages": self.messages,
+            "predictions": self.predictions,
+            "in_flight": len(self._tasks),
+            **{key: value for key, value in cache_stats.items() if key.startswith("prefetch")},
+        }
@@ -0,0 +1,337 @@
+"""
+Shared Callback Profiler for Callback Examples
+
+This module provides a registry that times every ADK callback invocation
+(before/after agent, model and tool) with high-resolution counters, keeps a
+latency histogram per callback and exports them as JSON or Prometheus text.
+Instead of printing the whole session state on every call, it emits sampled
+structured events; callbacks attach their own details to those events with
+note(), so nothing is formatted or printed for the invocations left out.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Callback hooks supported by LlmAgent
+CALLBACK_HOOKS = [
+    "before_agent_callback",
+    "after_agent_callback",
+    "before_model_callback",
+    "after_model_callback",
+    "before_tool_callback",
+    "after_tool_callback",
+]
+
+# Histogram bucket upper bounds in seconds (Prometheus convention)
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Bucket upper bounds for whole agent stages and branches, which take seconds
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# Notes of the instrumented callback currently running (None outside one)
+_notes: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("callback_notes", default=None)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram with count, sum, min and max
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One counter per bucket plus the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.min_seconds: Optional[float] = None
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        if self.min_seconds is None or seconds < self.min_seconds:
+            self.min_seconds = seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile (in seconds) as the upper bound of its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self.max_seconds)
+                return self.max_seconds
+        return self.max_seconds
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        """Return (le, cumulative_count) pairs including the +Inf bucket"""
+        result = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            result.append((repr(bound), cumulative))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class CallbackProfiler:
+    """
+    Registry that wraps ADK callbacks and records their latency
+
+    Usage:
+        profiler = CallbackProfiler(sample_rate=0.05)
+        agent = LlmAgent(..., before_model_callback=my_callback)
+        profiler.instrument(agent)        # wraps every callback hook in place
+        print(profiler.export_prometheus())
+
+    Inside a callback, profiler.note("blocked", reason=...) adds a detail to
+    that invocation's event instead of printing it.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, slow_threshold_ms: float = 100.0):
+        """
+        Args:
+            sample_rate: Fraction of invocations emitted as structured log events
+            slow_threshold_ms: Invocations slower than this are always emitted
+        """
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, hook: str, name: str, seconds: float, error: bool) -> None:
+        key = (hook, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds)
+            if error:
+                histogram.errors += 1
+
+    def note(self, message: str, **fields: Any) -> None:
+        """
+        Attach a detail to the running callback's event
+
+        The note is only serialized if the invocation's event is emitted
+        (sampled, or slower than slow_threshold_ms). Outside an instrumented
+        callback it goes to the debug log.
+
+        Args:
+            message: Short description, e.g. "rate limit exceeded"
+            **fields: Values to include with it (non-JSON values are str()-ed)
+        """
+        notes = _notes.get()
+        if notes is None:
+            logger.debug(f"{message} {fields}" if fields else message)
+            return
+        notes.append({"message": message, **fields})
+
+    def _emit_event(
+        self, hook: str, name: str, seconds: float, args: tuple, kwargs: dict, result: Any, error: bool,
+        notes: List[Dict[str, Any]],
+    ) -> None:
+        duration_ms = seconds * 1000
+        if duration_ms < self.slow_threshold_ms and random.random() >= self.sample_rate:
+            return
+
+        context = kwargs.get("callback_context") or kwargs.get("tool_context")
+        if context is None and args:
+            context = args[-1] if hook.endswith("tool_callback") and len(args) >= 3 else args[0]
+        tool = kwargs.get("tool") or (args[0] if hook.endswith("tool_callback") and args else None)
+
+        event = {
+            "event": "adk_callback",
+            "hook": hook,
+            "callback": name,
+            "agent": getattr(context, "agent_name", None),
+            "invocation_id": getattr(context, "invocation_id", None),
+            "tool": getattr(tool, "name", None),
+            "duration_ms": round(duration_ms, 3),
+            "outcome": "error" if error else ("pass" if result is None else "override"),
+        }
+        if notes:
+            event["notes"] = notes
+        logger.info(json.dumps(event, default=str))
+
+    def wrap(self, callback: Callable, hook: str, name: Optional[str] = None) -> Callable:
+        """
+        Wrap a single callback so each invocation is timed
+
+        Sync and async callbacks are both supported; a sync callback that
+        returns an awaitable is timed until the awaitable completes.
+
+        Args:
+            callback: The callback to wrap
+            hook: Hook name, e.g. "before_model_callback"
+            name: Label for the callback (defaults to its __name__)
+
+        Returns:
+            The wrapped callback
+        """
+        if getattr(callback, "_profiled_hook", None) == hook:
+            return callback
+        name = name or getattr(callback, "__name__", type(callback).__name__)
+
+        async def finish_awaitable(awaitable, start, args, kwargs, notes):
+            error = True
+            result = None
+            token = _notes.set(notes)
+            try:
+                result = await awaitable
+                error = False
+                return result
+            finally:
+                _notes.reset(token)
+                seconds = (time.perf_counter_ns() - start) / 1e9
+                self._record(hook, name, seconds, error)
+                self._emit_event(hook, name, seconds, args, kwargs, result, error, notes)
+
+        if inspect.iscoroutinefunction(callback):
+            @functools.wraps(callback)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                return await finish_awaitable(callback(*args, **kwargs), start, args, kwargs, [])
+
+            wrapper = async_wrapper
+        else:
+            @functools.wraps(callback)
+            def sync_wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                error = True
+                result = None
+                notes: List[Dict[str, Any]] = []
+                token = _notes.set(notes)
+                try:
+                    result = callback(*args, **kwargs)
+                    error = False
+                finally:
+                    _notes.reset(token)
+                    if error or not inspect.isawaitable(result):
+                        seconds = (time.perf_counter_ns() - start) / 1e9
+                        self._record(hook, name, seconds, error)
+                        self._emit_event(hook, name, seconds, args, kwargs, result, error, notes)
+                if inspect.isawaitable(result):
+                    return finish_awaitable(result, start, args, kwargs, notes)
+                return result
+
+            wrapper = sync_wrapper
+
+        wrapper.__name__ = name
+        wrapper._profiled_hook = hook
+        return wrapper
+
+    def instrument(self, agent) -> Any:
+        """
+        Wrap every callback configured on an agent, in place
+
+        Both single callbacks and lists of callbacks are supported.
+
+        Args:
+            agent: An LlmAgent (or any agent with *_callback attributes)
+
+        Returns:
+            The same agent, for chaining
+        """
+        for hook in CALLBACK_HOOKS:
+            callback = getattr(agent, hook, None)
+            if callback is None:
+                continue
+            if isinstance(callback, list):
+                setattr(agent, hook, [self.wrap(item, hook) for item in callback])
+            else:
+                setattr(agent, hook, self.wrap(callback, hook))
+        logger.info(f"Callback profiler instrumented agent: {agent.name}")
+        return agent
+
+    def reset(self) -> None:
+        """Drop all recorded histograms"""
+        with self._lock:
+            self._histograms.clear()
+
+    def export_json(self) -> Dict[str, Any]:
+        """
+        Export per-callback latency statistics
+
+        Returns:
+            Dict with one entry per (hook, callback), latencies in milliseconds
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+            callbacks = []
+            for (hook, name), histogram in items:
+                p50 = histogram.quantile(0.50)
+                p95 = histogram.quantile(0.95)
+                p99 = histogram.quantile(0.99)
+                callbacks.append({
+                    "hook": hook,
+                    "callback": name,
+                    "count": histogram.count,
+                    "errors": histogram.errors,
+                    "mean_ms": round(histogram.total_seconds / histogram.count * 1000, 4),
+                    "min_ms": round((histogram.min_seconds or 0.0) * 1000, 4),
+                    "max_ms": round(histogram.max_seconds * 1000, 4),
+                    "p50_ms": round(p50 * 1000, 4) if p50 is not None else None,
+                    "p95_ms": round(p95 * 1000, 4) if p95 is not None else None,
+                    "p99_ms": round(p99 * 1000, 4) if p99 is not None else None,
+                    "buckets": dict(histogram.cumulative_buckets()),
+                })
+        return {"callbacks": callbacks}
+
+    def export_prometheus(self, prefix: str = "adk_callback") -> str:
+        """
+        Export the histograms in the Prometheus text exposition format
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Prometheus text with <prefix>_duration_seconds histograms and a
+            <prefix>_errors_total counter
+        """
+        duration = f"{prefix}_duration_seconds"
+        errors = f"{prefix}_errors_total"
+        lines = [
+            f"# HELP {duration} Latency of ADK callback invocations.",
+            f"# TYPE {duration} histogram",
+        ]
+        error_lines = [
+            f"# HELP {errors} ADK callback invocations that raised.",
+            f"# TYPE {errors} counter",
+        ]
+        with self._lock:
+            for (hook, name), histogram in sorted(self._histograms.items()):
+                labels = f'hook="{hook}",callback="{name}"'
+                for le, cumulative in histogram.cumulative_buckets():
+                    lines.append(f'{duration}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{duration}_sum{{{labels}}} {histogram.total_seconds:.9f}")
+                lines.append(f"{duration}_count{{{labels}}} {histogram.count}")
+                error_lines.append(f"{errors}{{{labels}}} {histogram.errors}")
+        return "\n".join(lines + error_lines) + "\n"
+
+
+# Shared registry used by the callback examples; CALLBACK_EVENT_SAMPLE_RATE=1
+# emits every invocation's event (with its notes), e.g. while developing
+callback_profiler = CallbackProfiler(sample_rate=float(os.environ.get("CALLBACK_EVENT_SAMPLE_RATE", 0.01)))
@@ -0,0 +1,303 @@
+"""
+Shared Rate Limiter for Tool Callbacks
+
+This module provides per-(user, tool) rate limiting for before_tool_callback.
+Two algorithms are available:
+
+- token_bucket: allows bursts up to the limit, refills continuously
+- sliding_window: sliding window counter (weighted current + previous window)
+
+Both are O(1) per check. The in-memory backend uses sharded locks so
+multi-threaded runners don't contend on a single lock, and forgets idle
+(user, tool) keys: a shard is swept on access, at most once per
+idle_sweep_seconds, and keys whose quota is full again are dropped. The
+SQLite backend lets several worker processes on one host share the same quotas.
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ("token_bucket", "sliding_window")
+
+
+class RateLimit:
+    """
+    A limit of `requests` calls per `period_seconds`
+    """
+
+    __slots__ = ("requests", "period_seconds", "refill_rate")
+
+    def __init__(self, requests: int, period_seconds: float):
+        if requests <= 0 or period_seconds <= 0:
+            raise ValueError("RateLimit requires positive requests and period_seconds")
+        self.requests = requests
+        self.period_seconds = period_seconds
+        # Tokens added per second (token bucket)
+        self.refill_rate = requests / period_seconds
+
+    def __repr__(self) -> str:
+        return f"RateLimit({self.requests}/{self.period_seconds}s)"
+
+
+def _token_bucket(state: list, limit: RateLimit, now: float, cost: int = 1) -> Tuple[bool, float]:
+    """Token bucket step; state is [tokens, last_refill]"""
+    tokens = state[0] + (now - state[1]) * limit.refill_rate
+    if tokens > limit.requests:
+        tokens = limit.requests
+    state[1] = now
+    if tokens >= cost:
+        state[0] = tokens - cost
+        return True, 0.0
+    state[0] = tokens
+    return False, (cost - tokens) / limit.refill_rate
+
+
+def _sliding_window(state: list, limit: RateLimit, now: float, cost: int = 1) -> Tuple[bool, float]:
+    """Sliding window counter step; state is [window_index, current_count, previous_count]"""
+    period = limit.period_seconds
+    window = int(now // period)
+    if window != state[0]:
+        state[2] = state[1] if window == state[0] + 1 else 0
+        state[1] = 0
+        state[0] = window
+    elapsed = (now - window * period) / period
+    estimate = state[2] * (1.0 - elapsed) + state[1]
+    if estimate + cost <= limit.requests:
+        state[1] += cost
+        return True, 0.0
+    # Time until the previous window's weight has decayed enough for this call
+    spare = limit.requests - state[1] - cost
+    if state[2] and spare >= 0:
+        retry_after = ((1.0 - spare / state[2]) - elapsed) * period
+    else:
+        retry_after = (1.0 - elapsed) * period
+    return False, max(retry_after, 0.0)
+
+
+def _token_bucket_idle(state: list, limit: RateLimit, now: float) -> bool:
+    """The bucket has refilled, so the state is the same as a new key's"""
+    return state[0] + (now - state[1]) * limit.refill_rate >= limit.requests
+
+
+def _sliding_window_idle(state: list, limit: RateLimit, now: float) -> bool:
+    """No counted calls remain in the current or previous window"""
+    window = int(now // limit.period_seconds)
+    return window >= state[0] + 2 or (window == state[0] + 1 and state[1] == 0)
+
+
+_STEPS = {"token_bucket": _token_bucket, "sliding_window": _sliding_window}
+_IDLE = {"token_bucket": _token_bucket_idle, "sliding_window": _sliding_window_idle}
+
+
+def _initial_state(algorithm: str, limit: RateLimit, now: float) -> list:
+    if algorithm == "token_bucket":
+        return [float(limit.requests), now]
+    return [int(now // limit.period_seconds), 0, 0]
+
+
+class _MemoryBackend:
+    """In-process limiter state, sharded by key to reduce lock contention"""
+
+    def __init__(self, algorithm: str, shards: int, idle_sweep_seconds: float = 60.0):
+        # Round up to a power of two so the shard is picked with a mask
+        count = 1
+        while count < shards:
+            count <<= 1
+        self._mask = count - 1
+        self._locks = [threading.Lock() for _ in range(count)]
+        # key -> (state, limit); the limit is kept so sweeps can tell when the state is idle
+        self._states = [{} for _ in range(count)]
+        self._sweep_at = [time.monotonic() + idle_sweep_seconds] * count
+        self._idle_sweep_seconds = idle_sweep_seconds
+        self._step = _STEPS[algorithm]
+        self._idle = _IDLE[algorithm]
+        self._algorithm = algorithm
+
+    def acquire(self, key: Tuple[str, str], limit: RateLimit, cost: int = 1) -> Tuple[bool, float]:
+        shard = hash(key) & self._mask
+        now = time.monotonic()
+        with self._locks[shard]:
+            states = self._states[shard]
+            if now >= self._sweep_at[shard]:
+                # Before the lookup, so the entry stepped below is never the one dropped
+                self._sweep(states, now)
+                self._sweep_at[shard] = now + self._idle_sweep_seconds
+            entry = states.get(key)
+            if entry is None:
+                entry = states[key] = (_initial_state(self._algorithm, limit, now), limit)
+            return self._step(entry[0], limit, now, cost)
+
+    def _sweep(self, states: Dict[Tuple[str, str], tuple], now: float) -> None:
+        """Drop keys whose state is the same as a new key's (caller holds the shard lock)"""
+        idle = [key for key, (state, limit) in states.items() if self._idle(state, limit, now)]
+        for key in idle:
+            del states[key]
+        if idle:
+            logger.debug(f"Rate limiter dropped {len(idle)} idle keys")
+
+    def tracked_keys(self) -> int:
+        """Number of (user, tool) keys currently held"""
+        return sum(len(states) for states in self._states)
+
+    def reset(self) -> None:
+        for lock, states in zip(self._locks, self._states):
+            with lock:
+                states.clear()
+
+
+class _SQLiteBackend:
+    """
+    Limiter state in a SQLite file shared by worker processes on one host
+
+    Each check is one short IMMEDIATE transaction, so concurrent processes
+    serialize on the database write lock and never double-spend a quota.
+    """
+
+    def __init__(self, algorithm: str, path: str):
+        self._algorithm = algorithm
+        self._step = _STEPS[algorithm]
+        self._path = path
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " user_id TEXT NOT NULL, tool TEXT NOT NULL, algorithm TEXT NOT NULL,"
+            " a REAL NOT NULL, b REAL NOT NULL, c REAL NOT NULL,"
+            " PRIMARY KEY (user_id, tool, algorithm))"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def acquire(self, key: Tuple[str, str], limit: RateLimit, cost: int = 1) -> Tuple[bool, float]:
+        user_id, tool = key
+        connection = self._connection()
+        # Wall clock time, since monotonic clocks are not comparable across processes
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT a, b, c FROM rate_limits WHERE user_id = ? AND tool = ? AND algorithm = ?",
+                (user_id, tool, self._algorithm),
+            ).fetchone()
+            if row is None:
+                state = _initial_state(self._algorithm, limit, now)
+            elif self._algorithm == "token_bucket":
+                state = [row[0], row[1]]
+            else:
+                state = [int(row[0]), int(row[1]), int(row[2])]
+            allowed, retry_after = self._step(state, limit, now, cost)
+            values = (state + [0.0])[:3]
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limits (user_id, tool, algorithm, a, b, c) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, tool, self._algorithm, *values),
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    def reset(self) -> None:
+        self._connection().execute("DELETE FROM rate_limits")
+
+
+class RateLimiter:
+    """
+    Per-(user, tool) rate limiter
+
+    Usage:
+        limiter = RateLimiter(
+            default_limit=RateLimit(10, 60),
+            tool_limits={"get_weather_forecast": RateLimit(3, 60)},
+        )
+        allowed, retry_after = limiter.acquire("user-1", "get_weather_forecast")
+    """
+
+    def __init__(
+        self,
+        default_limit: RateLimit,
+        tool_limits: Optional[Dict[str, RateLimit]] = None,
+        algorithm: str = "token_bucket",
+        shards: int = 16,
+        sqlite_path: Optional[str] = None,
+        idle_sweep_seconds: float = 60.0,
+    ):
+        """
+        Args:
+            default_limit: Limit applied to tools without their own entry
+            tool_limits: Per-tool limits, keyed by tool name
+            algorithm: "token_bucket" or "sliding_window"
+            shards: Number of lock shards for the in-memory backend
+            sqlite_path: Share quotas between processes through this SQLite file
+            idle_sweep_seconds: How often each in-memory shard drops keys whose quota is full again
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported rate limit algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.default_limit = default_limit
+        self.tool_limits = dict(tool_limits or {})
+        if sqlite_path:
+            self._backend = _SQLiteBackend(algorithm, sqlite_path)
+        else:
+            self._backend = _MemoryBackend(algorithm, shards, idle_sweep_seconds)
+        logger.info(
+            f"Rate limiter ready: {algorithm}, default {default_limit}, "
+            f"{'sqlite ' + sqlite_path if sqlite_path else 'in-memory'}"
+        )
+
+    def acquire(self, user_id: str, tool_name: str, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Consume calls from the (user, tool) quota
+
+        Args:
+            user_id: Caller
+            tool_name: Tool being called
+            cost: Number of calls to consume (e.g. the item count of a batch call)
+
+        Returns:
+            (allowed, retry_after_seconds); retry_after is 0.0 when allowed.
+            A call costing more than the whole limit is never allowed, and
+            its retry_after is math.inf (check limit_for() up front).
+        """
+        limit = self.limit_for(tool_name)
+        if cost > limit.requests:
+            return False, math.inf
+        return self._backend.acquire((user_id, tool_name), limit, cost)
+
+    def limit_for(self, tool_name: str) -> RateLimit:
+        """Return the limit that applies to a tool"""
+        return self.tool_limits.get(tool_name, self.default_limit)
+
+    def reset(self) -> None:
+        """Forget all recorded usage"""
+        self._backend.reset()
+
+
+def rate_limiter_from_env(
+    default_limit: RateLimit,
+    tool_limits: Optional[Dict[str, RateLimit]] = None,
+    algorithm: str = "token_bucket",
+) -> RateLimiter:
+    """
+    Build a RateLimiter, sharing quotas through RATE_LIMIT_SQLITE_PATH when it is set
+    """
+    return RateLimiter(
+        default_limit,
+        tool_limits,
+        algorithm=os.environ.get("RATE_LIMIT_ALGORITHM", algorithm),
+        sqlite_path=os.environ.get("RATE_LIMIT_SQLITE_PATH") or None,
+    )
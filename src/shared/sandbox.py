@@ -0,0 +1,466 @@
+"""
+Shared Sandbox for Executing Generated Code
+
+This module runs model-generated code (and model-proposed tests) in
+isolated, resource-limited subprocesses:
+
+- a fresh `python -I` interpreter per run, in an empty temporary directory,
+  with a minimal environment, stdin closed and its own session (process group)
+- CPU time, address space, file size and open-file limits (setrlimit)
+- no network: the child moves itself into new user + network namespaces
+  (loopback only). Where the kernel refuses, the run fails closed unless
+  require_network_isolation=False, in which case it's reported as
+  "unisolated" (Python's socket constructors are blocked, but code can still
+  reach _socket directly)
+- a wall-clock deadline, after which the whole process group is killed
+
+Each sandbox is two processes. The reporter applies the limits, reads a
+per-run nonce from stdin and writes the verdict, tagged with it, to a pipe
+the parent created. It never runs the code, and it is non-dumpable. A
+separate test process imports the code and runs the tests. It reports each
+outcome to the reporter, and has neither the nonce nor the verdict pipe. So
+the code can't write the verdict, and can't change the reporter's own
+fields (network, sandbox_error, peak RSS). A run that ends without a
+complete, well-formed report (e.g. os._exit(0) during a test) is an error.
+
+The tests run in the same process as the code, so code written to cheat can
+still fake its own tests' outcomes (e.g. by writing passing reports and
+exiting). The sandbox contains what the code can do. It does not certify
+deliberately adversarial code. Without the user namespace (root, or
+require_network_isolation=False), the test process can also reach the
+reporter through /proc.
+
+The parent reaps each sandbox with wait4, so CPU time is measured by the
+kernel even when it's killed; peak RSS is the test process's maxrss. SandboxPool bounds how many
+sandboxes run at once (one per core by default), so many pipeline runs can
+validate in parallel.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SOLUTION_FILE = "solution.py"
+TESTS_FILE = "test_solution.py"
+MAX_CAPTURED_OUTPUT = 4000
+MAX_VERDICT_BYTES = 1024 * 1024
+
+# Runs inside the sandbox as the reporter: apply limits, cut the network, then
+# start the test process and turn its reports into the verdict. It never runs
+# the code itself, and it's made non-dumpable, so the code's process can't read
+# its memory (the nonce) or reopen its file descriptors through /proc.
+_RUNNER = r'''
+import ctypes, json, os, resource, subprocess, sys
+
+limits = json.loads(sys.argv[1])
+libc = ctypes.CDLL(None, use_errno=True)
+
+def _verdict_channel(fd, nonce):
+    def report(result):
+        with os.fdopen(fd, "wb") as channel:
+            channel.write(nonce + b" " + json.dumps(result).encode() + b"\n")
+    return report
+
+# The nonce arrives on stdin, so it's in neither argv, the environment nor a file
+os.set_inheritable(limits["verdict_fd"], False)
+_report = _verdict_channel(limits["verdict_fd"], sys.stdin.buffer.readline().strip())
+_devnull = os.open(os.devnull, os.O_RDONLY)
+os.dup2(_devnull, 0)
+os.close(_devnull)
+libc.prctl(4, 0, 0, 0, 0)  # PR_SET_DUMPABLE
+
+resource.setrlimit(resource.RLIMIT_CPU, (limits["cpu_seconds"], limits["cpu_seconds"] + 1))
+resource.setrlimit(resource.RLIMIT_AS, (limits["memory_bytes"], limits["memory_bytes"]))
+resource.setrlimit(resource.RLIMIT_FSIZE, (limits["file_bytes"], limits["file_bytes"]))
+resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+network = "unisolated"
+try:
+    if libc.unshare(0x10000000 | 0x40000000) == 0:  # CLONE_NEWUSER | CLONE_NEWNET
+        network = "namespace"
+except Exception:
+    pass
+
+result = {"network": network, "import_ok": False, "tests": []}
+
+def _text(value):
+    return str(value)[-500:] if value is not None else None
+
+def _ms(value):
+    return round(float(value), 2) if isinstance(value, (int, float)) else None
+
+def _apply(record):
+    # Only known fields of known events, so a report can't overwrite the reporter's own fields
+    event = record["event"]
+    if event == "import":
+        result["import_ok"] = record.get("ok") is True
+        result["import_error"] = _text(record.get("error"))
+        result["import_ms"] = _ms(record.get("ms"))
+    elif event == "tests_error":
+        result["tests_error"] = _text(record.get("error"))
+    elif event == "test":
+        entry = {"name": _text(record["name"]), "passed": record.get("passed") is True, "ms": _ms(record.get("ms"))}
+        if not entry["passed"]:
+            entry["error"] = _text(record.get("error"))
+        result["tests"].append(entry)
+    elif event != "done":
+        raise ValueError(event)
+    return event == "done"
+
+try:
+    if network != "namespace" and limits["require_network_isolation"]:
+        result["sandbox_error"] = "network isolation unavailable (unshare of user + network namespaces failed)"
+    else:
+        report_read, report_write = os.pipe()
+        options = {"network": network, "run_tests": limits["run_tests"], "report_fd": report_write}
+        worker = subprocess.Popen(
+            [sys.executable, "-I", "worker.py", json.dumps(options)],
+            stdin=subprocess.DEVNULL,
+            pass_fds=(report_write,),
+        )
+        os.close(report_write)
+        lines, size = [], 0
+        with os.fdopen(report_read, "rb") as reports:
+            for line in reports:
+                size += len(line)
+                if size <= limits["max_report_bytes"]:
+                    lines.append(line)
+        returncode = worker.wait()
+        result["worker_returncode"] = returncode
+        finished = False
+        for line in lines:
+            try:
+                finished = _apply(json.loads(line)) or finished
+            except Exception:
+                result["sandbox_error"] = "malformed report from the test process"
+                break
+        if size > limits["max_report_bytes"]:
+            result["sandbox_error"] = "the test process's report is too large"
+        elif not finished and "sandbox_error" not in result:
+            result["sandbox_error"] = f"the test process ended before reporting all tests (exit status {returncode})"
+        # Measured by the kernel for the test process, not reported by it
+        result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+finally:
+    _report(result)
+'''
+
+# Runs the code: import the solution, call every test_* function of the test
+# module and report each outcome as a JSON line on the report pipe.
+_WORKER = r'''
+import importlib.util, json, os, socket, sys, time, traceback
+
+options = json.loads(sys.argv[1])
+_reports = os.fdopen(options["report_fd"], "w", buffering=1)
+
+def _emit(event, **fields):
+    _reports.write(json.dumps({"event": event, **fields}) + "\n")
+
+if options["network"] != "namespace":
+    class _NoNetwork(socket.socket):
+        def __init__(self, *args, **kwargs):
+            raise PermissionError("network access is disabled in the sandbox")
+
+    def _no_network(*args, **kwargs):
+        raise PermissionError("network access is disabled in the sandbox")
+
+    socket.socket = _NoNetwork
+    socket.create_connection = socket.getaddrinfo = socket.socketpair = _no_network
+
+def _error(exc):
+    return "".join(traceback.format_exception_only(type(exc), exc)).strip()[-500:]
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+started = time.perf_counter()
+try:
+    _load("solution", "solution.py")
+    imported = True
+    _emit("import", ok=True, ms=(time.perf_counter() - started) * 1000)
+except BaseException as exc:
+    imported = False
+    _emit("import", ok=False, error=_error(exc), ms=(time.perf_counter() - started) * 1000)
+
+if imported and options["run_tests"]:
+    try:
+        tests = _load("test_solution", "test_solution.py")
+    except BaseException as exc:
+        _emit("tests_error", error=_error(exc))
+    else:
+        for name in sorted(n for n in vars(tests) if n.startswith("test_") and callable(getattr(tests, n))):
+            started = time.perf_counter()
+            try:
+                getattr(tests, name)()
+                _emit("test", name=name, passed=True, ms=(time.perf_counter() - started) * 1000)
+            except BaseException as exc:
+                _emit("test", name=name, passed=False, error=_error(exc), ms=(time.perf_counter() - started) * 1000)
+_emit("done")
+'''
+
+
+class SandboxLimits:
+    """Resource limits of one sandbox run"""
+
+    def __init__(
+        self,
+        cpu_seconds: int = 5,
+        memory_mb: int = 512,
+        wall_seconds: float = 10.0,
+        file_mb: int = 10,
+        require_network_isolation: bool = True,
+    ):
+        """
+        Args:
+            cpu_seconds: CPU time limit (SIGXCPU, then SIGKILL)
+            memory_mb: Address space limit (allocations beyond it raise MemoryError)
+            wall_seconds: Wall-clock deadline; the process group is killed after it
+            file_mb: Largest file the code may write
+            require_network_isolation: Refuse to run the code (status "error") when the
+                network namespace can't be created; if False, run it "unisolated"
+        """
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+        self.file_mb = file_mb
+        self.require_network_isolation = require_network_isolation
+
+
+def _tail(path: str) -> str:
+    try:
+        with open(path, "rb") as handle:
+            handle.seek(0, os.SEEK_END)
+            handle.seek(max(handle.tell() - MAX_CAPTURED_OUTPUT, 0))
+            return handle.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def _drain(fd: int, buffer: bytearray) -> None:
+    """Read what's available on a non-blocking pipe (beyond MAX_VERDICT_BYTES is discarded)"""
+    while True:
+        try:
+            chunk = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        if not chunk:
+            return
+        if len(buffer) <= MAX_VERDICT_BYTES:
+            buffer += chunk
+
+
+def _parse_verdict(data: bytes, nonce: str) -> Optional[Dict[str, Any]]:
+    """The runner's report: exactly one line, "<nonce> <json>"; None for anything else"""
+    prefix = nonce.encode() + b" "
+    if len(data) > MAX_VERDICT_BYTES or not data.startswith(prefix) or data.count(b"\n") != 1 or not data.endswith(b"\n"):
+        return None
+    try:
+        verdict = json.loads(data[len(prefix):])
+    except ValueError:
+        return None
+    return verdict if isinstance(verdict, dict) else None
+
+
+def run_in_sandbox(code: str, tests: Optional[str] = None, limits: Optional[SandboxLimits] = None) -> Dict[str, Any]:
+    """
+    Execute code (and optional tests) in an isolated, resource-limited subprocess
+
+    The code is imported as module `solution`; tests are a module of plain
+    `test_*` functions (e.g. `from solution import *` plus asserts).
+
+    Args:
+        code: Python source to run
+        tests: Optional test module source
+        limits: Resource limits (SandboxLimits() defaults if omitted)
+
+    Returns:
+        {"status": "passed"|"failed"|"error"|"timeout"|"cpu_limit"|"memory_limit",
+         "tests_passed", "tests_failed", "tests", "duration_ms", "cpu_ms",
+         "peak_rss_kb", "network", "returncode", "stdout", "stderr", "sandbox_error", ...}
+        network is "namespace", "unisolated" or "unknown" (no verdict)
+    """
+    limits = limits or SandboxLimits()
+    runner_limits = {
+        "cpu_seconds": limits.cpu_seconds,
+        "memory_bytes": limits.memory_mb * 1024 * 1024,
+        "file_bytes": limits.file_mb * 1024 * 1024,
+        "run_tests": bool(tests),
+        "require_network_isolation": limits.require_network_isolation,
+        "max_report_bytes": MAX_VERDICT_BYTES // 2,
+    }
+    nonce = secrets.token_hex(16)
+
+    with tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+        for name, content in ((SOLUTION_FILE, code), (TESTS_FILE, tests or ""), ("runner.py", _RUNNER), ("worker.py", _WORKER)):
+            with open(os.path.join(workdir, name), "w", encoding="utf-8") as handle:
+                handle.write(content)
+        stdout_path = os.path.join(workdir, "stdout.txt")
+        stderr_path = os.path.join(workdir, "stderr.txt")
+
+        verdict_read, verdict_write = os.pipe()
+        os.set_blocking(verdict_read, False)
+        verdict = bytearray()
+        started = time.perf_counter()
+        try:
+            with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+                process = subprocess.Popen(
+                    [sys.executable, "-I", "runner.py", json.dumps({**runner_limits, "verdict_fd": verdict_write})],
+                    cwd=workdir,
+                    env={"PATH": "/usr/bin:/bin", "HOME": workdir, "LANG": "C.UTF-8"},
+                    stdin=subprocess.PIPE,
+                    stdout=stdout,
+                    stderr=stderr,
+                    pass_fds=(verdict_write,),
+                    start_new_session=True,  # Own process group, killed as a whole
+                )
+        finally:
+            os.close(verdict_write)  # Only the child holds the write end
+        try:
+            process.stdin.write(nonce.encode() + b"\n")
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        pid = process.pid
+
+        # Reap with wait4 so the kernel reports CPU time and peak RSS, even after a kill
+        deadline = started + limits.wall_seconds
+        timed_out = False
+        while True:
+            reaped, status, usage = os.wait4(pid, os.WNOHANG)
+            _drain(verdict_read, verdict)  # Keep reading, or a large verdict would block the child
+            if reaped:
+                break
+            if time.perf_counter() >= deadline:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _, status, usage = os.wait4(pid, 0)
+                break
+            time.sleep(0.005)
+        duration_ms = (time.perf_counter() - started) * 1000
+        process.returncode = os.waitstatus_to_exitcode(status)  # Already reaped; Popen must not wait again
+        try:
+            os.killpg(pid, signal.SIGKILL)  # Processes the code left behind
+        except (ProcessLookupError, PermissionError):
+            pass
+        _drain(verdict_read, verdict)
+        os.close(verdict_read)
+
+        report = _parse_verdict(bytes(verdict), nonce)
+        sandbox_error = None if report is not None else "no verdict from the sandbox runner (the code exited early or tampered with it)"
+        report = report or {}
+        sandbox_error = report.get("sandbox_error") or sandbox_error
+        stdout_text = _tail(stdout_path)
+        stderr_text = _tail(stderr_path)
+
+    returncode = process.returncode
+    # The test process is killed by the CPU limit, not the reporter
+    worker_returncode = report.get("worker_returncode") or 0
+    signal_number = -returncode if returncode < 0 else -worker_returncode if worker_returncode < 0 else None
+    tests_run: List[Dict[str, Any]] = report.get("tests", [])
+    passed = sum(1 for test in tests_run if test["passed"])
+    failed = len(tests_run) - passed
+    errors = " ".join(filter(None, (report.get("import_error"), report.get("tests_error"), stderr_text)))
+
+    if timed_out:
+        status_name = "timeout"
+    elif signal_number in (signal.SIGXCPU, signal.SIGKILL):
+        status_name = "cpu_limit"
+    elif "MemoryError" in errors:
+        status_name = "memory_limit"
+    elif sandbox_error or not report.get("import_ok") or report.get("tests_error") or returncode or worker_returncode:
+        status_name = "error"
+    elif failed:
+        status_name = "failed"
+    else:
+        status_name = "passed"
+
+    return {
+        "status": status_name,
+        "tests_passed": passed,
+        "tests_failed": failed,
+        "tests": tests_run,
+        "import_error": report.get("import_error"),
+        "tests_error": report.get("tests_error"),
+        "sandbox_error": sandbox_error,
+        "duration_ms": round(duration_ms, 1),
+        "import_ms": report.get("import_ms"),
+        "cpu_ms": round((usage.ru_utime + usage.ru_stime) * 1000, 1),
+        # The test process's maxrss from the reporter; wait4's maxrss also counts
+        # the parent's memory from before exec, so it's only the fallback for killed runs
+        "peak_rss_kb": report.get("peak_rss_kb") or usage.ru_maxrss,
+        "network": report.get("network", "unknown"),
+        "returncode": returncode,
+        "stdout": stdout_text,
+        "stderr": stderr_text,
+    }
+
+
+class SandboxPool:
+    """
+    Bounded pool of concurrent sandbox runs
+
+    Each run is its own subprocess; the pool's worker threads only supervise
+    them, so up to max_workers runs execute in parallel across cores.
+
+    Usage:
+        pool = SandboxPool(limits=SandboxLimits(cpu_seconds=2, memory_mb=256))
+        result = await pool.run(code, tests)
+        results = await asyncio.gather(*(pool.run(code) for code in sources))
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, limits: Optional[SandboxLimits] = None):
+        """
+        Args:
+            max_workers: Maximum concurrent sandboxes (CPU count by default)
+            limits: Default limits for every run
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.limits = limits or SandboxLimits()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sandbox")
+        self.runs = 0
+        self.statuses: Dict[str, int] = {}
+        self.cpu_ms = 0.0
+
+    async def run(self, code: str, tests: Optional[str] = None, limits: Optional[SandboxLimits] = None) -> Dict[str, Any]:
+        """Run code (and tests) in a sandbox without blocking the event loop; see run_in_sandbox"""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, run_in_sandbox, code, tests, limits or self.limits)
+        self.runs += 1
+        self.statuses[result["status"]] = self.statuses.get(result["status"], 0) + 1
+        self.cpu_ms += result["cpu_ms"]
+        logger.info(
+            f"Sandbox run {result['status']}: {result['tests_passed']} passed, {result['tests_failed']} failed, "
+            f"{result['duration_ms']} ms, peak RSS {result['peak_rss_kb']} KB"
+        )
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return run counts per status and total CPU time"""
+        return {
+            "max_workers": self.max_workers,
+            "runs": self.runs,
+            "statuses": dict(self.statuses),
+            "cpu_ms": round(self.cpu_ms, 1),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the supervisor threads (waits for running sandboxes)"""
+        self._executor.shutdown(wait=True)
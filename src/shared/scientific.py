@@ -0,0 +1,155 @@
+"""
+Shared Array-Mode Scientific Functions for Calculator Tools
+
+This module applies a scientific operation to a whole list of inputs in
+one call. Operations are looked up in a dispatch table and run as NumPy
+ufuncs when NumPy is installed, falling back to the math module per element
+otherwise. Invalid elements (log of a negative number, factorial of -1,
+overflow, ...) are reported in a per-element error mask instead of raising.
+
+Factorials of integers come from a lookup table precomputed at import;
+non-integer inputs use gamma(x + 1), cached per value.
+"""
+
+import logging
+import math
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; operations fall back to the math module
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAX_VALUES = 100_000
+
+# n! for every n whose factorial fits in a float64 (171! overflows)
+MAX_FACTORIAL = 170
+_FACTORIALS = [float(math.factorial(n)) for n in range(MAX_FACTORIAL + 1)]
+_FACTORIAL_TABLE = np.array(_FACTORIALS) if np is not None else None
+
+
+@lru_cache(maxsize=4096)
+def _gamma_factorial(value: float) -> float:
+    return math.gamma(value + 1.0)
+
+
+def _factorial_scalar(value: float) -> float:
+    if value < 0:
+        raise ValueError("factorial is not defined for negative numbers")
+    if float(value).is_integer():
+        if value > MAX_FACTORIAL:
+            raise OverflowError("factorial result too large")
+        return _FACTORIALS[int(value)]
+    return _gamma_factorial(float(value))
+
+
+def _factorial_array(values: Any) -> Any:
+    result = np.full(values.shape, np.nan)
+    integers = (values >= 0) & (values == np.floor(values))
+    table_hits = integers & (values <= MAX_FACTORIAL)
+    result[table_hits] = _FACTORIAL_TABLE[values[table_hits].astype(np.intp)]
+    # Non-integer inputs use gamma(x + 1); large integers stay NaN (overflow)
+    fractional = (values > 0) & ~integers
+    if fractional.any():
+        result[fractional] = [_safe_gamma(value) for value in values[fractional].tolist()]
+    return result
+
+
+def _safe_gamma(value: float) -> float:
+    try:
+        return _gamma_factorial(value)
+    except (OverflowError, ValueError):
+        return math.nan
+
+
+def _power_array(bases: Any, exponents: Any) -> Any:
+    return np.power(bases, exponents)
+
+
+# operation -> (arity, NumPy implementation, math implementation, description)
+# Trigonometric functions take degrees.
+OPERATIONS: Dict[str, Tuple[int, Optional[Callable], Callable, str]] = {}
+
+
+def _register() -> None:
+    vector = np is not None
+    OPERATIONS.update({
+        "sin": (1, (lambda x: np.sin(np.radians(x))) if vector else None, lambda x: math.sin(math.radians(x)), "sine of degrees"),
+        "cos": (1, (lambda x: np.cos(np.radians(x))) if vector else None, lambda x: math.cos(math.radians(x)), "cosine of degrees"),
+        "tan": (1, (lambda x: np.tan(np.radians(x))) if vector else None, lambda x: math.tan(math.radians(x)), "tangent of degrees"),
+        "log": (1, np.log10 if vector else None, math.log10, "base-10 logarithm"),
+        "ln": (1, np.log if vector else None, math.log, "natural logarithm"),
+        "sqrt": (1, np.sqrt if vector else None, math.sqrt, "square root"),
+        "power": (2, _power_array if vector else None, math.pow, "values raised to exponents"),
+        "factorial": (1, _factorial_array if vector else None, _factorial_scalar, "factorial (gamma(x + 1) for non-integers)"),
+    })
+
+
+_register()
+
+
+def _apply_scalar(function: Callable, columns: List[Sequence[float]], rows: int) -> Tuple[List[Optional[float]], List[bool]]:
+    results, errors = [], []
+    for row in range(rows):
+        try:
+            value = float(function(*(column[row] if len(column) > 1 else column[0] for column in columns)))
+            ok = math.isfinite(value)
+        except (ValueError, OverflowError, ZeroDivisionError):
+            value, ok = None, False
+        results.append(value if ok else None)
+        errors.append(not ok)
+    return results, errors
+
+
+def apply_operation(
+    operation: str, values: Sequence[float], second_values: Optional[Sequence[float]] = None
+) -> Dict[str, Any]:
+    """
+    Apply a scientific operation to every input value
+
+    Args:
+        operation: One of OPERATIONS (sin, cos, tan, log, ln, sqrt, power, factorial)
+        values: Inputs (for power: the bases)
+        second_values: Exponents for power; one value is applied to every base
+
+    Returns:
+        {"results": [...], "errors": [...], "error_count": n}; invalid elements
+        are None in results and True in errors
+
+    Raises:
+        ValueError: For an unknown operation or mismatched inputs
+    """
+    entry = OPERATIONS.get(operation.lower().strip())
+    if entry is None:
+        raise ValueError(f"Unsupported operation: {operation}. Supported: {', '.join(OPERATIONS)}")
+    arity, vector_function, scalar_function, _ = entry
+
+    if not values:
+        raise ValueError("No input values provided")
+    if len(values) > MAX_VALUES:
+        raise ValueError(f"Too many values ({len(values)}); the limit is {MAX_VALUES}")
+    columns = [values]
+    if arity == 2:
+        if not second_values:
+            raise ValueError(f"Operation '{operation}' needs second_values")
+        if len(second_values) not in (1, len(values)):
+            raise ValueError("second_values must have one value or as many values as values")
+        columns.append(second_values)
+    elif second_values:
+        raise ValueError(f"Operation '{operation}' takes a single list of values")
+
+    rows = len(values)
+    if vector_function is None:
+        results, errors = _apply_scalar(scalar_function, columns, rows)
+    else:
+        arrays = [np.asarray(column, dtype=np.float64) for column in columns]
+        with np.errstate(all="ignore"):
+            output = np.broadcast_to(vector_function(*arrays), (rows,))
+        error_mask = ~np.isfinite(output)
+        errors = error_mask.tolist()
+        results = [None if error else value for value, error in zip(output.tolist(), errors)]
+
+    return {"results": results, "errors": errors, "error_count": sum(errors)}
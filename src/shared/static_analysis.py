@@ -0,0 +1,369 @@
+"""
+Shared Static Analysis for Generated Python Code
+
+This module checks model-generated code locally and deterministically
+before an expensive model review. The code is parsed once with ast and
+checked for:
+
+- E999 syntax errors (nothing else runs when the code doesn't parse)
+- pyflakes-style checks: F821 undefined names, F401 unused imports,
+  F841 unused local variables, F811 redefined unused functions,
+  F541 f-strings without placeholders, F632 `is` with a literal
+- common lint: E711/E712 comparisons to None/True/False, E722 bare except,
+  B006 mutable default arguments
+- C901 McCabe cyclomatic complexity per function (a metric, not blocking)
+
+Name checks are deliberately conservative (a name bound anywhere in the
+module counts as defined), so a finding is almost always a real problem.
+Like pyflakes, string annotations are parsed (a TYPE_CHECKING import used
+only in "List[Decimal]" is used), and __module__/__qualname__ in a class
+body and __class__ in a method are defined.
+"""
+
+import ast
+import builtins
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MAX_COMPLEXITY = 10
+
+# Codes that make the code not "lint-clean"; C901 is informational
+BLOCKING_CODES = frozenset({"E999", "F821", "F401", "F841", "F811", "F541", "F632", "E711", "E712", "E722", "B006"})
+
+_BUILTINS = frozenset(dir(builtins)) | {"__file__", "__name__", "__doc__", "__spec__", "__builtins__", "__annotations__"}
+_DECISIONS = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.comprehension, ast.Assert)
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+# Defined implicitly in a class body, and (__class__) in the methods of a class
+_CLASS_BODY_NAMES = frozenset({"__module__", "__qualname__"})
+
+
+class Finding:
+    """One static-analysis finding"""
+
+    __slots__ = ("line", "code", "message")
+
+    def __init__(self, line: int, code: str, message: str):
+        self.line = line
+        self.code = code
+        self.message = message
+
+    @property
+    def blocking(self) -> bool:
+        return self.code in BLOCKING_CODES
+
+    def __str__(self) -> str:
+        return f"line {self.line}: {self.code} {self.message}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"line": self.line, "code": self.code, "message": self.message}
+
+
+class AnalysisReport:
+    """Findings and complexity metrics of one source file"""
+
+    def __init__(self, findings: List[Finding], functions: List[Dict[str, Any]], lines: int):
+        self.findings = sorted(findings, key=lambda finding: (finding.line, finding.code))
+        self.functions = functions
+        self.lines = lines
+
+    @property
+    def parses(self) -> bool:
+        return not any(finding.code == "E999" for finding in self.findings)
+
+    @property
+    def clean(self) -> bool:
+        """Syntactically valid and free of blocking lint findings"""
+        return not any(finding.blocking for finding in self.findings)
+
+    @property
+    def max_complexity(self) -> int:
+        return max((function["complexity"] for function in self.functions), default=0)
+
+    def summary(self, limit: int = 20) -> str:
+        """Compact one-finding-per-line text for prompts"""
+        if not self.findings:
+            return f"No static-analysis findings ({len(self.functions)} functions, max complexity {self.max_complexity})."
+        lines = [str(finding) for finding in self.findings[:limit]]
+        if len(self.findings) > limit:
+            lines.append(f"... and {len(self.findings) - limit} more")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "parses": self.parses,
+            "clean": self.clean,
+            "lines": self.lines,
+            "findings": [finding.to_dict() for finding in self.findings],
+            "functions": self.functions,
+            "max_complexity": self.max_complexity,
+        }
+
+
+def _complexity(function: ast.AST) -> int:
+    """McCabe complexity: 1 + decision points, not counting nested functions/classes"""
+    complexity = 1
+    stack = list(ast.iter_child_nodes(function))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _FUNCTIONS + (ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, _DECISIONS):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        elif isinstance(node, ast.match_case):
+            complexity += 1
+        stack.extend(ast.iter_child_nodes(node))
+    return complexity
+
+
+def _bound_names(tree: ast.AST) -> Set[str]:
+    """Every name bound anywhere in the module"""
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, _FUNCTIONS + (ast.ClassDef,)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            names.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            names.add(node.rest)
+    return names
+
+
+def _loaded_names(node: ast.AST) -> Set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)}
+
+
+def _string_annotation_names(tree: ast.AST) -> List[ast.Name]:
+    """
+    Names used in string annotations ("Foo", List["Foo"]), parsed like pyflakes does
+
+    The names get the line of their string; strings that don't parse are skipped.
+    """
+    annotations = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.arg) and node.annotation is not None:
+            annotations.append(node.annotation)
+        elif isinstance(node, _FUNCTIONS) and node.returns is not None:
+            annotations.append(node.returns)
+        elif isinstance(node, ast.AnnAssign):
+            annotations.append(node.annotation)
+
+    names: List[ast.Name] = []
+    while annotations:
+        annotation = annotations.pop()
+        for node in ast.walk(annotation):
+            if not (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+                continue
+            try:
+                parsed = ast.parse(node.value.strip(), mode="eval")
+            except SyntaxError:
+                continue
+            for child in ast.walk(parsed):
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                    child.lineno = node.lineno
+                    names.append(child)
+            annotations.append(parsed.body)  # Strings nested in the string, e.g. "List['Foo']"
+    return names
+
+
+def _implicitly_defined(tree: ast.AST) -> Set[int]:
+    """ids of the Name nodes that read __module__/__qualname__ in a class body or __class__ in a method"""
+    nodes: Set[int] = set()
+    for class_node in ast.walk(tree):
+        if not isinstance(class_node, ast.ClassDef):
+            continue
+        for statement in class_node.body:
+            if isinstance(statement, _FUNCTIONS):
+                nodes.update(id(node) for node in ast.walk(statement) if isinstance(node, ast.Name) and node.id == "__class__")
+            elif not isinstance(statement, ast.ClassDef):
+                for node in [statement] + list(_walk_scope(statement)):
+                    if isinstance(node, ast.Name) and node.id in _CLASS_BODY_NAMES:
+                        nodes.add(id(node))
+    return nodes
+
+
+def _dunder_all(tree: ast.Module) -> Set[str]:
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                return {elt.value for elt in node.value.elts if isinstance(elt, ast.Constant) and isinstance(elt.value, str)}
+    return set()
+
+
+def _check_imports(tree: ast.Module, loaded: Set[str], findings: List[Finding]) -> None:
+    exported = _dunder_all(tree)
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            continue
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            name = (alias.asname or alias.name).split(".")[0]
+            if name not in loaded and name not in exported:
+                findings.append(Finding(node.lineno, "F401", f"'{alias.name}' imported but unused"))
+
+
+def _walk_scope(function: ast.AST):
+    """Nodes of a function body, not descending into nested functions, classes and lambdas"""
+    stack = list(ast.iter_child_nodes(function))
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, _FUNCTIONS + (ast.ClassDef, ast.Lambda)):
+            stack.extend(ast.iter_child_nodes(node))
+
+
+def _check_function_locals(function: ast.AST, findings: List[Finding]) -> None:
+    declared: Set[str] = set()
+    assigned: Dict[str, int] = {}
+    for node in _walk_scope(function):
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            declared.update(node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                # Like pyflakes, tuple unpacking is not reported
+                if isinstance(target, ast.Name):
+                    assigned.setdefault(target.id, node.lineno)
+    # Uses in nested functions (closures) count; like pyflakes, `x += 1` and `del x` are uses too
+    used = _loaded_names(function)
+    for node in ast.walk(function):
+        if isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+            used.add(node.target.id)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Del):
+            used.add(node.id)
+    for name, line in assigned.items():
+        if name not in used and name not in declared and name != "_" and not name.startswith("__"):
+            findings.append(Finding(line, "F841", f"local variable '{name}' is assigned to but never used"))
+
+
+def _check_redefinitions(body: List[ast.stmt], findings: List[Finding]) -> None:
+    defined: Dict[str, ast.AST] = {}
+    for statement in body:
+        if isinstance(statement, _FUNCTIONS + (ast.ClassDef,)):
+            previous = defined.get(statement.name)
+            decorated = statement.decorator_list or (previous is not None and previous.decorator_list)
+            if previous is not None and not decorated:
+                findings.append(
+                    Finding(statement.lineno, "F811", f"redefinition of unused '{statement.name}' from line {previous.lineno}")
+                )
+        for name in _loaded_names(statement):
+            defined.pop(name, None)
+        if isinstance(statement, _FUNCTIONS + (ast.ClassDef,)):
+            defined[statement.name] = statement
+        if isinstance(statement, ast.ClassDef):
+            _check_redefinitions(statement.body, findings)
+
+
+def _check_node(node: ast.AST, findings: List[Finding], format_specs: Set[int]) -> None:
+    if (
+        isinstance(node, ast.JoinedStr)
+        and id(node) not in format_specs
+        and not any(isinstance(value, ast.FormattedValue) for value in node.values)
+    ):
+        findings.append(Finding(node.lineno, "F541", "f-string is missing placeholders"))
+    elif isinstance(node, ast.Compare):
+        for operator, comparator in zip(node.ops, node.comparators):
+            if isinstance(operator, (ast.Eq, ast.NotEq)) and isinstance(comparator, ast.Constant):
+                if comparator.value is None:
+                    findings.append(Finding(node.lineno, "E711", "comparison to None should use 'is' / 'is not'"))
+                elif comparator.value is True or comparator.value is False:
+                    findings.append(Finding(node.lineno, "E712", f"comparison to {comparator.value} should use the value directly"))
+            elif isinstance(operator, (ast.Is, ast.IsNot)) and isinstance(comparator, ast.Constant):
+                if comparator.value is not None and not isinstance(comparator.value, bool) and comparator.value is not ...:
+                    findings.append(Finding(node.lineno, "F632", "use ==/!= to compare with a literal"))
+    elif isinstance(node, ast.ExceptHandler) and node.type is None:
+        findings.append(Finding(node.lineno, "E722", "bare 'except:'; catch specific exceptions"))
+    elif isinstance(node, _FUNCTIONS + (ast.Lambda,)):
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)):
+                findings.append(Finding(default.lineno, "B006", "mutable default argument; use None and create it inside"))
+
+
+def analyze_code(source: str, max_complexity: int = MAX_COMPLEXITY, filename: str = "<generated>") -> AnalysisReport:
+    """
+    Statically analyze Python source
+
+    Args:
+        source: Python source code
+        max_complexity: Functions above this cyclomatic complexity get a C901 finding
+        filename: Name used in syntax error messages
+
+    Returns:
+        An AnalysisReport with the findings and per-function complexity
+    """
+    lines = len(source.splitlines())
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        return AnalysisReport([Finding(e.lineno or 0, "E999", f"SyntaxError: {e.msg}")], [], lines)
+
+    findings: List[Finding] = []
+    functions: List[Dict[str, Any]] = []
+    annotation_names = _string_annotation_names(tree)
+    loaded = _loaded_names(tree) | {node.id for node in annotation_names}
+    star_import = any(
+        isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names) for node in ast.walk(tree)
+    )
+
+    if not star_import:
+        defined = _bound_names(tree) | _BUILTINS
+        implicit = _implicitly_defined(tree)
+        reported: Set[str] = set()
+        for node in list(ast.walk(tree)) + annotation_names:
+            if (
+                isinstance(node, ast.Name)
+                and isinstance(node.ctx, ast.Load)
+                and node.id not in defined
+                and node.id not in reported
+                and id(node) not in implicit
+            ):
+                reported.add(node.id)
+                findings.append(Finding(node.lineno, "F821", f"undefined name '{node.id}'"))
+
+    _check_imports(tree, loaded, findings)
+    _check_redefinitions(tree.body, findings)
+    # The `.2f` of f"{x:.2f}" is itself a JoinedStr without placeholders; not an F541
+    format_specs = {
+        id(node.format_spec) for node in ast.walk(tree) if isinstance(node, ast.FormattedValue) and node.format_spec
+    }
+    for node in ast.walk(tree):
+        _check_node(node, findings, format_specs)
+        if isinstance(node, _FUNCTIONS):
+            _check_function_locals(node, findings)
+            complexity = _complexity(node)
+            functions.append({
+                "name": node.name,
+                "line": node.lineno,
+                "complexity": complexity,
+                "lines": (node.end_lineno or node.lineno) - node.lineno + 1,
+            })
+            if complexity > max_complexity:
+                findings.append(Finding(node.lineno, "C901", f"'{node.name}' is too complex ({complexity})"))
+
+    return AnalysisReport(findings, functions, lines)
+
+
+def format_findings(findings: Optional[List[Dict[str, Any]]], limit: int = 20) -> str:
+    """Format findings stored in state (dicts) one per line"""
+    if not findings:
+        return "none"
+    lines = [f"line {finding['line']}: {finding['code']} {finding['message']}" for finding in findings[:limit]]
+    if len(findings) > limit:
+        lines.append(f"... and {len(findings) - limit} more")
+    return "\n".join(lines)
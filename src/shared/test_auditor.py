@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-criteria audits (shared/auditor.py), with a scripted auditor
+instead of model calls.
+
+Run with: python -m pytest src/shared/test_auditor.py
+      or: python src/shared/test_auditor.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.auditor import LLMAuditor
+
+
+class _ScriptedAuditor(LLMAuditor):
+    """
+    Criterion "add:<tag>" asks to append <tag> until the response has it;
+    "block" always objects, "fail" reports a failed audit and "hang" never answers
+    """
+
+    def __init__(self, delays=None):
+        super().__init__(name="ScriptedAuditor", timeout_seconds=1.0)
+        self.delays = delays or {}
+        self.audited = []
+
+    async def audit_response(self, original_response, audit_criteria):
+        self.audited.append((audit_criteria, original_response))
+        await asyncio.sleep(self.delays.get(audit_criteria, 0))
+        if audit_criteria == "hang":
+            await asyncio.sleep(3600)
+        if audit_criteria == "fail":
+            return {"needs_improvement": False, "improved_response": "", "audit_notes": "Audit failed", "audit_error": True}
+        if audit_criteria == "block":
+            return {"needs_improvement": True, "improved_response": "", "audit_notes": "unsafe"}
+        tag = audit_criteria.split(":", 1)[1]
+        if tag in original_response:
+            return {"needs_improvement": False, "improved_response": "", "audit_notes": ""}
+        return {"needs_improvement": True, "improved_response": f"{original_response} {tag}", "audit_notes": f"add {tag}"}
+
+
+def test_improvements_are_chained():
+    """Regression: only the first criterion's improvement was kept"""
+    auditor = _ScriptedAuditor(delays={"add:first": 0.02})  # finishes last; still goes first
+    result = asyncio.run(auditor.audit_response_multi("Hello", ["add:first", "add:second", "add:third"], blocking_criteria=()))
+    assert result["improved_response"] == "Hello first second third", f"❌ {result['improved_response']}"
+    assert result["needs_improvement"] and result["chained_audits"] == 2
+    assert ("add:second", "Hello first") in auditor.audited, "❌ later criteria must audit the revision"
+
+
+def test_single_improvement_runs_no_extra_audits():
+    auditor = _ScriptedAuditor()
+    result = asyncio.run(auditor.audit_response_multi("Hello second", ["add:first", "add:second"], blocking_criteria=()))
+    assert result["improved_response"] == "Hello second first" and result["chained_audits"] == 0
+    assert len(auditor.audited) == 2
+
+
+def test_nothing_to_improve():
+    result = asyncio.run(_ScriptedAuditor().audit_response_multi("a b", ["add:a", "add:b"], blocking_criteria=()))
+    assert not result["needs_improvement"] and result["improved_response"] == ""
+
+
+def test_blocking_criterion_cancels_the_rest():
+    auditor = _ScriptedAuditor(delays={"add:slow": 0.5})
+    result = asyncio.run(auditor.audit_response_multi("Hello", ["add:slow", "block"], blocking_criteria=("block",)))
+    assert result["blocked"] and result["blocking_criterion"] == "block"
+    assert result["cancelled"] == 1 and result["results"][0] is None
+
+
+def test_blocking_criterion_that_does_not_finish_blocks():
+    """Regression: a content filter that timed out or failed let the response through"""
+    auditor = _ScriptedAuditor()
+    for criterion, reason in (("hang", "timeout"), ("fail", "error")):
+        result = asyncio.run(auditor.audit_response_multi(
+            "Hello", ["add:x", criterion], blocking_criteria=(criterion,), timeout_seconds=0.1
+        ))
+        assert result["blocked"] and result["blocked_reason"] == reason, f"❌ {criterion}: {result}"
+        assert result["timed_out" if reason == "timeout" else "errors"] == [1]
+
+
+def test_fail_open_is_opt_in():
+    result = asyncio.run(_ScriptedAuditor().audit_response_multi(
+        "Hello", ["add:x", "hang"], blocking_criteria=("hang",), timeout_seconds=0.1, fail_closed=False
+    ))
+    assert not result["blocked"] and result["timed_out"] == [1] and result["improved_response"] == "Hello x"
+
+
+def test_chain_shares_one_budget():
+    """Regression: each re-audit had a full budget, so the chain took (N-1) budgets"""
+    criteria = ["add:a", "add:b", "add:c", "add:d"]
+    auditor = _ScriptedAuditor(delays=dict.fromkeys(criteria, 0.3))
+    started = time.perf_counter()
+    result = asyncio.run(auditor.audit_response_multi("Hello", criteria, blocking_criteria=(), timeout_seconds=0.4))
+    elapsed = time.perf_counter() - started
+    assert elapsed < 2 * 0.4 + 0.1, f"❌ took {elapsed:.2f}s for a 0.4s budget"
+    assert result["improved_response"] == "Hello a b", f"❌ {result['improved_response']}"
+    assert result["chained_audits"] == 2 and result["chain_skipped"] == 1 and result["timed_out"] == [2]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk translator (shared/batch_translation.py): concurrency of
+split retries and per-batch call counts, with a simulated model.
+
+Run with: python -m pytest src/shared/test_batch_translation.py
+      or: python src/shared/test_batch_translation.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.batch_translation import BatchTranslator
+
+TEXTS = [f"Button label number {i}" for i in range(16)]
+
+
+class _SimulatedModel:
+    """Uppercases the strings; answers chunks larger than max_items with a wrong-length array"""
+
+    def __init__(self, max_items: int = 1, latency: float = 0.01):
+        self.max_items = max_items
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def __call__(self, prompt: str, count: int) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        strings = json.loads(prompt[prompt.index("["):])
+        if len(strings) > self.max_items:
+            return json.dumps(strings[:1])
+        return json.dumps([text.upper() for text in strings])
+
+
+def test_split_retries_respect_max_concurrency():
+    """Regression: both halves of a split ran under the parent chunk's single permit"""
+    model = _SimulatedModel(max_items=1)
+    translator = BatchTranslator(generate=model, max_concurrency=2, max_items_per_chunk=8)
+    result = asyncio.run(translator.translate(TEXTS, "spanish"))
+    assert [item["translation"] for item in result["translations"]] == [text.upper() for text in TEXTS]
+    assert model.peak <= 2, f"❌ {model.peak} model calls in flight, limit 2"
+    assert result["stats"]["model_calls"] == model.calls
+    assert result["stats"]["splits"] == 14  # 2 chunks of 8 split down to 16 single strings
+
+
+def test_concurrent_batches_count_their_own_calls():
+    model = _SimulatedModel(max_items=4)
+    translator = BatchTranslator(generate=model, max_concurrency=4, max_items_per_chunk=4)
+
+    async def scenario():
+        return await asyncio.gather(
+            translator.translate(TEXTS[:8], "french"),   # 2 calls
+            translator.translate(TEXTS[:12], "german"),  # 3 calls
+        )
+
+    first, second = asyncio.run(scenario())
+    assert first["stats"]["model_calls"] == 2, f"❌ {first['stats']}"
+    assert second["stats"]["model_calls"] == 3, f"❌ {second['stats']}"
+    assert translator.model_calls == 5
+
+
+def test_unusable_single_string_is_an_error():
+    async def broken(prompt: str, count: int) -> str:
+        return "not json"
+
+    result = asyncio.run(BatchTranslator(generate=broken).translate(["Save", "Cancel"], "spanish"))
+    assert result["status"] == "error"
+    assert [item["source"] for item in result["translations"]] == ["error", "error"]
+
+
+def test_duplicates_are_translated_once_and_order_is_kept():
+    model = _SimulatedModel(max_items=100)
+    result = asyncio.run(BatchTranslator(generate=model).translate(["b", "a", "b"], "spanish"))
+    assert [item["translation"] for item in result["translations"]] == ["B", "A", "B"]
+    assert result["stats"]["distinct"] == 2 and model.calls == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the safe expression engine (shared/expressions.py): the vectorized
+evaluator must agree with the scalar one, row by row.
+
+Run with: python -m pytest src/shared/test_expressions.py
+      or: python src/shared/test_expressions.py
+"""
+
+import math
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared import expressions
+from shared.expressions import ExpressionError, compile_expression
+
+XS = [-3.0, -1.0, 0.0, 0.5, 1.0, 2.0, 7.0]
+
+EXPRESSIONS = [
+    "2**64 + x",
+    "10**20 * x",
+    "2**-1 + x",
+    "-2**63 - x",
+    "3**40 * x",
+    "7 // 2 + x",
+    "-3 % 2 + x",
+    "x / 4 - 1",
+    "(x + 1) ** 2",
+    "x ** 0.5",
+    "1 / x",
+    "x // 0.3",
+    "10**400 + x",
+]
+
+
+def _scalar(compiled, x):
+    """Scalar result as a float, or None where it errors or isn't finite"""
+    try:
+        value = float(compiled.evaluate({"x": x}))
+    except (ExpressionError, OverflowError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _assert_matches_scalar(expression, results, errors):
+    compiled = compile_expression(expression)
+    for x, result, error in zip(XS, results, errors):
+        expected = _scalar(compiled, x)
+        if expected is None:
+            assert error and result is None, f"❌ {expression} at x={x}: expected an error, got {result}"
+        else:
+            assert not error and math.isclose(result, expected, rel_tol=1e-12), \
+                f"❌ {expression} at x={x}: vectorized {result}, scalar {expected}"
+
+
+def test_vectorized_matches_scalar():
+    for expression in EXPRESSIONS:
+        results, errors = compile_expression(expression).evaluate_vectorized({"x": XS})
+        _assert_matches_scalar(expression, results, errors)
+
+
+def test_python_fallback_matches_scalar():
+    numpy = expressions.np
+    expressions.np = None
+    try:
+        for expression in EXPRESSIONS:
+            results, errors = compile_expression(expression).evaluate_vectorized({"x": XS})
+            _assert_matches_scalar(expression, results, errors)
+    finally:
+        expressions.np = numpy
+
+
+def test_large_int_constants_do_not_wrap():
+    """Regression: int constants became int64 and wrapped around"""
+    results, _ = compile_expression("2**64 + x").evaluate_vectorized({"x": [1, 2]})
+    assert results == [2.0**64 + 1, 2.0**64 + 2], f"❌ {results}"
+    results, _ = compile_expression("10**20*x").evaluate_vectorized({"x": [1, 2]})
+    assert results == [1e20, 2e20], f"❌ {results}"
+
+
+def test_negative_int_power_does_not_fail_the_batch():
+    results, errors = compile_expression("2**-1 + x").evaluate_vectorized({"x": [1, 2]})
+    assert results == [1.5, 2.5] and errors == [False, False], f"❌ {results}"
+
+
+def test_constant_expression_is_broadcast():
+    results, errors = compile_expression("2**10").evaluate_vectorized({})
+    assert results == [1024.0] and errors == [False]
+
+
+def test_exponent_guard_applies_to_both_paths():
+    for evaluate in (
+        lambda compiled: compiled.evaluate({"x": 2}),
+        lambda compiled: compiled.evaluate_vectorized({"x": [2, 3]}),
+    ):
+        try:
+            evaluate(compile_expression("x ** 5000"))
+        except ExpressionError:
+            continue
+        raise AssertionError("❌ exponent guard not applied")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
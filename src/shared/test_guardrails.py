@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the guardrail engine (shared/guardrails.py): matching, whole-word
+matching and the streaming output guardrail.
+
+Run with: python -m pytest src/shared/test_guardrails.py
+      or: python src/shared/test_guardrails.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from shared.guardrails import GuardrailAutomaton, StreamingOutputGuardrail
+
+TERMS = ["hate", "toxic"]
+
+
+class _Context:
+    """Minimal CallbackContext stand-in: the guardrail only reads state and invocation_id"""
+
+    def __init__(self, mode="redact"):
+        self.state = {"output_filter_mode": mode}
+        self.invocation_id = "inv-1"
+
+
+def _stream(guardrail, chunks, mode="redact"):
+    """Feed partial chunks, then the aggregated final response; return (emitted, final)"""
+    context = _Context(mode)
+    emitted = []
+    for chunk in chunks:
+        response = LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        replaced = guardrail(context, response)
+        emitted.append((replaced or response).content.parts[0].text)
+    final = LlmResponse(content=types.Content(role="model", parts=[types.Part(text="".join(chunks))]))
+    replaced = guardrail(context, final)
+    return "".join(emitted), (replaced or final).content.parts[0].text
+
+
+def test_find_all_whole_words():
+    automaton = GuardrailAutomaton(TERMS)
+    assert automaton.matched_terms("Le Château Hate") == ["hate"]
+    assert automaton.matched_terms("chateau", whole_words=True) == []
+    assert automaton.matched_terms("I HATE it, so toxic!", whole_words=True) == ["hate", "toxic"]
+    assert automaton.matched_terms("hateful", whole_words=True) == []
+
+
+def test_substring_matching_stays_the_default():
+    emitted, final = _stream(StreamingOutputGuardrail(GuardrailAutomaton(TERMS)), ["a chateau"])
+    assert final == "a c****au"
+
+
+def test_words_containing_a_term_are_not_redacted():
+    """Regression: "chateau" was redacted because it contains "hate\""""
+    guardrail = StreamingOutputGuardrail(GuardrailAutomaton(TERMS), whole_words=True)
+    emitted, final = _stream(guardrail, ["Visit the cha", "teau; I hate ", "queues"])
+    assert emitted == final == "Visit the chateau; I **** queues", f"❌ {emitted!r} / {final!r}"
+
+
+def test_term_at_a_chunk_boundary_is_settled_by_the_next_chunk():
+    guardrail = StreamingOutputGuardrail(GuardrailAutomaton(TERMS), whole_words=True)
+    emitted, final = _stream(guardrail, ["so hate", "ful", " and toxic"])
+    assert emitted.startswith("so ****ful"), "❌ the chunk had to be redacted before the next one arrived"
+    assert final == "so hateful and *****", f"❌ {final!r}"
+    emitted, final = _stream(guardrail, ["I hate", "."])
+    assert emitted == final == "I ****."
+
+
+def test_stop_mode_with_whole_words():
+    guardrail = StreamingOutputGuardrail(GuardrailAutomaton(TERMS), whole_words=True)
+    emitted, final = _stream(guardrail, ["chateau wines are ", "toxic", " today"], mode="stop")
+    assert final.startswith("chateau wines are \n\n🛡️"), f"❌ {final!r}"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache keys (shared/llm_cache.py).
+
+Run with: python -m pytest src/shared/test_llm_cache.py
+      or: python src/shared/test_llm_cache.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from shared.llm_cache import LlmResponseCache, canonicalize_request
+
+
+def _request(parts, config=None):
+    return LlmRequest(
+        model="gemini-2.5-flash",
+        contents=[
+            types.Content(role="user", parts=[types.Part(text="Where is my order?")]),
+            types.Content(role="model", parts=parts),
+        ],
+        config=config or types.GenerateContentConfig(system_instruction="You are a support agent."),
+    )
+
+
+def _call(args, call_id="adk-1", signature=None):
+    return types.Part(
+        function_call=types.FunctionCall(id=call_id, name="get_order", args=args),
+        thought_signature=signature,
+    )
+
+
+class _Context:
+    """Minimal CallbackContext stand-in: the cache only reads state and agent_name"""
+
+    def __init__(self):
+        self.state = {}
+        self.agent_name = "SupportAgent"
+
+
+def test_tool_argument_named_id_is_part_of_the_key():
+    """Regression: {'id': 1} and {'id': 2} used to hash to the same key"""
+    first = canonicalize_request(_request([_call({"id": 1})]))
+    second = canonicalize_request(_request([_call({"id": 2})]))
+    assert first[0] != second[0], "❌ different tool arguments must give different keys"
+
+
+def test_function_response_payload_id_is_part_of_the_key():
+    def response(order_id):
+        return _request([
+            types.Part(function_response=types.FunctionResponse(id="adk-1", name="get_order", response={"id": order_id}))
+        ])
+    assert canonicalize_request(response(1))[0] != canonicalize_request(response(2))[0]
+
+
+def test_call_ids_and_thought_signatures_are_ignored():
+    first = canonicalize_request(_request([_call({"id": 1}, call_id="adk-1", signature=b"a")]))
+    second = canonicalize_request(_request([_call({"id": 1}, call_id="adk-2", signature=b"b")]))
+    assert first[0] == second[0], "❌ call ids and thought signatures are volatile"
+
+
+def test_tool_schema_property_named_id_is_part_of_the_key():
+    def with_tool(property_name):
+        tool = types.Tool(function_declarations=[types.FunctionDeclaration(
+            name="get_order",
+            parameters=types.Schema(type="OBJECT", properties={property_name: types.Schema(type="INTEGER")}),
+        )])
+        return _request([types.Part(text="Let me check.")], types.GenerateContentConfig(tools=[tool]))
+    assert canonicalize_request(with_tool("id"))[0] != canonicalize_request(with_tool("order_number"))[0]
+
+
+def test_ignored_config_fields():
+    base = types.GenerateContentConfig(system_instruction="x")
+    labelled = types.GenerateContentConfig(system_instruction="x", labels={"team": "support"})
+    parts = [types.Part(text="ok")]
+    assert canonicalize_request(_request(parts, base))[0] == canonicalize_request(_request(parts, labelled))[0]
+
+
+def test_cache_does_not_serve_another_orders_answer():
+    cache = LlmResponseCache()
+    context = _Context()
+    first = _request([_call({"id": 1})])
+    assert cache.before_model_callback(context, first) is None
+    answer = LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Order 1 shipped")]))
+    cache.after_model_callback(context, answer)
+
+    assert cache.before_model_callback(context, _request([_call({"id": 1}, call_id="adk-9")])) is not None
+    assert cache.before_model_callback(context, _request([_call({"id": 2})])) is None, "❌ served order 1 for order 2"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
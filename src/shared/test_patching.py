@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the unified diff helpers (shared/patching.py).
+
+Run with: python -m pytest src/shared/test_patching.py
+      or: python src/shared/test_patching.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.patching import PatchError, apply_unified_diff, extract_code_block, extract_fenced_block, parse_unified_diff
+
+ORIGINAL = """def total(items):
+    result = 0
+    for item in items:
+        result += item
+    return result
+"""
+
+
+def test_applies_a_hunk_and_rejects_a_mismatch():
+    diff = """--- a/solution.py
++++ b/solution.py
+@@ -1,5 +1,2 @@
+ def total(items):
+-    result = 0
+-    for item in items:
+-    result += item
+-    return result
++    return sum(items)
+"""
+    try:
+        apply_unified_diff(ORIGINAL, diff)
+    except PatchError:
+        pass
+    else:
+        raise AssertionError("❌ a hunk that doesn't match must not be applied")
+    fixed = diff.replace("-    result += item", "-        result += item")
+    assert apply_unified_diff(ORIGINAL, fixed) == "def total(items):\n    return sum(items)\n"
+
+
+def test_wrong_line_numbers_are_tolerated():
+    diff = "@@ -40,2 +40,2 @@\n     for item in items:\n-        result += item\n+        result += item * 2\n"
+    assert "result += item * 2" in apply_unified_diff(ORIGINAL, diff)
+
+
+def test_removed_and_added_lines_that_look_like_file_headers():
+    """Regression: '--- x' / '+++ x' inside a hunk ended it as if a new file started"""
+    original = 'USAGE = """\n-- options --\n  -v  verbose\n"""\n'
+    diff = (
+        "--- a/cli.py\n"
+        "+++ b/cli.py\n"
+        "@@ -1,4 +1,4 @@\n"
+        ' USAGE = """\n'
+        "--- options --\n"
+        "+++ flags ++\n"
+        "   -v  verbose\n"
+        ' """\n'
+    )
+    assert apply_unified_diff(original, diff) == 'USAGE = """\n++ flags ++\n  -v  verbose\n"""\n'
+    hunk, = parse_unified_diff(diff)
+    assert hunk.old_lines[1] == "-- options --" and hunk.new_lines[1] == "++ flags ++"
+
+
+def test_second_file_after_a_complete_hunk_is_ignored():
+    diff = (
+        "@@ -5 +5 @@\n"
+        "-    return result\n"
+        "+    return int(result)\n"
+        "diff --git a/other.py b/other.py\n"
+        "--- a/other.py\n"
+        "+++ b/other.py\n"
+    )
+    assert apply_unified_diff(ORIGINAL, diff).endswith("    return int(result)\n")
+
+
+def test_hunk_longer_than_its_counts_is_kept_whole():
+    # Models often undercount; extra body lines still belong to the hunk
+    diff = "@@ -4,1 +4,1 @@\n         result += item\n-    return result\n+    return result or None\n"
+    assert apply_unified_diff(ORIGINAL, diff).endswith("    return result or None\n")
+
+
+def test_blank_lines_after_a_complete_hunk_are_ignored():
+    """Regression: the blank line before a closing fence was added to the hunk as context"""
+    fenced = "```diff\n@@ -4,1 +4,1 @@\n-    return result\n+    return result or None\n\n```\n"
+    diff = extract_fenced_block(fenced, ("diff",))
+    assert apply_unified_diff(ORIGINAL, diff).endswith("    return result or None\n")
+    assert apply_unified_diff(ORIGINAL, diff + "\n \n").endswith("    return result or None\n")
+
+
+def test_blank_lines_inside_an_undercounted_hunk_are_kept():
+    original = "a = 1\n\nb = 2\n"
+    diff = "@@ -1,1 +1,1 @@\n-a = 1\n+a = 3\n\n b = 2\n"
+    assert apply_unified_diff(original, diff) == "a = 3\n\nb = 2\n"
+
+
+def test_pure_insertion_and_no_newline_marker():
+    diff = "@@ -0,0 +1 @@\n+import math\n\\ No newline at end of file\n"
+    assert apply_unified_diff(ORIGINAL, diff).startswith("import math\ndef total")
+
+
+def test_malformed_diffs():
+    for diff in ("", "just some text\n", "--- a/x\n+++ b/x\n"):
+        try:
+            apply_unified_diff(ORIGINAL, diff)
+        except PatchError:
+            continue
+        raise AssertionError(f"❌ accepted malformed diff {diff!r}")
+
+
+def test_extract_code_block():
+    assert extract_code_block("Here:\n```python\nx = 1\n```\n") == "x = 1\n"
+    assert extract_code_block("```diff\n-a\n```\n```python\ny = 2\n```") == "y = 2\n"
+    assert extract_code_block("z = 3") == "z = 3\n"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the tool policy engine (shared/policy.py): role checks and
+argument rules.
+
+Run with: python -m pytest src/shared/test_policy.py
+      or: python src/shared/test_policy.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.policy import ToolPolicy
+
+SPEC = {
+    "tools": {
+        "get_weather_forecast": {
+            "roles": ["basic", "premium"],
+            "rules": [{"arg": "days", "roles": ["basic"], "min": 1, "max": 3}],
+        },
+        "get_secret": {"roles": ["admin"]},
+    },
+    "global_rules": [{"arg": "location", "block_if_contains": ["block"], "message": "Blocked"}],
+}
+
+
+def _forecast(days, role="basic"):
+    return ToolPolicy(SPEC).evaluate(role, "get_weather_forecast", {"location": "Tokyo", "days": days})
+
+
+def test_numeric_days_are_clamped():
+    assert _forecast(10).arg_updates == {"days": 3}
+    assert _forecast(0).arg_updates == {"days": 1}
+    assert _forecast(2).arg_updates == {}
+    assert _forecast(10, role="premium").arg_updates == {}, "❌ the rule only applies to basic users"
+
+
+def test_numeric_strings_are_clamped():
+    """Regression: days="10" skipped the clamp and got a 10-day forecast"""
+    decision = _forecast("10")
+    assert decision.allowed and decision.arg_updates == {"days": 3}, f"❌ {decision}"
+    assert _forecast(" 2 ").arg_updates == {"days": 2}
+    assert _forecast("2.5").arg_updates == {"days": 2.5}
+
+
+def test_non_numeric_values_are_refused():
+    for days in ("ten", "nan", "inf", True, None, [10]):
+        decision = _forecast(days)
+        assert not decision.allowed and "error" in decision.response, f"❌ days={days!r}: {decision}"
+
+
+def test_cached_decision_is_not_reused_for_a_bool():
+    policy = ToolPolicy(SPEC)
+    assert policy.evaluate("basic", "get_weather_forecast", {"days": 1}).allowed
+    assert not policy.evaluate("basic", "get_weather_forecast", {"days": True}).allowed
+
+
+def test_roles_and_blocked_arguments():
+    policy = ToolPolicy(SPEC)
+    assert not policy.evaluate("basic", "get_secret", {}).allowed
+    assert policy.evaluate("admin", "get_secret", {}).allowed
+    blocked = policy.evaluate("premium", "get_weather_forecast", {"location": "Blockville"})
+    assert not blocked.allowed and blocked.response == {"result": "Blocked", "blocked": True}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the callback profiler (shared/profiling.py): timing and the notes
+callbacks attach to their sampled events.
+
+Run with: python -m pytest src/shared/test_profiling.py
+      or: python src/shared/test_profiling.py
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.profiling import CallbackProfiler
+
+
+class _Context:
+    """Minimal CallbackContext stand-in: events read agent_name and invocation_id"""
+
+    agent_name = "Agent"
+    invocation_id = "inv-1"
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def emit(self, record):
+        self.events.append(json.loads(record.getMessage()))
+
+
+def _profiled(sample_rate):
+    profiler = CallbackProfiler(sample_rate=sample_rate, slow_threshold_ms=1000)
+    capture = _Capture()
+    logger = logging.getLogger("shared.profiling")
+    logger.addHandler(capture)
+    logger.setLevel(logging.INFO)
+    return profiler, capture, lambda: logger.removeHandler(capture)
+
+
+def test_notes_are_attached_to_sampled_events():
+    profiler, capture, done = _profiled(sample_rate=1.0)
+    try:
+        def before_agent(callback_context):
+            profiler.note("blocked", reason={"role": "basic"})
+            return "override"
+
+        async def after_agent(callback_context):
+            await asyncio.sleep(0)
+            profiler.note("audited")
+            return None
+
+        assert profiler.wrap(before_agent, "before_agent_callback")(_Context()) == "override"
+        asyncio.run(profiler.wrap(after_agent, "after_agent_callback")(callback_context=_Context()))
+    finally:
+        done()
+    first, second = capture.events
+    assert first["notes"] == [{"message": "blocked", "reason": {"role": "basic"}}] and first["outcome"] == "override"
+    assert second["notes"] == [{"message": "audited"}] and second["agent"] == "Agent"
+
+
+def test_unsampled_notes_are_dropped():
+    profiler, capture, done = _profiled(sample_rate=0.0)
+    try:
+        wrapped = profiler.wrap(lambda callback_context: profiler.note("quiet"), "before_model_callback", "quiet")
+        for _ in range(50):
+            wrapped(_Context())
+    finally:
+        done()
+    assert capture.events == [], "❌ unsampled invocations must not log"
+    assert profiler.export_json()["callbacks"][0]["count"] == 50
+
+
+def test_notes_do_not_leak_between_invocations():
+    profiler, capture, done = _profiled(sample_rate=1.0)
+    try:
+        wrapped = profiler.wrap(lambda callback_context: profiler.note("once"), "before_model_callback", "once")
+        wrapped(_Context())
+        wrapped(_Context())
+        profiler.note("outside a callback")  # debug log only
+    finally:
+        done()
+    assert [event["notes"] for event in capture.events] == [[{"message": "once"}]] * 2
+
+
+def test_errors_are_counted():
+    profiler, _, done = _profiled(sample_rate=0.0)
+    def failing(callback_context):
+        raise RuntimeError("boom")
+    try:
+        profiler.wrap(failing, "after_model_callback")(_Context())
+    except RuntimeError:
+        pass
+    finally:
+        done()
+    assert profiler.export_json()["callbacks"][0]["errors"] == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
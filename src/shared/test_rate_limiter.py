@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the rate limiter (shared/rate_limiter.py): quotas, over-quota
+costs and eviction of idle keys from the in-memory backend.
+
+Run with: python -m pytest src/shared/test_rate_limiter.py
+      or: python src/shared/test_rate_limiter.py
+"""
+
+import math
+import os
+import sys
+import time
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.rate_limiter import ALGORITHMS, RateLimit, RateLimiter
+
+PERIOD = 0.05
+
+
+def _limiter(algorithm, sweep=0.0, period=PERIOD):
+    return RateLimiter(RateLimit(2, period), algorithm=algorithm, shards=1, idle_sweep_seconds=sweep)
+
+
+def test_quota_is_enforced():
+    for algorithm in ALGORITHMS:
+        limiter = RateLimiter(RateLimit(3, 60), algorithm=algorithm)
+        assert [limiter.acquire("u", "t")[0] for _ in range(4)] == [True, True, True, False], algorithm
+        allowed, retry_after = limiter.acquire("u", "t")
+        assert not allowed and 0 < retry_after <= 60
+        assert limiter.acquire("other", "t")[0], "❌ quotas are per user"
+
+
+def test_cost_above_the_whole_limit_is_never_admitted():
+    limiter = RateLimiter(RateLimit(20, 60), {"forecast": RateLimit(5, 60)})
+    assert limiter.limit_for("forecast").requests == 5 and limiter.limit_for("other").requests == 20
+    assert limiter.acquire("u", "forecast", cost=6) == (False, math.inf)
+    assert limiter.acquire("u", "forecast", cost=5) == (True, 0.0)
+
+
+def test_idle_keys_are_evicted():
+    """Regression: every (user, tool) ever seen stayed in memory"""
+    for algorithm in ALGORITHMS:
+        limiter = _limiter(algorithm)
+        for user in range(100):
+            limiter.acquire(f"user-{user}", "get_weather")
+        assert limiter._backend.tracked_keys() == 100
+        time.sleep(PERIOD * 2.5)
+        limiter.acquire("new-user", "get_weather")
+        assert limiter._backend.tracked_keys() == 1, f"❌ {algorithm}: {limiter._backend.tracked_keys()} keys kept"
+
+
+def test_keys_with_spent_quota_are_kept():
+    for algorithm in ALGORITHMS:
+        limiter = _limiter(algorithm, period=60)
+        limiter.acquire("busy", "t")
+        limiter.acquire("busy", "t")
+        limiter.acquire("other", "t")  # sweeps, but busy's quota isn't full again
+        assert not limiter.acquire("busy", "t")[0], f"❌ {algorithm}: sweep forgot a spent quota"
+
+
+def test_sweeps_are_rate_limited():
+    limiter = _limiter("token_bucket", sweep=60)
+    for user in range(10):
+        limiter.acquire(f"user-{user}", "t")
+    time.sleep(PERIOD * 2.5)
+    limiter.acquire("late", "t")
+    assert limiter._backend.tracked_keys() == 11, "❌ shard swept before idle_sweep_seconds"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
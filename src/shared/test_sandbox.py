@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the code sandbox (shared/sandbox.py): verdicts, forged verdicts,
+the reporter/test process split, resource limits and network isolation.
+
+Run with: python -m pytest src/shared/test_sandbox.py
+      or: python src/shared/test_sandbox.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared import sandbox
+from shared.sandbox import SandboxLimits, run_in_sandbox
+
+SOLUTION = "def add(a, b):\n    return a + b\n"
+TESTS = "from solution import *\n\ndef test_add():\n    assert add(2, 3) == 5\n"
+
+FORGED_RESULT = """
+import json, os
+json.dump({"import_ok": True, "tests": [{"name": "test_add", "passed": True}]}, open("result.json", "w"))
+os._exit(0)
+"""
+
+FORGED_TEST = """
+import json, os
+
+def test_add():
+    json.dump({"import_ok": True, "tests": [{"name": "test_add", "passed": True}]}, open("result.json", "w"))
+    os._exit(0)
+"""
+
+# Writes a forged verdict through the reporter's helper, then exits before the tests run
+FORGED_REPORT = """
+import __main__, os
+__main__._report({"network": "namespace", "import_ok": True, "tests": [{"name": "test_add", "passed": True}]})
+os._exit(0)
+"""
+
+PROBE_REPORTER = """
+import glob, os
+
+def _opens(path, mode):
+    try:
+        open(path, mode).close()
+        return True
+    except OSError:
+        return False
+
+def test_reporter_is_out_of_reach():
+    reporter = f"/proc/{os.getppid()}"
+    assert not _opens(reporter + "/mem", "rb")
+    assert not any(_opens(path, "wb") for path in glob.glob(reporter + "/fd/*"))
+"""
+
+
+def _status(code, tests=TESTS, **limits):
+    return run_in_sandbox(code, tests, SandboxLimits(**limits) if limits else None)
+
+
+def test_passed_and_failed():
+    result = _status(SOLUTION)
+    assert result["status"] == "passed" and result["tests_passed"] == 1, f"❌ {result}"
+    result = _status("def add(a, b):\n    return a - b\n")
+    assert result["status"] == "failed" and result["tests_failed"] == 1, f"❌ {result}"
+
+
+def test_import_error():
+    result = _status("raise RuntimeError('boom')\n")
+    assert result["status"] == "error" and "boom" in result["import_error"], f"❌ {result}"
+
+
+def test_forged_result_file_and_early_exit_is_an_error():
+    """Regression: the verdict was read from result.json, which the code can write"""
+    for code, tests in ((FORGED_RESULT, TESTS), ("def add(a, b):\n    return 0\n", FORGED_TEST)):
+        result = _status(code, tests)
+        assert result["status"] == "error" and result["tests_passed"] == 0, f"❌ forged verdict accepted: {result}"
+        assert result["sandbox_error"], f"❌ {result}"
+
+
+def test_code_cannot_call_the_reporter():
+    """Regression: the code ran in the reporter's interpreter and could call _report itself"""
+    result = _status(FORGED_REPORT, "def test_add():\n    assert False\n")
+    assert result["status"] == "error" and result["tests_passed"] == 0, f"❌ forged verdict accepted: {result}"
+
+
+def test_reporter_is_out_of_reach_of_the_code():
+    result = _status(SOLUTION, PROBE_REPORTER)
+    if result["network"] == "namespace":
+        assert result["status"] == "passed", f"❌ {result['tests']}"
+
+
+def test_exit_in_test_is_an_error():
+    tests = "import os\n\ndef test_quit():\n    os._exit(0)\n"
+    assert _status(SOLUTION, tests)["status"] == "error"
+
+
+def test_tampered_verdict_channel_is_an_error():
+    tests = (
+        "import os\n\ndef test_scribble():\n"
+        "    for fd in range(3, 64):\n"
+        "        try:\n"
+        "            os.write(fd, b'x {\"import_ok\": true}\\n')\n"
+        "        except OSError:\n"
+        "            pass\n"
+    )
+    result = _status(SOLUTION, tests)
+    assert result["status"] == "error" and result["sandbox_error"], f"❌ {result}"
+
+
+def test_nonce_is_not_visible_to_the_code():
+    tests = (
+        "import os, sys\n\ndef test_look():\n"
+        "    assert sys.stdin.read() == ''\n"
+        "    assert len(sys.argv) == 2 and 'nonce' not in sys.argv[1]\n"
+    )
+    assert _status(SOLUTION, tests)["status"] == "passed"
+
+
+def test_timeout():
+    result = _status("import time\ntime.sleep(30)\n", wall_seconds=1)
+    assert result["status"] == "timeout" and result["duration_ms"] < 5000, f"❌ {result}"
+
+
+def test_cpu_limit():
+    result = _status("while True:\n    pass\n", cpu_seconds=1, wall_seconds=10)
+    assert result["status"] == "cpu_limit", f"❌ {result}"
+
+
+def test_memory_limit():
+    result = _status("data = bytearray(1024 * 1024 * 1024)\n", memory_mb=128)
+    assert result["status"] == "memory_limit", f"❌ {result}"
+
+
+def test_large_verdict_does_not_block():
+    tests = "".join(f"def test_{i}():\n    assert False, '{'x' * 400}'\n" for i in range(400))
+    result = _status(SOLUTION, tests, wall_seconds=10)
+    assert result["status"] == "failed" and result["tests_failed"] == 400, f"❌ {result['status']}"
+
+
+def test_network_is_isolated_or_the_run_fails_closed():
+    tests = "import socket\n\ndef test_connect():\n    socket.create_connection(('1.1.1.1', 53), timeout=1)\n"
+    result = _status(SOLUTION, tests)
+    if result["network"] == "namespace":
+        assert result["status"] == "failed", f"❌ {result}"
+    else:
+        assert result["status"] == "error" and result["sandbox_error"], f"❌ {result}"
+
+
+def test_without_namespaces_the_run_fails_closed():
+    runner = sandbox._RUNNER
+    sandbox._RUNNER = runner.replace("0x10000000 | 0x40000000", "-1")  # unshare(-1) always fails
+    try:
+        refused = _status(SOLUTION)
+        allowed = _status(SOLUTION, require_network_isolation=False)
+    finally:
+        sandbox._RUNNER = runner
+    assert refused["status"] == "error" and "network isolation" in refused["sandbox_error"], f"❌ {refused}"
+    assert refused["tests_passed"] == 0
+    assert allowed["status"] == "passed" and allowed["network"] == "unisolated", f"❌ {allowed}"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
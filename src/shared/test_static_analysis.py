@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the static analyzer (shared/static_analysis.py): each code against
+a real snippet, and ordinary code that must stay clean.
+
+Run with: python -m pytest src/shared/test_static_analysis.py
+      or: python src/shared/test_static_analysis.py
+"""
+
+import os
+import sys
+import textwrap
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.static_analysis import analyze_code
+
+
+def _codes(source: str, **kwargs):
+    return [finding.code for finding in analyze_code(textwrap.dedent(source), **kwargs).findings]
+
+
+# --- Each code fires on a real snippet ---
+
+FLAGGED = {
+    "E999": "def broken(:\n    pass\n",
+    "F821": "def total(items):\n    return sum(itmes)\n",
+    "F401": "import os\n\nprint('hi')\n",
+    "F841": "def area(r):\n    pi = 3.14\n    return r * r\n",
+    "F811": "def load():\n    return 1\n\ndef load():\n    return 2\n",
+    "F541": "name = 'x'\nprint(f'hello')\n",
+    "F632": "def check(x):\n    return x is 'admin'\n",
+    "E711": "def empty(x):\n    return x == None\n",
+    "E712": "def yes(x):\n    return x == True\n",
+    "E722": "def safe(f):\n    try:\n        return f()\n    except:\n        return None\n",
+    "B006": "def append(item, items=[]):\n    items.append(item)\n    return items\n",
+}
+
+
+def test_each_code_is_reported():
+    for code, source in FLAGGED.items():
+        codes = _codes(source)
+        assert code in codes, f"❌ {code} not reported for {source!r}: {codes}"
+
+
+def test_c901_is_reported_but_not_blocking():
+    branches = "".join(f"    if x == {i}:\n        return {i}\n" for i in range(11))
+    report = analyze_code(f"def pick(x):\n{branches}    return -1\n")
+    assert [finding.code for finding in report.findings] == ["C901"]
+    assert report.clean, "❌ C901 is informational"
+    assert report.max_complexity == 12
+
+
+def test_syntax_error_stops_analysis():
+    report = analyze_code("import os\ndef broken(:\n")
+    assert not report.parses and [finding.code for finding in report.findings] == ["E999"]
+
+
+# --- Ordinary code stays clean ---
+
+CLEAN = {
+    "format spec": """
+        def describe(a, x, width):
+            print(f'Area: {a:.2f}')
+            print(f'{x:>10}')
+            return f'{x:{width}}|{a!r:>{width}.3}'
+    """,
+    "augmented assignment": """
+        def count(items):
+            total = 0
+            for _ in items:
+                total += 1
+    """,
+    "del": """
+        def drop(cache):
+            entry = cache.pop('k')
+            del entry
+    """,
+    "tuple unpacking": """
+        def first(pairs):
+            key, value = pairs[0]
+            return key
+    """,
+    "closure use": """
+        def outer():
+            counter = 0
+            def inner():
+                return counter
+            return inner
+    """,
+    "star import": """
+        from math import *
+
+        def hypotenuse(a, b):
+            return sqrt(a * a + b * b)
+    """,
+    "exported import": """
+        from os import path
+
+        __all__ = ['path']
+    """,
+    "decorated redefinition": """
+        class Box:
+            @property
+            def size(self):
+                return self._size
+
+            @size.setter
+            def size(self, value):
+                self._size = value
+    """,
+    "class body names": """
+        class Model:
+            key = f"{__module__}.{__qualname__}"
+
+            def kind(self):
+                return __class__.__name__
+    """,
+    "type-checking import in a string annotation": """
+        from typing import TYPE_CHECKING, List
+
+        if TYPE_CHECKING:
+            from decimal import Decimal
+            from fractions import Fraction
+
+        def total(amounts: "List[Decimal]") -> "List['Fraction']":
+            return amounts
+    """,
+    "comparisons": """
+        def check(x, flags):
+            return x is None or x is True or x is ... or x == 0 or flags != []
+    """,
+}
+
+
+def test_ordinary_code_is_clean():
+    for label, source in CLEAN.items():
+        report = analyze_code(textwrap.dedent(source))
+        assert report.clean, f"❌ {label}: {[str(finding) for finding in report.findings]}"
+
+
+def test_placeholder_free_fstring_with_format_spec_sibling():
+    # A format spec elsewhere must not hide a real F541
+    assert _codes("x = 1\nprint(f'{x:.2f}', f'done')\n") == ["F541"]
+
+
+
+def test_names_outside_their_implicit_scope_and_in_string_annotations():
+    assert _codes("x = __qualname__\n") == ["F821"]
+    assert _codes("class A:\n    def f(self):\n        return __qualname__\n") == ["F821"]
+    assert _codes("def f(a: 'Missing'):\n    return a\n") == ["F821"]
+    assert _codes("from decimal import Decimal\n\ndef f(a: 'int'):\n    return a\n") == ["F401"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the tool-result cache (shared/tool_cache.py): hits, single-flight
+coalescing, and the error paths that must release waiting callers.
+
+Run with: python -m pytest src/shared/test_tool_cache.py
+      or: python src/shared/test_tool_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.tool_cache import ToolCache
+
+
+class _Tool:
+    """Minimal BaseTool stand-in: the cache only reads the name"""
+
+    def __init__(self, name="get_forecast"):
+        self.name = name
+
+
+class _Context:
+    """Minimal ToolContext stand-in: the cache only reads function_call_id"""
+
+    def __init__(self, function_call_id):
+        self.function_call_id = function_call_id
+
+
+def _cache(**kwargs):
+    return ToolCache(**kwargs).register(
+        "get_forecast", ttl_seconds=60,
+        key_fn=lambda args: (str(args["location"]).lower(), int(args.get("days", 3))),
+    )
+
+
+ARGS = {"location": "Tokyo", "days": 3}
+TOOL = _Tool()
+
+
+def test_hit_after_store():
+    async def scenario():
+        cache = _cache()
+        assert await cache.before_tool_callback(TOOL, ARGS, _Context("a")) is None
+        await cache.after_tool_callback(TOOL, ARGS, _Context("a"), {"forecast": "sunny"})
+        assert await cache.before_tool_callback(TOOL, {"location": "tokyo"}, _Context("b")) == {"forecast": "sunny"}
+        assert cache.stats()["hits"] == 1 and not cache._leaders
+    asyncio.run(scenario())
+
+
+def test_follower_gets_the_leaders_result():
+    async def scenario():
+        cache = _cache()
+        await cache.before_tool_callback(TOOL, ARGS, _Context("leader"))
+        follower = asyncio.create_task(cache.before_tool_callback(TOOL, ARGS, _Context("follower")))
+        await asyncio.sleep(0)
+        await cache.after_tool_callback(TOOL, ARGS, _Context("leader"), {"forecast": "rain"})
+        assert await follower == {"forecast": "rain"}
+        assert cache.stats()["coalesced"] == 1
+    asyncio.run(scenario())
+
+
+def test_leader_error_releases_followers_at_once():
+    """Regression: a raising tool left followers waiting for inflight_timeout_seconds"""
+    async def scenario():
+        cache = _cache(inflight_timeout_seconds=30)
+        await cache.before_tool_callback(TOOL, ARGS, _Context("leader"))
+        follower = asyncio.create_task(cache.before_tool_callback(TOOL, ARGS, _Context("follower")))
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        await cache.on_tool_error_callback(TOOL, ARGS, _Context("leader"), RuntimeError("upstream down"))
+        # Released follower runs the tool itself, as the new leader
+        assert await asyncio.wait_for(follower, timeout=1) is None
+        assert time.perf_counter() - started < 1
+        assert list(cache._leaders) == ["follower"], f"❌ leaked leaders: {cache._leaders}"
+        assert cache.get("get_forecast", ARGS) is None, "❌ a failed call must not be cached"
+    asyncio.run(scenario())
+
+
+def test_error_response_is_not_cached():
+    async def scenario():
+        cache = _cache()
+        await cache.before_tool_callback(TOOL, ARGS, _Context("a"))
+        await cache.after_tool_callback(TOOL, ARGS, _Context("a"), {"error": "not found"})
+        assert cache.get("get_forecast", ARGS) is None and not cache._inflight and not cache._leaders
+    asyncio.run(scenario())
+
+
+def test_silent_leader_expires():
+    async def scenario():
+        cache = _cache(inflight_timeout_seconds=0.05)
+        await cache.before_tool_callback(TOOL, ARGS, _Context("cancelled"))
+        await asyncio.sleep(0.1)
+        assert not cache._leaders and not cache._inflight, "❌ leader that never reported was kept"
+    asyncio.run(scenario())
+
+
+def test_unkeyable_args_are_not_cached():
+    async def scenario():
+        cache = _cache()
+        args = {"location": "Tokyo", "days": "five"}
+        assert await cache.before_tool_callback(TOOL, args, _Context("a")) is None
+        assert not cache._leaders and not cache._inflight
+        await cache.after_tool_callback(TOOL, args, _Context("a"), {"forecast": "sunny"})
+        assert cache.stats()["entries"] == 0
+    asyncio.run(scenario())
+
+
+def test_unregistered_tool_is_ignored():
+    async def scenario():
+        cache = _cache()
+        other = _Tool("get_alerts")
+        assert await cache.before_tool_callback(other, ARGS, _Context("a")) is None
+        assert await cache.on_tool_error_callback(other, ARGS, _Context("a"), RuntimeError()) is None
+        assert not cache._leaders
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
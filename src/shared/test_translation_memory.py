@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the translation memory (shared/translation_memory.py): only exact
+matches are served, similar ones are hints, and only translation lines are stored.
+
+Run with: python -m pytest src/shared/test_translation_memory.py
+      or: python src/shared/test_translation_memory.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path for shared imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from shared.langid import default_identifier
+from shared.translation_memory import TranslationMemory, extract_translation
+
+WARRANTY = (
+    "The warranty covers all manufacturing defects for twelve months from the date of purchase, "
+    "excluding damage caused by accidents, misuse, unauthorized repairs or normal wear and tear of the product."
+)
+TRANSLATION = "La garantía cubre todos los defectos de fabricación durante doce meses desde la fecha de compra."
+
+
+class _Context:
+    """Minimal CallbackContext stand-in: the memory only reads and writes state"""
+
+    def __init__(self):
+        self.state = {}
+
+
+def _request(message):
+    return LlmRequest(
+        model="gemini-2.0-flash",
+        contents=[types.Content(role="user", parts=[types.Part(text=message)])],
+        config=types.GenerateContentConfig(system_instruction="You are Professor Polyglot."),
+    )
+
+
+def _answer(text):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def test_near_identical_sentences_are_not_served():
+    """Regression: "excluding"→"including" and "twelve"→"six" were served the old translation"""
+    memory = TranslationMemory()
+    memory.store(WARRANTY, "english", "spanish", TRANSLATION)
+    for changed in (WARRANTY.replace("excluding", "including"), WARRANTY.replace("twelve", "six")):
+        assert memory.lookup(changed, "english", "spanish") is None, f"❌ served a translation for {changed!r}"
+        hint = memory.similar(changed, "english", "spanish")
+        assert hint is not None and hint["match"] == "fuzzy" and hint["translation"] == TRANSLATION
+    assert memory.lookup(WARRANTY.upper(), "english", "spanish")["match"] == "exact"
+    assert memory.stats()["exact_hits"] == 1 and memory.stats()["fuzzy_hints"] == 2
+
+
+def test_similar_request_reaches_the_model_with_a_hint():
+    memory = TranslationMemory()
+    context = _Context()
+    memory.store(WARRANTY, default_identifier().detect(WARRANTY)[0] or "unknown", "spanish", TRANSLATION)
+
+    request = _request(f"Translate '{WARRANTY.replace('excluding', 'including')}' to Spanish")
+    assert memory.before_model_callback(context, request) is None, "❌ a fuzzy match skipped the model"
+    assert TRANSLATION in request.config.system_instruction
+    assert context.state["temp:translation_memory_pending"] is not None
+
+    served = memory.before_model_callback(_Context(), _request(f"Translate '{WARRANTY}' to Spanish"))
+    assert served is not None and TRANSLATION in served.content.parts[0].text
+
+
+def test_only_the_translation_line_is_stored():
+    """Regression: the whole Professor Polyglot answer was stored as the translation"""
+    memory = TranslationMemory()
+    context = _Context()
+    memory.before_model_callback(context, _request("Translate 'Good morning, friend' to Spanish"))
+    memory.after_model_callback(context, _answer(
+        "🌍 What a lovely greeting!\n\n**Translation:** \"Buenos días, amigo\"\n\n"
+        "📚 **Cultural Notes:** \"amigo\" is warm and informal."
+    ))
+    served = memory.before_model_callback(_Context(), _request("Translate 'Good morning, friend' to Spanish"))
+    assert served.content.parts[0].text == "**Translation:** Buenos días, amigo"
+
+    chat = _Context()
+    memory.before_model_callback(chat, _request("Translate 'See you tomorrow' to Spanish"))
+    memory.after_model_callback(chat, _answer("🌍 Great question! There are many ways to say goodbye..."))
+    assert memory.stats()["entries"] == 1, "❌ stored a chat answer without a translation line"
+    assert chat.state["temp:translation_memory_pending"] is None
+
+
+def test_extract_translation():
+    assert extract_translation("**Primary Translation:** ¡Hola! ¿Cómo está usted hoy?") == "¡Hola! ¿Cómo está usted hoy?"
+    assert extract_translation("Intro\nTranslation: «Bonjour»\nNotes") == "Bonjour"
+    assert extract_translation("🌍 **Enhanced Spanish Translation**\n\nNo line here") is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
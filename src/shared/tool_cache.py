@@ -0,0 +1,319 @@
+"""
+Shared Tool-Result Cache for Tool Callbacks
+
+This module provides a memoization layer for read-only tools built from a
+before_tool_callback / after_tool_callback pair:
+
+- before_tool_callback returns the cached result (skipping tool execution)
+- after_tool_callback stores the result of a real execution
+
+Each tool declares its own TTL and key normalization. The cache is a bounded
+LRU, and concurrent identical calls are coalesced into one execution
+(single-flight): followers wait for the leader's result instead of running
+the tool again. If the leader's tool raises (on_tool_error_callback), or the
+leader never reports back within inflight_timeout_seconds, the waiting
+followers are released to run the tool themselves.
+
+Results can also be warmed speculatively with prefetch() (see
+shared/prefetch.py); a later real call is then served from the cache or
+coalesced onto the running prefetch, and stats() reports how many
+prefetches were used and how many were wasted.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+logger = logging.getLogger(__name__)
+
+KeyFunction = Callable[[Dict[str, Any]], Tuple]
+
+
+def default_cache_key(args: Dict[str, Any]) -> Tuple:
+    """Case- and whitespace-insensitive key over all arguments"""
+    return tuple(
+        (name, value.strip().lower() if isinstance(value, str) else repr(value))
+        for name, value in sorted(args.items())
+    )
+
+
+class ToolCache:
+    """
+    Bounded LRU cache of tool results with per-tool TTL and single-flight
+
+    Usage:
+        cache = ToolCache(max_entries=1024)
+        cache.register("get_current_weather", ttl_seconds=300)
+        agent = LlmAgent(
+            ...,
+            before_tool_callback=[permission_callback, cache.before_tool_callback],
+            after_tool_callback=cache.after_tool_callback,
+            on_tool_error_callback=cache.on_tool_error_callback,
+        )
+
+    Put cache.before_tool_callback last in the before_tool_callback list, so
+    permission checks still run for cached results.
+    """
+
+    def __init__(self, max_entries: int = 1024, inflight_timeout_seconds: float = 30.0):
+        """
+        Args:
+            max_entries: Maximum number of cached results (least recently used are evicted)
+            inflight_timeout_seconds: How long a coalesced call waits for the leader
+                before running the tool itself (also how long a leader is tracked)
+        """
+        self.max_entries = max_entries
+        self.inflight_timeout_seconds = inflight_timeout_seconds
+        self._policies: Dict[str, Tuple[float, KeyFunction]] = {}
+        self._entries: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # function_call_id -> (cache key, expiry timer), for calls that actually execute the tool
+        self._leaders: Dict[str, Tuple[tuple, asyncio.TimerHandle]] = {}
+        # cache key -> milliseconds spent fetching it, for prefetched results not yet used
+        self._speculative: Dict[tuple, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.prefetches = 0
+        self.prefetch_hits = 0
+        self.prefetch_wasted = 0
+        self.prefetch_wasted_ms = 0.0
+
+    def register(
+        self, tool_name: str, ttl_seconds: float, key_fn: Optional[KeyFunction] = None
+    ) -> "ToolCache":
+        """
+        Declare a read-only tool as cacheable
+
+        Args:
+            tool_name: Name of the tool
+            ttl_seconds: How long a result stays valid
+            key_fn: Maps the tool args to a hashable cache key (default_cache_key if omitted);
+                if it raises TypeError or ValueError, that call isn't cached
+
+        Returns:
+            The cache, for chaining
+        """
+        self._policies[tool_name] = (ttl_seconds, key_fn or default_cache_key)
+        return self
+
+    def _key(self, tool_name: str, args: Dict[str, Any]) -> Optional[tuple]:
+        policy = self._policies.get(tool_name)
+        if policy is None:
+            return None
+        try:
+            return (tool_name, policy[1](args))
+        except (TypeError, ValueError) as e:
+            logger.debug(f"[ToolCache] not caching {tool_name}: no key for {args} ({e})")
+            return None
+
+    def get(self, tool_name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached result for these args, or None"""
+        key = self._key(tool_name, args)
+        if key is None:
+            return None
+        return self._lookup(key)
+
+    def _lookup(self, key: tuple) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._discard_speculative(key)
+            return None
+        self._entries.move_to_end(key)
+        # Shallow copy so later callbacks can't mutate the cached entry
+        return dict(response)
+
+    def put(self, tool_name: str, args: Dict[str, Any], response: Any) -> None:
+        """Store a tool result (non-dict results are wrapped as {"result": value})"""
+        key = self._key(tool_name, args)
+        if key is not None:
+            self._store(key, response)
+
+    def _store(self, key: tuple, response: Any) -> Dict[str, Any]:
+        if not isinstance(response, dict):
+            response = {"result": response}
+        ttl_seconds = self._policies[key[0]][0]
+        self._entries[key] = (time.monotonic() + ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._discard_speculative(evicted)
+        return response
+
+    def _resolve(self, key: tuple, response: Optional[Dict[str, Any]]) -> None:
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def _release_leader(self, function_call_id: str) -> Optional[tuple]:
+        """Stop tracking a leader; returns its cache key (None if it wasn't one)"""
+        leader = self._leaders.pop(function_call_id, None)
+        if leader is None:
+            return None
+        key, timer = leader
+        timer.cancel()
+        return key
+
+    def _expire_leader(self, function_call_id: str) -> None:
+        # The leader never reached after_tool_callback or on_tool_error_callback
+        # (e.g. it was cancelled): release its followers and forget it
+        key = self._release_leader(function_call_id)
+        if key is not None:
+            logger.warning(f"[ToolCache] leader {function_call_id} for {key[0]} did not report back")
+            self._resolve(key, None)
+
+    def _use_speculative(self, key: tuple) -> None:
+        if self._speculative.pop(key, None) is not None:
+            self.prefetch_hits += 1
+
+    def _discard_speculative(self, key: tuple) -> None:
+        fetch_ms = self._speculative.pop(key, None)
+        if fetch_ms is not None:
+            self.prefetch_wasted += 1
+            self.prefetch_wasted_ms += fetch_ms
+
+    async def prefetch(
+        self, tool_name: str, args: Dict[str, Any], fetch: Callable[[], Awaitable[Any]]
+    ) -> bool:
+        """
+        Speculatively run a tool and cache its result
+
+        While the fetch runs, identical real calls coalesce onto it.
+
+        Args:
+            tool_name: Name of a registered tool
+            args: Arguments the tool is expected to be called with
+            fetch: Coroutine function running the tool with those arguments
+
+        Returns:
+            True if a result was fetched and cached; False if the tool isn't
+            registered, the result was already cached or in flight, or the fetch failed
+        """
+        key = self._key(tool_name, args)
+        if key is None or key in self._inflight or self._lookup(key) is not None:
+            return False
+
+        self.prefetches += 1
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        try:
+            response = await fetch()
+        except Exception as e:
+            logger.warning(f"[ToolCache] prefetch of {tool_name} failed: {e}")
+            response = None
+        fetch_ms = (time.perf_counter() - started) * 1000
+        if response is None or (isinstance(response, dict) and response.get("error")):
+            self.prefetch_wasted += 1
+            self.prefetch_wasted_ms += fetch_ms
+            self._resolve(key, None)
+            return False
+
+        self._speculative[key] = fetch_ms
+        self._resolve(key, self._store(key, response))
+        return True
+
+    async def before_tool_callback(
+        self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[Dict]:
+        """Serve cached results and coalesce identical in-flight calls"""
+        key = self._key(tool.name, args)
+        if key is None:
+            return None
+
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            self._use_speculative(key)
+            logger.info(f"[ToolCache] hit for {tool.name}")
+            return cached
+
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                response = await asyncio.wait_for(
+                    asyncio.shield(future), timeout=self.inflight_timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                response = None
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            if response is not None:
+                self.coalesced += 1
+                self._use_speculative(key)
+                logger.info(f"[ToolCache] coalesced call for {tool.name}")
+                return dict(response)
+
+        # This call executes the tool; identical calls wait for its result
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        self._inflight.setdefault(key, loop.create_future())
+        function_call_id = tool_context.function_call_id
+        self._release_leader(function_call_id)
+        timer = loop.call_later(self.inflight_timeout_seconds, self._expire_leader, function_call_id)
+        self._leaders[function_call_id] = (key, timer)
+        return None
+
+    async def after_tool_callback(
+        self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+    ) -> Optional[Dict]:
+        """Store the result of a real execution and wake coalesced callers"""
+        key = self._release_leader(tool_context.function_call_id)
+        if key is None:
+            # Served from the cache (or not cacheable): nothing to store
+            return None
+
+        if isinstance(tool_response, dict) and tool_response.get("error"):
+            # Don't cache failures; waiting callers run the tool themselves
+            self._resolve(key, None)
+            return None
+
+        response = self._store(key, tool_response)
+        self._resolve(key, response)
+        return None
+
+    async def on_tool_error_callback(
+        self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[Dict]:
+        """Release coalesced callers when the leader's tool raises (the error itself propagates)"""
+        key = self._release_leader(tool_context.function_call_id)
+        if key is not None:
+            logger.info(f"[ToolCache] {tool.name} raised {type(error).__name__}; not caching")
+            self._resolve(key, None)
+        return None
+
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        """Drop cached results for one tool, or for every tool"""
+        if tool_name is None:
+            for key in list(self._speculative):
+                self._discard_speculative(key)
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == tool_name]:
+            del self._entries[key]
+            self._discard_speculative(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/coalesced and prefetch counters and the current size"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "prefetches": self.prefetches,
+            "prefetch_hits": self.prefetch_hits,
+            "prefetch_hit_rate": round(self.prefetch_hits / self.prefetches, 4) if self.prefetches else None,
+            "prefetch_pending": len(self._speculative),
+            "prefetch_wasted": self.prefetch_wasted,
+            "prefetch_wasted_ms": round(self.prefetch_wasted_ms, 1),
+        }
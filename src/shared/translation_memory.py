@@ -0,0 +1,322 @@
+"""
+Shared Translation Memory for the Translation Service
+
+This module stores finished translations keyed by (normalized source text,
+source language, target language) and reuses them:
+
+- exact matches after normalization (case, whitespace, punctuation) are
+  served without calling the LLM
+- fuzzy matches, found through a MinHash/LSH index over character shingles and
+  verified against the real Jaccard similarity, are only passed to the model
+  as a hint: a near-identical sentence can differ in exactly the word that
+  matters ("including"/"excluding", "six"/"twelve")
+
+A before_model_callback consults the memory; an after_model_callback records
+the translation line of the model's answer (chat answers without one are not
+stored). Hit rate and the model latency saved are tracked in stats().
+"""
+
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .langid import default_identifier
+
+logger = logging.getLogger(__name__)
+
+# Pending request recorded by before_model for after_model (invocation-scoped state)
+PENDING_STATE_KEY = "temp:translation_memory_pending"
+
+# Requests like: Translate 'Hello there' to Spanish
+_REQUEST_PATTERN = re.compile(
+    r"translate\s+[\"'“‘](?P<text>.+?)[\"'”’]\s+(?:in)?to\s+(?P<target>[A-Za-zÀ-ÿ]+)(?P<rest>.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# The line holding the translation in a chat answer, e.g. "**Translation:** Hola"
+_TRANSLATION_LINE = re.compile(
+    r"^[\W_]*(?:primary\s+)?translation[\s*_]*:[\s*_]*(?P<text>.+)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_QUOTES = {'"': '"', "'": "'", "“": "”", "‘": "’", "«": "»"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+
+
+def normalize_source(text: str) -> str:
+    """Normalize source text for matching (case, whitespace and punctuation are ignored)"""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def parse_translation_request(message: str) -> Optional[Tuple[str, str]]:
+    """
+    Extract (source_text, target_language) from a plain translation request
+
+    Requests with extra instructions after the target language (e.g.
+    "with cultural context") return None, since a stored translation
+    wouldn't answer them.
+    """
+    match = _REQUEST_PATTERN.search(message.strip())
+    if match is None or match.group("rest").strip(" .!?"):
+        return None
+    return match.group("text").strip(), match.group("target").lower()
+
+
+def extract_translation(answer: str) -> Optional[str]:
+    """
+    Extract the translation from a model answer
+
+    Returns:
+        The text of the first "Translation: ..." line, without markdown
+        emphasis or enclosing quotes, or None if the answer has no such line
+    """
+    match = _TRANSLATION_LINE.search(answer)
+    if match is None:
+        return None
+    text = match.group("text").strip().strip("*_").strip()
+    if len(text) >= 2 and _QUOTES.get(text[0]) == text[-1]:
+        text = text[1:-1].strip()
+    return text or None
+
+
+def _shingles(text: str, size: int = 4) -> FrozenSet[int]:
+    padded = f" {text} "
+    if len(padded) <= size:
+        return frozenset([zlib.crc32(padded.encode("utf-8"))])
+    return frozenset(zlib.crc32(padded[i:i + size].encode("utf-8")) for i in range(len(padded) - size + 1))
+
+
+class _Entry:
+    __slots__ = ("key", "source", "translation", "shingles", "bands", "latency_ms", "uses")
+
+    def __init__(self, key, source, translation, shingles, bands, latency_ms):
+        self.key = key
+        self.source = source
+        self.translation = translation
+        self.shingles = shingles
+        self.bands = bands
+        self.latency_ms = latency_ms
+        self.uses = 0
+
+
+class TranslationMemory:
+    """
+    Exact + fuzzy (MinHash/LSH) translation memory
+
+    Usage:
+        memory = TranslationMemory()
+        agent = LlmAgent(
+            ...,
+            before_model_callback=memory.before_model_callback,
+            after_model_callback=[memory.after_model_callback, quality_callback],
+        )
+        print(memory.stats())
+    """
+
+    def __init__(
+        self,
+        fuzzy_threshold: float = 0.9,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 10_000,
+    ):
+        """
+        Args:
+            fuzzy_threshold: Minimum Jaccard similarity for a stored translation to be offered as a hint
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must be divisible by bands)
+            max_entries: Maximum number of stored translations (least recently used evicted)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.fuzzy_threshold = fuzzy_threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        # Fixed hash parameters, so signatures are stable for the process lifetime
+        self._hash_params = [
+            (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode())) for i in range(num_perm)
+        ]
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._buckets: Dict[tuple, set] = {}
+        self.lookups = 0
+        self.exact_hits = 0
+        self.fuzzy_hints = 0
+        self.latency_saved_ms = 0.0
+
+    # --- Store ---
+
+    def _signature(self, shingles: FrozenSet[int]) -> List[int]:
+        return [min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles) for a, b in self._hash_params]
+
+    def _band_keys(self, pair: Tuple[str, str], signature: List[int]) -> List[tuple]:
+        return [
+            (pair, band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)
+        ]
+
+    def store(self, source: str, source_lang: str, target_lang: str, translation: str, latency_ms: float = 0.0) -> None:
+        """
+        Record a translation
+
+        Args:
+            source: Source text
+            source_lang: Source language
+            target_lang: Target language
+            translation: The translation to reuse
+            latency_ms: How long producing it took (counted as saved on reuse)
+        """
+        normalized = normalize_source(source)
+        pair = (source_lang.lower(), target_lang.lower())
+        key = (normalized,) + pair
+        if key in self._entries:
+            self._remove(key)
+        shingles = _shingles(normalized)
+        bands = self._band_keys(pair, self._signature(shingles))
+        entry = _Entry(key, normalized, translation, shingles, bands, latency_ms)
+        self._entries[key] = entry
+        for band_key in bands:
+            self._buckets.setdefault(band_key, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        for band_key in entry.bands:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    # --- Lookup ---
+
+    def lookup(self, source: str, source_lang: str, target_lang: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a translation that can be served as is (exact matches only)
+
+        Returns:
+            {"translation", "match": "exact", "similarity", "matched_source"} or None
+        """
+        self.lookups += 1
+        normalized = normalize_source(source)
+        entry = self._entries.get((normalized, source_lang.lower(), target_lang.lower()))
+        if entry is None:
+            return None
+        self.exact_hits += 1
+        self.latency_saved_ms += entry.latency_ms
+        return self._hit(entry, "exact", 1.0)
+
+    def similar(self, source: str, source_lang: str, target_lang: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar stored translation, to guide the model (never served as is)
+
+        Returns:
+            {"translation", "match": "fuzzy", "similarity", "matched_source"} or None
+        """
+        normalized = normalize_source(source)
+        pair = (source_lang.lower(), target_lang.lower())
+        shingles = _shingles(normalized)
+        candidates = set()
+        for band_key in self._band_keys(pair, self._signature(shingles)):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best, best_similarity = None, 0.0
+        for candidate_key in candidates:
+            candidate = self._entries[candidate_key]
+            similarity = len(shingles & candidate.shingles) / len(shingles | candidate.shingles)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is None or best.source == normalized or best_similarity < self.fuzzy_threshold:
+            return None
+        self.fuzzy_hints += 1
+        return self._hit(best, "fuzzy", best_similarity)
+
+    def _hit(self, entry: _Entry, match: str, similarity: float) -> Dict[str, Any]:
+        entry.uses += 1
+        self._entries.move_to_end(entry.key)
+        return {
+            "translation": entry.translation,
+            "match": match,
+            "similarity": round(similarity, 4),
+            "matched_source": entry.source,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lookup counters, hit rate and model latency saved"""
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hints": self.fuzzy_hints,
+            "hit_rate": round(self.exact_hits / self.lookups, 4) if self.lookups else None,
+            "latency_saved_ms": round(self.latency_saved_ms, 1),
+        }
+
+    # --- Callbacks ---
+
+    def before_model_callback(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """Answer exact repeats from memory, skipping the LLM; hint similar ones to the model"""
+        state = callback_context.state
+        if not state.get("translation_memory_enabled", True):
+            return None
+
+        # Only the first model call of a turn sees the user's message last
+        last = llm_request.contents[-1] if llm_request.contents else None
+        if last is None or last.role != "user" or not last.parts or not last.parts[0].text:
+            return None
+        parsed = parse_translation_request(last.parts[0].text)
+        if parsed is None:
+            return None
+
+        source, target_lang = parsed
+        source_lang = default_identifier().detect(source)[0] or "unknown"
+        hit = self.lookup(source, source_lang, target_lang)
+        if hit is not None:
+            print(f"[📚 Translation Memory] exact hit for '{source}' → {target_lang}")
+            answer = f"**Translation:** {hit['translation']}"
+            return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=answer)]))
+
+        similar = self.similar(source, source_lang, target_lang)
+        if similar is not None:
+            llm_request.append_instructions([
+                "Translation memory: a similar text was translated before.\n"
+                f"Similar source: {similar['matched_source']}\n"
+                f"Its translation: {similar['translation']}\n"
+                "Reuse its terminology where the meaning is the same, but translate the new text "
+                "in full: it differs, and a single word can change its meaning."
+            ])
+        state[PENDING_STATE_KEY] = {
+            "source": source,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "started": time.perf_counter(),
+        }
+        return None
+
+    def after_model_callback(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """Record the translation line of the final answer to a request that missed the memory"""
+        state = callback_context.state
+        pending = state.get(PENDING_STATE_KEY)
+        if not pending or llm_response.partial:
+            return None
+        parts = llm_response.content.parts if llm_response.content else None
+        if not parts or any(part.function_call for part in parts):
+            return None  # Tool call; the translation comes in a later model response
+
+        text = extract_translation("".join(part.text for part in parts if part.text))
+        if text:
+            latency_ms = (time.perf_counter() - pending["started"]) * 1000
+            self.store(pending["source"], pending["source_lang"], pending["target_lang"], text, latency_ms)
+            logger.info(f"Translation memory stored '{pending['source']}' → {pending['target_lang']} ({latency_ms:.0f} ms)")
+        state[PENDING_STATE_KEY] = None
+        return None
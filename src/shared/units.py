@@ -0,0 +1,161 @@
+"""
+Shared Unit Registry for the Unit Converter Tool
+
+Every unit belongs to a dimension and is defined by an affine transform to
+the dimension's base unit:
+
+    base_value = value * scale + offset
+
+so temperatures (which have an offset) and plain scale units are handled
+the same way. At import the registry is precomputed into a conversion
+matrix per dimension, so converting between any pair of units in a
+dimension is one multiply and one add; batch conversions apply that to a
+whole NumPy array at once (with a pure-Python fallback without NumPy).
+"""
+
+import logging
+from fractions import Fraction
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch conversions fall back to Python
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# unit -> (dimension, scale, offset) relative to the dimension's base unit
+# (meter, gram, kelvin, liter). Exact fractions, so the precomputed
+# transforms round only once (0 celsius -> exactly 32 fahrenheit).
+_C = Fraction("273.15")
+UNIT_DEFINITIONS: Dict[str, Tuple[str, Fraction, Fraction]] = {
+    # Length
+    "mm": ("length", Fraction("0.001"), 0),
+    "cm": ("length", Fraction("0.01"), 0),
+    "m": ("length", 1, 0),
+    "km": ("length", 1000, 0),
+    "inch": ("length", Fraction("0.0254"), 0),
+    "ft": ("length", Fraction("0.3048"), 0),
+    "yard": ("length", Fraction("0.9144"), 0),
+    "mile": ("length", Fraction("1609.344"), 0),
+    # Weight
+    "mg": ("weight", Fraction("0.001"), 0),
+    "g": ("weight", 1, 0),
+    "kg": ("weight", 1000, 0),
+    "oz": ("weight", Fraction("28.349523125"), 0),
+    "lb": ("weight", Fraction("453.59237"), 0),
+    # Temperature
+    "kelvin": ("temperature", 1, 0),
+    "celsius": ("temperature", 1, _C),
+    "fahrenheit": ("temperature", Fraction(5, 9), _C - 32 * Fraction(5, 9)),
+    "rankine": ("temperature", Fraction(5, 9), 0),
+    # Volume
+    "ml": ("volume", Fraction("0.001"), 0),
+    "l": ("volume", 1, 0),
+    "cup": ("volume", Fraction("0.2365882365"), 0),
+    "pint": ("volume", Fraction("0.473176473"), 0),
+    "gallon": ("volume", Fraction("3.785411784"), 0),
+}
+
+UNIT_ALIASES = {
+    "millimeter": "mm", "millimeters": "mm",
+    "centimeter": "cm", "centimeters": "cm",
+    "meter": "m", "meters": "m", "metre": "m", "metres": "m",
+    "kilometer": "km", "kilometers": "km",
+    "in": "inch", "inches": "inch",
+    "foot": "ft", "feet": "ft",
+    "yd": "yard", "yards": "yard",
+    "mi": "mile", "miles": "mile",
+    "milligram": "mg", "milligrams": "mg",
+    "gram": "g", "grams": "g",
+    "kilogram": "kg", "kilograms": "kg",
+    "ounce": "oz", "ounces": "oz",
+    "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "k": "kelvin",
+    "c": "celsius", "°c": "celsius",
+    "f": "fahrenheit", "°f": "fahrenheit",
+    "r": "rankine",
+    "milliliter": "ml", "milliliters": "ml",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "cups": "cup", "pints": "pint", "gallons": "gallon", "gal": "gallon",
+}
+
+
+class UnitError(ValueError):
+    """Raised for unknown units or conversions across dimensions"""
+
+
+class _Dimension:
+    """Precomputed pairwise transforms for one dimension"""
+
+    def __init__(self, name: str, units: List[str]):
+        self.name = name
+        self.index = {unit: position for position, unit in enumerate(units)}
+        scales = [Fraction(UNIT_DEFINITIONS[unit][1]) for unit in units]
+        offsets = [Fraction(UNIT_DEFINITIONS[unit][2]) for unit in units]
+        # to = value * factor[i][j] + shift[i][j] for a conversion from unit i to unit j
+        self.factor = [[float(scales[i] / scales[j]) for j in range(len(units))] for i in range(len(units))]
+        self.shift = [
+            [float((offsets[i] - offsets[j]) / scales[j]) for j in range(len(units))] for i in range(len(units))
+        ]
+
+
+def _build_dimensions() -> Dict[str, _Dimension]:
+    grouped: Dict[str, List[str]] = {}
+    for unit, (dimension, _, _) in UNIT_DEFINITIONS.items():
+        grouped.setdefault(dimension, []).append(unit)
+    return {name: _Dimension(name, units) for name, units in grouped.items()}
+
+
+_DIMENSIONS = _build_dimensions()
+
+
+def normalize_unit(unit: str) -> str:
+    """Return the canonical name of a unit (case-insensitive, aliases resolved)"""
+    key = unit.strip().lower()
+    key = UNIT_ALIASES.get(key, key)
+    if key not in UNIT_DEFINITIONS:
+        raise UnitError(f"Unknown unit: {unit}")
+    return key
+
+
+def conversion(from_unit: str, to_unit: str) -> Tuple[float, float, str]:
+    """
+    Look up the affine transform between two units
+
+    Returns:
+        (factor, shift, dimension) such that converted = value * factor + shift
+
+    Raises:
+        UnitError: For unknown units or units of different dimensions
+    """
+    source = normalize_unit(from_unit)
+    target = normalize_unit(to_unit)
+    source_dimension = UNIT_DEFINITIONS[source][0]
+    target_dimension = UNIT_DEFINITIONS[target][0]
+    if source_dimension != target_dimension:
+        raise UnitError(
+            f"Cannot convert {source_dimension} ({source}) to {target_dimension} ({target})"
+        )
+    dimension = _DIMENSIONS[source_dimension]
+    i, j = dimension.index[source], dimension.index[target]
+    return dimension.factor[i][j], dimension.shift[i][j], source_dimension
+
+
+def convert(value: float, from_unit: str, to_unit: str) -> Tuple[float, str]:
+    """Convert one value; returns (converted_value, dimension)"""
+    factor, shift, dimension = conversion(from_unit, to_unit)
+    return value * factor + shift, dimension
+
+
+def convert_many(values: Sequence[float], from_unit: str, to_unit: str) -> Tuple[List[float], str]:
+    """Convert a sequence of values with one transform lookup; returns (converted_values, dimension)"""
+    factor, shift, dimension = conversion(from_unit, to_unit)
+    if np is None:
+        return [value * factor + shift for value in values], dimension
+    return (np.asarray(values, dtype=np.float64) * factor + shift).tolist(), dimension
+
+
+def units_by_dimension() -> Dict[str, List[str]]:
+    """Return the canonical unit names of every dimension"""
+    return {name: list(dimension.index) for name, dimension in _DIMENSIONS.items()}
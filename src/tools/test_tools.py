@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the purchaser name extraction used by the speculative prefetch
+(tools/tools.py).
+
+Run with: python -m pytest src/tools/test_tools.py
+      or: python src/tools/test_tools.py
+"""
+
+import importlib.util
+import os
+
+# Load tools.py under a name of its own: "tools" can already be another example's
+# package (src/18-session-state-example/tools) when pytest collects the whole repo
+_spec = importlib.util.spec_from_file_location(
+    "natura_tools", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.py")
+)
+natura_tools = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(natura_tools)
+extract_purchaser_args = natura_tools.extract_purchaser_args
+
+NAMES = {
+    "My name is Gabriel Silva": "Gabriel Silva",
+    "Hi, my name is Massini and my order broke": "Massini",
+    "Olá, meu nome é Erike, meu perfume chegou quebrado": "Erike",
+    "Meu nome é Maria da Silva Santos Pereira": "Maria da Silva Santos",
+    "me chamo João Pedro.": "João Pedro",
+    "Nome: Ana Luíza\nPedido NAT001": "Ana Luíza",
+}
+
+NOT_NAMES = [
+    "I am Very upset",
+    "I'm Sorry to bother you",
+    "This is Natura support?",
+    "Sou Cliente desde 2010",
+    "Aqui é Natura?",
+    "my name is gabriel",
+    "Where is my order?",
+]
+
+
+def test_full_names_are_extracted():
+    for text, name in NAMES.items():
+        assert extract_purchaser_args(text) == {"purchaser": name}, f"❌ {text!r}: {extract_purchaser_args(text)}"
+
+
+def test_phrases_that_are_not_introductions():
+    for text in NOT_NAMES:
+        assert extract_purchaser_args(text) is None, f"❌ {text!r}: {extract_purchaser_args(text)}"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
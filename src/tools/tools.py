@@ -1,5 +1,6 @@
 import logging
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Optional
 
 # Configurar logging
 logging.basicConfig(
@@ -12,6 +13,15 @@ logger = logging.getLogger(__name__)
 ELIGIBLE_SHIPPING_METHODS = ["INSURED"]
 ELIGIBLE_REASONS = ["DAMAGED", "NEVER_ARRIVED"]
 
+# Apresentações explícitas na primeira mensagem ("meu nome é Erike", "my name is Gabriel Silva").
+# Formas como "sou", "i am" e "this is" ficam de fora: "Sou Cliente desde 2010" e
+# "I am Very upset" não são nomes. Captura até 3 palavras com inicial maiúscula,
+# aceitando partículas como "da" e "dos" entre elas ("Maria da Silva").
+PURCHASER_PATTERN = re.compile(
+    r"(?i:\b(?:meu nome é|meu nome e|me chamo|my name is|nome:|name:))\s+"
+    r"(?P<name>[A-ZÀ-Ý][a-zà-ÿ'-]+(?:[ \t]+(?:d[aeo]s?[ \t]+)?[A-ZÀ-Ý][a-zà-ÿ'-]+){0,2})"
+)
+
 
 def get_purchase_history(purchaser: str) -> List[Dict[str, Any]]:
     """
@@ -81,6 +91,35 @@ def get_purchase_history(purchaser: str) -> List[Dict[str, Any]]:
     return history
 
 
+def purchase_history_cache_key(args: Dict[str, Any]) -> str:
+    """
+    Chave de cache para get_purchase_history (mesma normalização do nome usada pela ferramenta).
+
+    Args:
+        args: Argumentos da chamada da ferramenta
+
+    Returns:
+        Nome do cliente normalizado
+    """
+    return str(args.get("purchaser", "")).strip().title()
+
+
+def extract_purchaser_args(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Prever os argumentos de get_purchase_history a partir da mensagem do cliente (pré-busca).
+
+    Args:
+        text: Mensagem do cliente
+
+    Returns:
+        {"purchaser": nome} se o cliente se apresentou, None caso contrário
+    """
+    match = PURCHASER_PATTERN.search(text)
+    if match is None:
+        return None
+    return {"purchaser": match.group("name")}
+
+
 def check_refund_eligibility(reason: str, shipping_method: str) -> bool:
     """
     Verificar se uma solicitação de reembolso é elegível com base no motivo e método de envio.